@@ -1,5 +1,6 @@
 import streamlit as st
 
+from data.data_loader import sync_data_version
 
 st.set_page_config(page_title="Ардын Эрх Онооны Тайлан", layout="wide")
 
@@ -19,5 +20,10 @@ pages = {
     ],
 }
 
+# new pipeline data version -> caches dropped; missing / mis-shaped outputs reported before any page renders
+problems = sync_data_version()
+if problems:
+    st.warning("Precomputed өгөгдөл дутуу байна (data_pre_compute.py-г дахин ажиллуулна уу):\n\n" + "\n".join(f"- {p}" for p in problems))
+
 pg = st.navigation(pages)
 pg.run()
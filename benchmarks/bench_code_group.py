@@ -0,0 +1,122 @@
+"""
+bench_code_group.py
+
+CODE_GROUP mapping benchmark:
+    old: df["LOYAL_CODE"].apply(<hard-coded if/else>)   (one python call per row)
+    new: code_groups.assign_code_group(df["LOYAL_CODE"])  (rules once per distinct code)
+
+Input is synthetic: LOYAL_CODE drawn from loyalty_lookup_2.csv (+ a few edge cases),
+10K_TRANSACTION dominant like in the real data.
+
+Run (from repo root):
+    python benchmarks/bench_code_group.py              # 50M rows
+    python benchmarks/bench_code_group.py --rows 5000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+sys.path.insert(0, str(DATA_DIR))
+
+from code_groups import GEO_CODES, assign_code_group  # noqa: E402
+
+
+def legacy_map_code_group(code: str) -> str:
+    """Frozen copy of the original if/else mapping (reference for speed + correctness)."""
+    if pd.isna(code):
+        return "Financial Transactions"
+
+    code = str(code).strip().upper()
+
+    if code in {"10K_TRANSACTION", "10K_CHARGE_CUPCAKE", "10K_CHARGE_CUPCAKE_1", "10K_TULBUR_TSES", "10K_TRANSACTION_CARD"}:
+        return "Core Transactions"
+    if code in GEO_CODES:
+        return "Campaigns & Events"
+    if (
+        code.startswith("10K_OPEN")
+        or code in {"ARD_SEC", "ARD_SEC1", "ARD_SEC100", "10K_KIDS61"}
+        or code.endswith("UTSD")
+        or "TETDANS" in code
+    ):
+        return "Account Opening"
+    if (
+        "TRANSACTION" in code or "CHARGE" in code or "CCA" in code or "AFFILIATE" in code
+        or code in {"LOYALTY_LIMIT", "ACO", "ZEEL_TULULT"}
+    ):
+        return "Financial Transactions"
+    if "INSUR" in code or "DAATGAL" in code:
+        return "Insurance"
+    if (
+        code.startswith(("MARAL", "MARAN")) or "KRYPTOS" in code or "PNP" in code
+        or "LOTTO" in code or code == "10K_GAME"
+    ):
+        return "Merchant & Lifestyle"
+    if "SOCIAL" in code or "FACEBOOK" in code or "SELFIE" in code or "MEDEE" in code or "TUUH" in code:
+        return "Campaigns & Events"
+    if code.startswith("10K_BUY") or code.startswith("ARD_") or "1072" in code or "HOS" in code or "HOUS" in code:
+        return "Investments & Securities"
+    if code.startswith((
+        "INVESTORWEEK", "TVMEN", "SMART", "HURUNGU",
+        "PENSION_SURGALT", "CREDIT_SURGALT", "CREDIT_ZEEL",
+        "ARDCOIN", "CREDIT_AIRDROP"
+    )):
+        return "Campaigns & Events"
+    if code.startswith("INF") and len(code) >= 7 and code[3:7].isdigit():
+        return "Campaigns & Events"
+    return "Other"
+
+
+def make_loyal_codes(rows: int, seed: int = 42) -> pd.Series:
+    lookup = pd.read_csv(DATA_DIR / "loyalty_lookup_2.csv")
+    codes = lookup["LOYAL_CODE"].astype(str).tolist()
+    codes += ["None", " 10k_transaction ", "INF2025_RDX_50", "INFO_PAGE", "unknown_code"]
+
+    weights = np.ones(len(codes))
+    weights[codes.index("10K_TRANSACTION")] = 150  # dominant code, like the real data
+    weights /= weights.sum()
+
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(len(codes), size=rows, p=weights)
+    # object strings, same as after .fillna("None").astype(str) in the pipeline
+    return pd.Series(np.asarray(codes, dtype=object)[idx], name="LOYAL_CODE")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} synthetic LOYAL_CODE rows...")
+    loyal_code = make_loyal_codes(args.rows, args.seed)
+    print(f"Distinct codes: {loyal_code.nunique():,}")
+
+    t0 = time.perf_counter()
+    old = loyal_code.apply(legacy_map_code_group)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = assign_code_group(loyal_code)
+    t_new = time.perf_counter() - t0
+
+    same = bool((old.to_numpy() == new.astype(str).to_numpy()).all())
+
+    print(f"apply(map_code_group) : {t_old:8.2f}s")
+    print(f"assign_code_group     : {t_new:8.2f}s")
+    print(f"speedup               : {t_old / t_new:8.1f}x")
+    print(f"identical output      : {same}")
+
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+bench_ipc_store.py
+
+Memory of several Streamlit server processes on one host, parquet vs the memory-mapped
+IPC store (ipc_store.py), on a folder written by data_pre_compute.py.
+
+For each mode, REPLICAS processes are started together. Each one imports data_loader,
+loads what the app holds (load_data() + every load_precomputed_* + the user sketches)
+and then, while all of them are alive, reads /proc/self/smaps_rollup:
+    rss_mb      resident pages of the process
+    pss_mb      resident pages, shared ones divided by the processes sharing them
+    private_mb  pages no other process shares (what each extra replica really costs)
+startup_s is the load time (caches cold, OS page cache warm after the first process).
+
+    parquet : ipc copies ignored (data_loader.ipc_file -> None), every process decodes its own frames
+    ipc     : the manifest's ipc files, memory-mapped
+
+Run (from repo root, after data_pre_compute.py / bench_pipeline.py wrote the folder):
+    python benchmarks/bench_ipc_store.py --data-dir /tmp/ardiin_bench/1M/data
+    python benchmarks/bench_ipc_store.py --data-dir /tmp/ardiin_bench/10M/data --replicas 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+REPO = Path(__file__).resolve().parents[1]
+
+MODES = ["parquet", "ipc"]
+
+
+def smaps_mb() -> dict[str, float]:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": fields["Rss"],
+        "pss_mb": fields["Pss"],
+        "private_mb": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def replica(data_dir: str, mode: str, barrier, results) -> None:
+    """One server process: load everything the app holds, measure while all replicas are alive."""
+    os.chdir(Path(data_dir).parent)  # data_loader paths are relative to the app root ("data/...")
+    sys.path.insert(0, str(REPO))
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    from data import data_loader as dl
+
+    if mode == "parquet":
+        dl.ipc_file = lambda key=None: None
+    before = smaps_mb()
+
+    t0 = time.perf_counter()
+    held = [
+        dl.load_data(),
+        dl.load_precomputed_page1(),
+        dl.load_precomputed_page2(),
+        dl.load_page2_codegroup_map(),
+        dl.load_page2_movers_monthly(),
+        dl.load_precomputed_page4(),
+        dl.load_precomputed_page_misc_counts(),
+        dl.load_precomputed_page_misc_loyal_avg(),
+        dl.load_precomputed_page_misc_reach_frequency(),
+        dl.load_precomputed_page5_users_agg(),
+        dl.load_precomputed_page5_thresholds(),
+        dl.load_precomputed_page5_reach_frequency(),
+        dl.load_precomputed_page5_monthly_points(),
+        dl.load_precomputed_page5_user_month_profile(),
+        dl.load_user_sketches(),
+    ]
+    startup = time.perf_counter() - t0
+
+    barrier.wait()
+    after = smaps_mb()
+    results.put({
+        "mode": mode,
+        "pid": os.getpid(),
+        "startup_s": round(startup, 3),
+        **{k: round(after[k] - before[k], 1) for k in after},
+    })
+    barrier.wait()  # keep every replica alive until all have measured
+    del held
+
+
+def run_mode(data_dir: str, mode: str, replicas: int) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(replicas)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=replica, args=(data_dir, mode, barrier, results)) for _ in range(replicas)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-replica memory: parquet vs memory-mapped IPC store")
+    parser.add_argument("--data-dir", required=True, help="folder with pre_computed_data/ + the master dataset")
+    parser.add_argument("--replicas", type=int, default=4)
+    args = parser.parse_args()
+
+    data_dir = str(Path(args.data_dir).resolve())
+    if not (Path(data_dir) / "pre_computed_data" / "ipc").exists():
+        sys.exit(f"no IPC store under {data_dir}/pre_computed_data (run data_pre_compute.py first)")
+
+    rows = []
+    for mode in MODES:
+        print(f"[{mode}] {args.replicas} replicas")
+        rows.extend(run_mode(data_dir, mode, args.replicas))
+
+    df = pd.DataFrame(rows)
+    with pd.option_context("display.width", 200):
+        print("\nper replica (memory added by loading, MB):")
+        print(df.to_string(index=False))
+        summary = df.groupby("mode")[["startup_s", "rss_mb", "pss_mb", "private_mb"]].mean().round(2)
+        summary["host_total_mb"] = (df.groupby("mode")["pss_mb"].sum()).round(1)
+        print("\nmean per replica (+ host total = sum of PSS):")
+        print(summary.reindex(MODES).to_string())
+
+
+if __name__ == "__main__":
+    main()
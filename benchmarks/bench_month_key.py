@@ -0,0 +1,130 @@
+"""
+bench_month_key.py
+
+Month column representations, as used by the pipeline groupbys and the pages:
+    string   : object "YYYY-MM" (the old year_month)
+    category : ordered categorical of the "YYYY-MM" labels
+    int32    : MONTH_IDX = year * 12 + month - 1 (date_cols.py, the current key)
+
+For ROWS synthetic rows (MONTHS months, random CUST_ID / TXN_AMOUNT) each variant is timed
+(median of REPEAT) on:
+    groupby_sum     df.groupby(month)["TXN_AMOUNT"].sum()
+    groupby_2keys   df.groupby([month, CUST_ID])["TXN_AMOUNT"].sum()   (user x month, like the facts table)
+    sort            df.sort_values(month, kind="stable")
+    filter_year     rows of the last year  (str.startswith / key range / category codes)
+    isin_months     rows of 3 selected months
+plus the column memory (deep) and, for the int32 key, the render-time cost of
+date_cols.with_month_label on the month aggregate.
+
+Run (from repo root):
+    python benchmarks/bench_month_key.py                  # 5M rows, 24 months
+    python benchmarks/bench_month_key.py --rows 20M --months 36
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO / "data"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from date_cols import month_keys, month_labels, month_year, with_month_label  # noqa: E402
+from gen_transactions import parse_rows  # noqa: E402
+
+FIRST_YEAR = 2024
+
+
+def timed(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def make_frame(rows: int, months: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    key = (FIRST_YEAR * 12 + rng.integers(0, months, rows)).astype("int32")
+    return pd.DataFrame({
+        "MONTH_IDX": key,
+        "CUST_ID": rng.integers(0, max(rows // 40, 1), rows).astype("int32"),
+        "TXN_AMOUNT": rng.integers(1, 500, rows).astype("int32"),
+    })
+
+
+def variants(df: pd.DataFrame) -> dict[str, pd.Series]:
+    labels = pd.Series(month_labels(df["MONTH_IDX"]), index=df.index)
+    categories = sorted(labels.unique())
+    return {
+        "string": labels,
+        "category": labels.astype(pd.CategoricalDtype(categories, ordered=True)),
+        "int32": df["MONTH_IDX"],
+    }
+
+
+def year_mask(kind: str, month: pd.Series, year: int) -> pd.Series:
+    if kind == "string":
+        return month.str.startswith(str(year))
+    if kind == "category":
+        codes = [i for i, c in enumerate(month.cat.categories) if c.startswith(str(year))]
+        return month.cat.codes.between(min(codes), max(codes))
+    return month_year(month) == year
+
+
+def bench(df: pd.DataFrame, repeat: int) -> pd.DataFrame:
+    last_year = int(month_year(df["MONTH_IDX"].max()))
+    picked_keys = sorted(df["MONTH_IDX"].unique())[-3:]
+    picked_labels = month_labels(picked_keys).tolist()
+
+    rows = []
+    for kind, month in variants(df).items():
+        frame = df[["CUST_ID", "TXN_AMOUNT"]].assign(month=month)
+        picked = picked_keys if kind == "int32" else picked_labels
+        rows.append({
+            "variant": kind,
+            "column_mb": month.memory_usage(deep=True, index=False) / 2**20,
+            "groupby_sum_ms": timed(lambda: frame.groupby("month", observed=True)["TXN_AMOUNT"].sum(), repeat),
+            "groupby_2keys_ms": timed(
+                lambda: frame.groupby(["month", "CUST_ID"], observed=True)["TXN_AMOUNT"].sum(), repeat
+            ),
+            "sort_ms": timed(lambda: frame.sort_values("month", kind="stable"), repeat),
+            "filter_year_ms": timed(lambda: frame[year_mask(kind, frame["month"], last_year)], repeat),
+            "isin_months_ms": timed(lambda: frame[frame["month"].isin(picked)], repeat),
+        })
+    return pd.DataFrame(rows).set_index("variant")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="string vs categorical vs int32 month key")
+    parser.add_argument("--rows", default="5M", help="e.g. 1M, 5M, 20M")
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_frame(parse_rows(args.rows), args.months, args.seed)
+    print(f"{len(df):,} rows, {args.months} months")
+
+    result = bench(df, args.repeat)
+    with pd.option_context("display.width", 200, "display.float_format", "{:,.1f}".format):
+        print(result.to_string())
+        print("\nint32 speedup vs string:")
+        print((result.loc["string"] / result.loc["int32"]).round(1).to_string())
+
+    monthly = df.groupby("MONTH_IDX")["TXN_AMOUNT"].sum().reset_index()
+    label_ms = timed(lambda: with_month_label(monthly), args.repeat)
+    assert month_keys(with_month_label(monthly)["year_month"]).tolist() == monthly["MONTH_IDX"].tolist()
+    print(f"\nrender-time labels for the {len(monthly)}-row month aggregate: {label_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+bench_outputs.py
+
+File size + read latency of every precomputed output, before / after the
+output_store.py parquet profile:
+    before: df.to_parquet(path, index=False)   (snappy, no sort, one row group, dictionary on every column)
+    after : output_store.write_output(df, path)
+
+Both versions are written from the same frame into a temp folder, then read
+back REPEAT times (median): the whole file, and one year (filters=[("year", "==", <last year>)]).
+Outputs without a year / month column only get the full read.
+
+Run (from repo root):
+    python benchmarks/bench_outputs.py                                       # data/pre_computed_data
+    python benchmarks/bench_outputs.py --dir /tmp/ardiin_bench/10M/data/pre_computed_data
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+REPO = Path(__file__).resolve().parents[1]
+DATA_DIR = REPO / "data"
+sys.path.insert(0, str(DATA_DIR))
+
+from output_store import write_output  # noqa: E402
+
+
+def read_ms(path: str, filters=None, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        pd.read_parquet(path, engine="pyarrow", filters=filters)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def year_filter(df: pd.DataFrame):
+    if "year" in df.columns:
+        return [("year", "==", df["year"].max())]
+    if "MONTH_IDX" in df.columns:
+        last = int(df["MONTH_IDX"].max()) // 12
+        return [("MONTH_IDX", ">=", last * 12), ("MONTH_IDX", "<=", last * 12 + 11)]
+    if "year_month" in df.columns:
+        last = str(df["year_month"].astype(str).max())[:4]
+        return [("year_month", ">=", f"{last}-01"), ("year_month", "<=", f"{last}-12")]
+    return None
+
+
+def bench_output(path: str, tmp: str, repeat: int) -> dict:
+    df = pd.read_parquet(path, engine="pyarrow")
+    before = os.path.join(tmp, "before.pqt")
+    after = os.path.join(tmp, "after.pqt")
+
+    df.to_parquet(before, index=False)
+    write_output(df, after)
+
+    filters = year_filter(df)
+    row = {
+        "output": os.path.relpath(path, os.path.dirname(os.path.dirname(path))),
+        "rows": len(df),
+        "kb_before": os.path.getsize(before) / 1024,
+        "kb_after": os.path.getsize(after) / 1024,
+        "read_ms_before": read_ms(before, repeat=repeat),
+        "read_ms_after": read_ms(after, repeat=repeat),
+    }
+    if filters is not None:
+        row["year_ms_before"] = read_ms(before, filters, repeat)
+        row["year_ms_after"] = read_ms(after, filters, repeat)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomputed output size / read latency, before vs after")
+    parser.add_argument("--dir", default=str(DATA_DIR / "pre_computed_data"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.dir, "*", "*.pqt")))
+    if not paths:
+        sys.exit(f"no .pqt files under {args.dir}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [bench_output(p, tmp, args.repeat) for p in paths]
+
+    res = pd.DataFrame(rows)
+    res["size_%"] = (res["kb_after"] / res["kb_before"] * 100).round(1)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:,.1f}".format):
+        print(res.to_string(index=False))
+
+    total_before, total_after = res["kb_before"].sum(), res["kb_after"].sum()
+    print(f"\ntotal size : {total_before:,.0f} KB -> {total_after:,.0f} KB ({total_after / total_before * 100:.1f}%)")
+    print(f"total read : {res['read_ms_before'].sum():,.1f} ms -> {res['read_ms_after'].sum():,.1f} ms")
+    if "year_ms_before" in res.columns:
+        print(f"year read  : {res['year_ms_before'].sum():,.1f} ms -> {res['year_ms_after'].sum():,.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
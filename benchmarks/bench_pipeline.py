@@ -0,0 +1,219 @@
+"""
+bench_pipeline.py
+
+Scaling benchmark of the precompute pipeline and the data_loader functions on
+synthetic raw data (gen_transactions.py), at several sizes.
+
+For every size:
+    1) generate raw_<size>_seed<seed>.pqt once (reused by later runs)
+    2) run data/data_pre_compute.py on it in a fresh process (cache off), so the
+       per-stage numbers come from its run report (wall, CPU, peak RSS delta)
+    3) time every loader in a fresh process, caches cleared before each call
+
+Throughput = raw rows / wall seconds (loaders: rows returned / wall seconds).
+Results are printed and written to <workdir>/bench_<timestamp>.json.
+
+Run (from repo root):
+    python benchmarks/bench_pipeline.py                                   # 1M
+    python benchmarks/bench_pipeline.py --sizes 1M 10M 100M --workers 4
+    python benchmarks/bench_pipeline.py --sizes 10M --stream --skip-loaders
+    python benchmarks/bench_pipeline.py --sizes 10M --backend arrow
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+REPO = Path(__file__).resolve().parents[1]
+DATA_DIR = REPO / "data"
+sys.path.insert(0, str(DATA_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gen_transactions import generate, parse_rows  # noqa: E402
+from run_report import step, take_records  # noqa: E402
+
+DEFAULT_WORKDIR = "/tmp/ardiin_bench"
+
+
+# =========================
+# LOADERS (run inside the size folder)
+# =========================
+
+def _rows(obj) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return len(obj)
+    if isinstance(obj, (tuple, list)):
+        return sum(_rows(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(_rows(o) for o in obj.values())
+    return 0
+
+
+def bench_loaders(size_dir: str) -> list[dict]:
+    """Time each data_loader entry point with cold caches (cwd = size_dir)."""
+    os.chdir(size_dir)
+    sys.path.insert(0, str(REPO))
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    import streamlit as st
+    from data import data_loader as dl
+
+    year = max(dl.get_available_years())
+
+    loaders = {
+        "load_data": lambda: dl.load_data(),
+        f"load_data(years=({year},))": lambda: dl.load_data(years=(year,)),
+        f"year_view({year})": lambda: dl.year_view(year),
+        "get_available_years": dl.get_available_years,
+        "load_precomputed_page1": dl.load_precomputed_page1,
+        "load_precomputed_page2": dl.load_precomputed_page2,
+        "load_page2_transaction_summary_with_pad": dl.load_page2_transaction_summary_with_pad,
+        "load_page2_codegroup_map": dl.load_page2_codegroup_map,
+        "load_page2_movers_monthly": dl.load_page2_movers_monthly,
+        "load_precomputed_page4": dl.load_precomputed_page4,
+        "load_precomputed_page_misc_counts": dl.load_precomputed_page_misc_counts,
+        "load_precomputed_page_misc_loyal_avg": dl.load_precomputed_page_misc_loyal_avg,
+        "load_precomputed_page5_users_agg": dl.load_precomputed_page5_users_agg,
+        "load_precomputed_page5_user_month_profile": dl.load_precomputed_page5_user_month_profile,
+        f"get_page5_bundle({year})": lambda: dl.get_page5_bundle(year),
+        f"get_page5_bundle({year}, include_profile=True)": lambda: dl.get_page5_bundle(year, include_profile=True),
+    }
+
+    for name, fn in loaders.items():
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        with step(name, kind="loader") as rec:
+            rec["rows_out"] = _rows(fn())
+
+    return take_records()
+
+
+# =========================
+# ONE SIZE
+# =========================
+
+def run_pipeline_process(
+    raw: str, data_dir: Path, workers: int | None, stream: bool, extra: list[str] | None = None
+) -> dict:
+    cmd = [sys.executable, str(DATA_DIR / "data_pre_compute.py"), "--input", raw, "--no-cache"]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    if stream:
+        cmd += ["--stream"]
+    cmd += extra or []
+
+    t0 = time.perf_counter()
+    with open(data_dir / "pipeline.log", "w") as log:
+        proc = subprocess.Popen(cmd, cwd=data_dir, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    if status != 0:
+        raise RuntimeError(f"pipeline failed, see {data_dir / 'pipeline.log'}")
+
+    return {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),  # linux: kB
+    }
+
+
+def latest_run_report(data_dir: Path) -> dict:
+    reports = sorted(glob.glob(str(data_dir / "pre_computed_data" / "_state" / "run_reports" / "run_*.json")))
+    with open(reports[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bench_size(label: str, args) -> list[dict]:
+    rows = parse_rows(label)
+    workdir = Path(args.workdir)
+    size_dir = workdir / label
+    data_dir = size_dir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    lookup_link = data_dir / "loyalty_lookup_2.csv"
+    if not lookup_link.exists():
+        lookup_link.symlink_to(DATA_DIR / "loyalty_lookup_2.csv")
+
+    results = []
+
+    raw = workdir / f"raw_{label}_seed{args.seed}.pqt"
+    if not raw.exists():
+        print(f"[{label}] generating {rows:,} rows -> {raw}")
+        t0 = time.perf_counter()
+        generate(rows, str(raw), seed=args.seed)
+        wall = time.perf_counter() - t0
+        results.append({"step": "generate", "kind": "generate", "wall_s": round(wall, 3), "rows_in": rows})
+
+    print(f"[{label}] pipeline")
+    total = run_pipeline_process(str(raw), data_dir, args.workers, args.stream, ["--backend", args.backend])
+    results.append({"step": "pipeline", "kind": "pipeline", "rows_in": rows, **total})
+
+    report = latest_run_report(data_dir)
+    for rec in report["steps"]:
+        results.append({**rec, "rows_in": rows if rec["kind"] == "stage" else rec["rows_in"]})
+
+    if not args.skip_loaders:
+        print(f"[{label}] loaders")
+        out = subprocess.run(
+            [sys.executable, __file__, "--loaders", str(size_dir)],
+            capture_output=True, text=True, check=True,
+        )
+        results.extend(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for rec in results:
+        rec["size"] = label
+        rec["raw_rows"] = rows
+        base = rec.get("rows_out") if rec.get("kind") == "loader" else rec.get("rows_in")
+        rec["rows_per_s"] = round(base / rec["wall_s"]) if base and rec.get("wall_s") else None
+
+    return results
+
+
+def print_results(df: pd.DataFrame) -> None:
+    view = df[df["kind"].isin(["generate", "pipeline", "stage", "loader"])]
+    cols = ["size", "kind", "step", "wall_s", "cpu_s", "rows_per_s", "peak_rss_mb", "peak_rss_delta_mb"]
+    cols = [c for c in cols if c in view.columns]
+    with pd.option_context("display.width", 220, "display.max_colwidth", 50, "display.max_rows", 500):
+        print(view[cols].to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline + loader scaling benchmark on synthetic data")
+    parser.add_argument("--sizes", nargs="+", default=["1M"], help="e.g. 1M 10M 100M")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="pipeline --workers")
+    parser.add_argument("--stream", action="store_true", help="pipeline --stream")
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "arrow"], help="pipeline --backend")
+    parser.add_argument("--skip-loaders", action="store_true")
+    parser.add_argument("--loaders", help=argparse.SUPPRESS)  # internal: loader child process
+    args = parser.parse_args()
+
+    if args.loaders:
+        print(json.dumps(bench_loaders(args.loaders)))
+        return
+
+    results = []
+    for label in args.sizes:
+        results.extend(bench_size(label, args))
+
+    df = pd.DataFrame(results)
+    print_results(df)
+
+    out = Path(args.workdir) / f"bench_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    df.to_json(out, orient="records", indent=2)
+    print(f"\nresults -> {out}")
+
+
+if __name__ == "__main__":
+    main()
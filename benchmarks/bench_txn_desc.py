@@ -0,0 +1,106 @@
+"""
+bench_txn_desc.py
+
+TXN_DESC cleaning benchmark:
+    old: per-row .str chain (strip / replace / lower / 2 regex scans) + boolean .loc overrides
+    new: txn_desc.normalize_txn_desc (same rules once per distinct description)
+
+Input: synthetic raw rows from gen_transactions.py (descriptions of the lookup
+codes + case / "." noise, crypto week, lotto and "Тест" rows).
+
+Run (from repo root):
+    python benchmarks/bench_txn_desc.py              # 10M rows
+    python benchmarks/bench_txn_desc.py --rows 50M
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+sys.path.insert(0, str(DATA_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gen_transactions import customer_table, day_table, generate_chunk, load_code_table, parse_rows  # noqa: E402
+from txn_desc import desc_is_test, factorize_desc, normalize_txn_desc  # noqa: E402
+
+
+def legacy_clean(df: pd.DataFrame) -> pd.DataFrame:
+    """Frozen copy of the original per-row cleaning (reference for speed + correctness)."""
+    df = df[df["TXN_DESC"].fillna("").astype(str).str.strip() != "Тест"].copy()
+
+    df["TXN_DESC"] = df["TXN_DESC"].fillna("").astype(str).str.strip()
+    df["TXN_DESC"] = (
+        df["TXN_DESC"]
+        .str.replace("Крипто Вик", "Crypto Week", regex=False)
+        .str.replace("Кривто Вик", "Crypto Week", regex=False)
+        .str.replace(".", "", regex=False)
+        .str.lower()
+    )
+
+    mask_crypto_week = df["TXN_DESC"].str.contains("crypto week", case=False, na=False)
+    df.loc[mask_crypto_week, "LOYAL_CODE"] = "ARD_LOTTO"
+
+    mask_lotto = df["TXN_DESC"].str.contains(r"lotto|6/42|лотто", case=False, na=False)
+    df.loc[mask_lotto & ~mask_crypto_week, "LOYAL_CODE"] = "10K_GET_LOTTO"
+    return df
+
+
+def new_clean(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df["TXN_DESC"] = factorize_desc(df["TXN_DESC"])
+    df = df[~desc_is_test(df["TXN_DESC"])]
+    df["TXN_DESC"], df["LOYAL_CODE"] = normalize_txn_desc(df["TXN_DESC"], df["LOYAL_CODE"])
+    return df
+
+
+def make_rows(rows: int, seed: int) -> pd.DataFrame:
+    codes = load_code_table(seed)
+    days = day_table()
+    cust_codes, cust_p = customer_table(10_000, seed)
+    df = generate_chunk(0, rows, np.random.default_rng([seed, 2, 0]), codes, days, cust_codes, cust_p)
+    df["LOYAL_CODE"] = df["LOYAL_CODE"].fillna("None").astype(str)
+    df.loc[df.index[::997], "TXN_DESC"] = None  # missing descriptions
+    return df[["TXN_DESC", "LOYAL_CODE"]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="10M", help="e.g. 1M, 10M, 50M")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    print(f"Generating {rows:,} synthetic rows...")
+    df = make_rows(rows, args.seed)
+    print(f"Distinct descriptions: {df['TXN_DESC'].nunique():,}")
+
+    t0 = time.perf_counter()
+    old = legacy_clean(df)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = new_clean(df)
+    t_new = time.perf_counter() - t0
+
+    same = old.index.equals(new.index) and all(
+        (old[c].to_numpy() == new[c].to_numpy()).all() for c in ["TXN_DESC", "LOYAL_CODE"]
+    )
+
+    print(f"per-row str chain     : {t_old:8.2f}s")
+    print(f"normalize_txn_desc    : {t_new:8.2f}s")
+    print(f"speedup               : {t_old / t_new:8.1f}x")
+    print(f"identical output      : {same}")
+
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+diff_backends.py
+
+Differential check of the two pipeline backends (data_pre_compute.py --backend
+pandas | arrow) on synthetic raw data (gen_transactions.py):
+
+    1) generate raw_<size>_seed<seed>.pqt once (reused by later runs)
+    2) run the full pipeline once per backend, each in a fresh process and its own folder (cache off)
+    3) compare:
+       - every .pqt output under pre_computed_data/ (incl. _state/user_month_facts.pqt):
+         byte-identical file, else exact frame equality (values, dtypes, row order)
+       - the CODE_GROUPED master dataset (arrow tables, schema metadata ignored) + customer ids
+       - the base snapshot (_state/code_grouped_base.arrow)
+    4) print wall / CPU / peak RSS per backend and the slowest stages side by side
+
+Exit code 1 if anything differs. tests/test_backends.py runs the same comparison on a small
+synthetic file (full + stream mode) as part of the test suite; this script is for big / real inputs.
+
+Run (from repo root):
+    python benchmarks/diff_backends.py                          # 1M rows
+    python benchmarks/diff_backends.py --rows 10M --stream --workers 4
+    python benchmarks/diff_backends.py --input /data/raw.pqt    # real raw file instead
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+REPO = Path(__file__).resolve().parents[1]
+DATA_DIR = REPO / "data"
+sys.path.insert(0, str(DATA_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import latest_run_report, run_pipeline_process  # noqa: E402
+from gen_transactions import generate, parse_rows  # noqa: E402
+from master_store import open_master, read_customer_ids  # noqa: E402
+
+BACKENDS = ["pandas", "arrow"]
+MASTER = "ardiin_erh_code_grouped_combined"
+BASE_ARROW = os.path.join("pre_computed_data", "_state", "code_grouped_base.arrow")
+DEFAULT_WORKDIR = "/tmp/ardiin_backends"
+
+
+# =========================
+# COMPARE
+# =========================
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compare_outputs(left: Path, right: Path) -> list[str]:
+    """Problems for every precomputed output (run reports are per-run and skipped)."""
+    problems = []
+    root = left / "pre_computed_data"
+    paths = sorted(
+        p for p in glob.glob(str(root / "**" / "*.pqt"), recursive=True) if "run_reports" not in p
+    )
+    for path in paths:
+        rel = os.path.relpath(path, left)
+        other = right / rel
+        if not other.exists():
+            problems.append(f"{rel}: missing in {right.name}")
+            continue
+        if _sha256(path) == _sha256(str(other)):
+            print(f"  identical  {rel}")
+            continue
+        try:
+            pd.testing.assert_frame_equal(pd.read_parquet(path), pd.read_parquet(other), check_exact=True)
+            print(f"  same frame {rel} (file bytes differ)")
+        except AssertionError as e:
+            problems.append(f"{rel}: {str(e).splitlines()[0]}")
+            print(f"  DIFF       {rel}")
+    return problems
+
+
+def _plain(table: pa.Table) -> pa.Table:
+    return table.replace_schema_metadata(None)
+
+
+def _read_base(data_dir: Path) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(str(data_dir / BASE_ARROW), "r")).read_all()
+
+
+def compare_master(left: Path, right: Path) -> list[str]:
+    problems = []
+    left_master = open_master(str(left / MASTER)).to_table()
+    right_master = open_master(str(right / MASTER)).to_table()
+    if not _plain(left_master).equals(_plain(right_master)):
+        problems.append(f"{MASTER}: tables differ")
+    if not read_customer_ids(str(left / MASTER)).equals(read_customer_ids(str(right / MASTER))):
+        problems.append(f"{MASTER}: customer ids differ")
+    if not _plain(_read_base(left)).equals(_plain(_read_base(right))):
+        problems.append(f"{BASE_ARROW}: tables differ")
+
+    print(f"  {'DIFF' if problems else 'identical'}  master dataset / customer ids / base snapshot")
+    return problems
+
+
+# =========================
+# RUN
+# =========================
+
+def run_backend(raw: str, workdir: Path, backend: str, args) -> tuple[Path, dict]:
+    data_dir = workdir / backend / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    lookup_link = data_dir / "loyalty_lookup_2.csv"
+    if not lookup_link.exists():
+        lookup_link.symlink_to(DATA_DIR / "loyalty_lookup_2.csv")
+
+    print(f"[{backend}] pipeline")
+    total = run_pipeline_process(raw, data_dir, args.workers, args.stream, ["--backend", backend])
+    return data_dir, total
+
+
+def print_timings(totals: dict[str, dict], reports: dict[str, dict], top: int = 15) -> None:
+    print("\n" + "=" * 60)
+    print("[TIMING] whole pipeline (fresh process)")
+    print("=" * 60)
+    print(pd.DataFrame(totals).T.to_string())
+
+    steps = {
+        backend: pd.DataFrame(report["steps"]).groupby("step")["wall_s"].sum()
+        for backend, report in reports.items()
+    }
+    view = pd.DataFrame(steps).fillna(0.0)
+    view["arrow / pandas"] = (view["arrow"] / view["pandas"]).round(2)
+    print(f"\nslowest {top} steps (wall_s):")
+    with pd.option_context("display.width", 200, "display.max_colwidth", 60):
+        print(view.sort_values("pandas", ascending=False).head(top).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pandas vs arrow backend: identical outputs + timings")
+    parser.add_argument("--rows", default="1M", help="synthetic raw size, e.g. 1M, 10M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--input", help="raw parquet to use instead of synthetic data")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    parser.add_argument("--workers", type=int, default=None, help="pipeline --workers")
+    parser.add_argument("--stream", action="store_true", help="pipeline --stream")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    raw = args.input
+    if raw is None:
+        rows = parse_rows(args.rows)
+        raw = str(workdir / f"raw_{args.rows}_seed{args.seed}.pqt")
+        if not os.path.exists(raw):
+            print(f"generating {rows:,} rows -> {raw}")
+            t0 = time.perf_counter()
+            generate(rows, raw, seed=args.seed)
+            print(f"  {time.perf_counter() - t0:.1f}s")
+
+    dirs, totals, reports = {}, {}, {}
+    for backend in BACKENDS:
+        dirs[backend], totals[backend] = run_backend(raw, workdir, backend, args)
+        reports[backend] = latest_run_report(dirs[backend])
+
+    print("\n[COMPARE] pandas vs arrow")
+    problems = compare_outputs(dirs["pandas"], dirs["arrow"])
+    problems += compare_master(dirs["pandas"], dirs["arrow"])
+
+    print_timings(totals, reports)
+
+    if problems:
+        print("\n[FAIL] backends differ:")
+        for p in problems:
+            print("-", p)
+        sys.exit(1)
+    print("\n[OK] both backends wrote identical outputs")
+
+
+if __name__ == "__main__":
+    main()
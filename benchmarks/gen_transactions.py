@@ -0,0 +1,257 @@
+"""
+gen_transactions.py
+
+Deterministic synthetic raw transactions in the documented input schema
+(the real raw file is not in the repo):
+
+    TXN_DATE    "%d-%b-%y" strings, e.g. 01-JAN-24   (2024-01-01 .. 2025-12-31)
+    TXN_CODE    numeric string
+    TXN_DESC    description of the LOYAL_CODE from loyalty_lookup_2.csv (+ noise)
+    TXN_AMOUNT  points (float)
+    CUST_CODE   CIF-1xxxxxxx
+    LOYAL_CODE  from loyalty_lookup_2.csv (+ None / LUNAR_RDXQR edge cases)
+    JRNO        journal number (unique int, as in the real extract - data_loader counts it)
+
+Skew modelled on the precomputed outputs of the real data:
+- 10K_TRANSACTION ~60% of rows, 10K_CHARGE_CUPCAKE ~20%, long Zipf tail for the rest
+- 10K_TRANSACTION pays 10 points in 2024 and 5 in 2025
+- Investor Week: traffic spike + INVESTORWEEK_* codes in late April / early May 2025
+- heavy-tailed customer activity (some users pass 1000 points / month, most do not)
+- a few "Тест" / LUNAR_RDXQR rows (filtered by the pipeline), lotto and
+  "Крипто Вик" descriptions (relabelled by the pipeline)
+
+Same --rows / --seed -> byte-identical output. Rows are generated in chunks of
+CHUNK_ROWS (one parquet row group each), so 100M rows need ~CHUNK_ROWS of RAM.
+
+Run (from repo root):
+    python benchmarks/gen_transactions.py --rows 1M --out /tmp/raw_1M.pqt
+    python benchmarks/gen_transactions.py --rows 100M --out /data/raw_100M.pqt --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+LOOKUP_CSV = Path(__file__).resolve().parents[1] / "data" / "loyalty_lookup_2.csv"
+
+DATE_START = "2024-01-01"
+DATE_END = "2025-12-31"
+CHUNK_ROWS = 2_000_000
+
+ROWS_PER_CUSTOMER = 35  # ~70k active users per 2.5M rows / year in the real data
+
+# share of all rows (the remaining share is spread over the other lookup codes, Zipf)
+CODE_SHARES = {
+    "10K_TRANSACTION": 0.60,
+    "10K_CHARGE_CUPCAKE": 0.20,
+    "10K_TRANSACTION_CARD": 0.025,
+    "10K_GET_LOTTO": 0.02,
+    "10K_TULBUR_TSES": 0.008,
+    "10K_CHARGE_LIFE_OLD": 0.007,
+    None: 0.008,
+    "LUNAR_RDXQR": 0.0001,
+}
+TAIL_ZIPF = 1.1
+
+# fixed points per code (others: drawn once per code from TAIL_AMOUNTS)
+CODE_AMOUNTS = {
+    "10K_CHARGE_CUPCAKE": 1.0,
+    "10K_TRANSACTION_CARD": 5.0,
+    "10K_GET_LOTTO": 20.0,
+    "10K_TULBUR_TSES": 50.0,
+    "10K_CHARGE_LIFE_OLD": 150.0,
+    None: 100.0,
+}
+TRANSACTION_AMOUNT_BY_YEAR = {2024: 10.0, 2025: 5.0}
+TAIL_AMOUNTS = np.array([10, 20, 30, 50, 100, 200, 300, 500], dtype=float)
+
+# (first day, last day, traffic multiplier, share of rows that are INVESTORWEEK_* codes)
+INVESTOR_WEEKS = [
+    ("2025-04-21", "2025-04-30", 1.8, 0.12),
+    ("2025-05-01", "2025-05-09", 1.4, 0.06),
+]
+CRYPTO_WEEK = ("2025-10-06", "2025-10-12", 0.03)  # share of rows with a "Крипто Вик" description
+
+TEST_DESC_SHARE = 0.0002
+DESC_NOISE_SHARE = 0.03
+
+
+# =========================
+# STATIC TABLES (depend on seed only)
+# =========================
+
+def parse_rows(text: str) -> int:
+    """1M / 10M / 100M / 250k / 1500000 -> int."""
+    text = str(text).strip().upper().replace("_", "")
+    mult = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}.get(text[-1], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def load_code_table(seed: int) -> pd.DataFrame:
+    """One row per LOYAL_CODE: description, row weight, points, investor-week flag."""
+    lookup = pd.read_csv(LOOKUP_CSV)
+    rng = np.random.default_rng([seed, 0])
+
+    codes = pd.DataFrame({"LOYAL_CODE": lookup["LOYAL_CODE"].astype(object), "TXN_DESC": lookup["TXN_DESC"]})
+    extra = pd.DataFrame(
+        {"LOYAL_CODE": [c for c in CODE_SHARES if c not in set(codes["LOYAL_CODE"])], "TXN_DESC": ""}
+    )
+    codes = pd.concat([codes, extra], ignore_index=True)
+
+    codes["investor_week"] = codes["LOYAL_CODE"].fillna("").str.startswith("INVESTORWEEK")
+
+    fixed = codes["LOYAL_CODE"].map(lambda c: CODE_SHARES.get(c, np.nan))
+    tail = fixed.isna() & ~codes["investor_week"]
+    ranks = rng.permutation(int(tail.sum())) + 1
+    tail_w = 1.0 / ranks**TAIL_ZIPF
+    tail_w = tail_w / tail_w.sum() * (1.0 - sum(CODE_SHARES.values()))
+
+    weight = fixed.fillna(0.0).to_numpy()
+    weight[tail.to_numpy()] = tail_w
+    codes["weight"] = weight / weight.sum()
+
+    amounts = TAIL_AMOUNTS[rng.integers(0, len(TAIL_AMOUNTS), len(codes))]
+    codes["amount"] = [CODE_AMOUNTS.get(c, a) for c, a in zip(codes["LOYAL_CODE"], amounts)]
+    return codes
+
+
+def day_table() -> pd.DataFrame:
+    """Traffic weight per day: slow growth, weekend dip, Investor Week spikes."""
+    days = pd.date_range(DATE_START, DATE_END, freq="D")
+    weight = np.linspace(1.0, 1.2, len(days))
+    weight[days.dayofweek >= 5] *= 0.75
+
+    iw_share = np.zeros(len(days))
+    for start, end, mult, share in INVESTOR_WEEKS:
+        in_week = (days >= start) & (days <= end)
+        weight[in_week] *= mult
+        iw_share[in_week] = share
+
+    crypto = (days >= CRYPTO_WEEK[0]) & (days <= CRYPTO_WEEK[1])
+
+    return pd.DataFrame(
+        {
+            "day": days,
+            "label": days.strftime("%d-%b-%y").str.upper(),
+            "year": days.year,
+            "p": weight / weight.sum(),
+            "iw_share": iw_share,
+            "crypto_share": np.where(crypto, CRYPTO_WEEK[2], 0.0),
+        }
+    )
+
+
+def customer_table(n_customers: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """CUST_CODE strings + heavy-tailed activity probabilities."""
+    rng = np.random.default_rng([seed, 1])
+    cust_codes = np.array([f"CIF-{11_000_000 + i}" for i in range(n_customers)], dtype=object)
+    activity = rng.pareto(1.3, n_customers) + 0.05
+    return cust_codes, activity / activity.sum()
+
+
+# =========================
+# CHUNK
+# =========================
+
+def generate_chunk(
+    first_jrno: int,
+    n: int,
+    rng: np.random.Generator,
+    codes: pd.DataFrame,
+    days: pd.DataFrame,
+    cust_codes: np.ndarray,
+    cust_p: np.ndarray,
+) -> pd.DataFrame:
+    day_idx = rng.choice(len(days), size=n, p=days["p"].to_numpy())
+
+    # regular codes, then Investor Week days swap a share of rows to INVESTORWEEK_* codes
+    code_idx = rng.choice(len(codes), size=n, p=codes["weight"].to_numpy())
+    iw_codes = np.flatnonzero(codes["investor_week"].to_numpy())
+    if len(iw_codes):
+        to_iw = rng.random(n) < days["iw_share"].to_numpy()[day_idx]
+        code_idx[to_iw] = iw_codes[rng.integers(0, len(iw_codes), int(to_iw.sum()))]
+
+    loyal_code = codes["LOYAL_CODE"].to_numpy()[code_idx]
+    year = days["year"].to_numpy()[day_idx]
+
+    amount = codes["amount"].to_numpy()[code_idx].copy()
+    is_txn = loyal_code == "10K_TRANSACTION"
+    amount[is_txn] = np.where(year[is_txn] == 2024, TRANSACTION_AMOUNT_BY_YEAR[2024], TRANSACTION_AMOUNT_BY_YEAR[2025])
+    amount[rng.random(n) < 0.02] *= 2  # double-point promos
+
+    desc = codes["TXN_DESC"].to_numpy(dtype=object)[code_idx].copy()
+    noise = rng.random(n)
+    upper = noise < DESC_NOISE_SHARE / 2
+    desc[upper] = pd.Series(desc[upper], dtype=object).str.upper().to_numpy()
+    dotted = (noise >= DESC_NOISE_SHARE / 2) & (noise < DESC_NOISE_SHARE)
+    desc[dotted] = pd.Series(desc[dotted], dtype=object).add(".").to_numpy()
+    desc[rng.random(n) < days["crypto_share"].to_numpy()[day_idx]] = "Крипто Вик урамшуулал"
+    desc[rng.random(n) < TEST_DESC_SHARE] = "Тест"
+
+    return pd.DataFrame(
+        {
+            "TXN_DATE": days["label"].to_numpy(dtype=object)[day_idx],
+            "TXN_CODE": (1000 + rng.integers(0, 40, n)).astype(str).astype(object),
+            "TXN_DESC": desc,
+            "TXN_AMOUNT": amount,
+            "CUST_CODE": cust_codes[rng.choice(len(cust_codes), size=n, p=cust_p)],
+            "LOYAL_CODE": loyal_code,
+            "JRNO": np.arange(first_jrno, first_jrno + n, dtype=np.int64),
+        }
+    )
+
+
+def generate(rows: int, out: str, seed: int = 0, n_customers: int | None = None) -> str:
+    """Write `rows` synthetic raw rows to `out` (parquet). Returns `out`."""
+    codes = load_code_table(seed)
+    days = day_table()
+    n_customers = n_customers or max(1_000, rows // ROWS_PER_CUSTOMER)
+    cust_codes, cust_p = customer_table(n_customers, seed)
+
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    written = 0
+    chunk_no = 0
+    try:
+        while written < rows:
+            n = min(CHUNK_ROWS, rows - written)
+            rng = np.random.default_rng([seed, 2, chunk_no])
+            table = pa.Table.from_pandas(
+                generate_chunk(written, n, rng, codes, days, cust_codes, cust_p), preserve_index=False
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            writer.write_table(table, row_group_size=CHUNK_ROWS)
+            written += n
+            chunk_no += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic synthetic raw transactions")
+    parser.add_argument("--rows", default="1M", help="e.g. 1M, 10M, 100M")
+    parser.add_argument("--out", required=True, help="output parquet path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--customers", type=int, default=None, help=f"default rows / {ROWS_PER_CUSTOMER}")
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    t0 = time.perf_counter()
+    generate(rows, args.out, args.seed, args.customers)
+    sec = time.perf_counter() - t0
+    print(f"{rows:,} rows -> {args.out} in {sec:.1f}s ({rows / sec:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
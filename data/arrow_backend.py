@@ -0,0 +1,289 @@
+"""
+arrow_backend.py
+
+Arrow-native versions of the transaction-level pipeline steps (`--backend arrow`).
+The rows stay in a pa.Table (memory-mapped base snapshot / raw record batches);
+only aggregated results become pandas frames, identical to the pandas backend
+(same columns, dtypes and row order), so every step after an aggregate and every
+output file is shared code.
+
+    build_code_grouped_table(raw)        raw table -> CODE_GROUPED table (strings stay dictionary-encoded)
+    add_customer_ids_table(table, path)  CUST_CODE -> CUST_ID, dictionary built on the distinct codes
+    table_group_agg(table, keys, aggs)   == df.groupby(keys, observed=True).agg(**aggs).reset_index()
+    semi_join(table, right, keys)        rows of `table` with a key in `right` (hash join)
+    table_achiever_profile(table, users) page 5 achiever profile (semi join + one aggregate)
+    table_user_sketches(table)           page 2 HLL sketches (group id per row from a hash join)
+
+Aggregates and joins run on Acero (pyarrow's query engine) with use_threads=True,
+i.e. on all cores of pyarrow's CPU pool (pa.set_cpu_count / OMP_NUM_THREADS).
+
+Group order follows pandas groupby(sort=True): keys ascending, dictionary
+(categorical) keys by dictionary index, missing keys dropped (dropna=False: last).
+Sums of TXN_AMOUNT (integer-valued points) are exact in any summation order.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from code_groups import assign_code_group
+from date_cols import DATE_COLS, add_date_cols, parse_dates
+from hll import build_sketches, to_bytes
+from master_store import assign_customer_ids, known_customers
+from segments import normalize_profile
+from txn_desc import classify_desc, desc_is_test
+
+# pandas agg name -> (Acero aggregate, options)
+AGG_FUNCS = {
+    "sum": ("sum", None),
+    "size": ("count", pc.CountOptions(mode="all")),
+    "count": ("count", pc.CountOptions(mode="only_valid")),
+    "nunique": ("count_distinct", pc.CountOptions(mode="only_valid")),
+    "min": ("min", None),
+    "max": ("max", None),
+}
+
+
+# =========================
+# ENCODING HELPERS
+# =========================
+
+def _distinct(col: pa.ChunkedArray | pa.Array) -> tuple[pd.Series, np.ndarray]:
+    """
+    Distinct values (small pandas Series) + row index into them.
+    Missing rows point at len(values), like the "" / NaT entry the pandas helpers append.
+    """
+    enc = pc.dictionary_encode(col)
+    if isinstance(enc, pa.ChunkedArray):
+        enc = enc.combine_chunks() if enc.num_chunks else pa.array([], pa.dictionary(pa.int32(), col.type))
+    values = enc.dictionary.to_pandas()
+    idx = enc.indices.fill_null(len(values)).to_numpy(zero_copy_only=False).astype(np.intp)
+    return values, idx
+
+
+def _pandas_like(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Type a column the way a to_pandas / from_pandas round trip would (pandas backend)."""
+    if pa.types.is_large_string(col.type):
+        return col.cast(pa.string())
+    if pa.types.is_integer(col.type) and col.null_count:
+        return col.cast(pa.float64())  # int with NaN -> float64 in pandas
+    return col
+
+
+def _take(values, idx: np.ndarray, type: pa.DataType | None = None) -> pa.Array:
+    """values[idx] as an arrow array (strings are gathered in arrow buffers)."""
+    return pa.array(values, type=type, from_pandas=True).take(pa.array(idx))
+
+
+def _numeric(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """pd.to_numeric(col, errors="coerce").fillna(0)."""
+    if pa.types.is_floating(col.type):
+        col = col.fill_null(0.0)
+        return pc.if_else(pc.is_nan(col), 0.0, col)
+    if pa.types.is_integer(col.type):
+        return col.cast(pa.float64()).fill_null(0.0) if col.null_count else col
+    return pa.chunked_array([pa.array(pd.to_numeric(col.to_pandas(), errors="coerce").fillna(0))])
+
+
+# =========================
+# CODE_GROUPED BUILD
+# =========================
+
+def _categorical(col: pa.ChunkedArray) -> pd.Series:
+    """Row codes + distinct values as a pandas categorical (int codes, no per-row objects)."""
+    values, idx = _distinct(col)
+    codes = np.where(idx < len(values), idx, -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(values)))
+
+
+def _parse_days(col: pa.ChunkedArray, date_format: str) -> tuple[np.ndarray, np.ndarray]:
+    """Parsed distinct dates (+ NaT for missing, at the end) and the row index into them."""
+    values, idx = _distinct(col)
+    parsed = parse_dates(values, date_format).to_numpy(dtype="datetime64[ns]")
+    return np.append(parsed, np.datetime64("NaT", "ns")), idx
+
+
+def build_code_grouped_table(raw: pa.Table, date_format: str) -> pa.Table:
+    """
+    Same rules, column order and types as build_code_grouped_dataset (pandas),
+    without converting string columns to python objects: TXN_DESC, TXN_DATE,
+    POST_DATE and LOYAL_CODE are dictionary-encoded, the rules run on the
+    distinct values (txn_desc.py, date_cols.py, code_groups.py) and the results
+    are gathered back per row with `take`.
+    """
+    raw = raw.rename_columns([c.strip() for c in raw.column_names])
+    names = raw.column_names
+    keep = np.ones(raw.num_rows, dtype=bool)
+
+    # Remove test / LUNAR rows
+    desc = _categorical(raw["TXN_DESC"]) if "TXN_DESC" in names else None
+    if desc is not None:
+        keep &= ~desc_is_test(desc)
+    if "LOYAL_CODE" in names:
+        keep &= pc.not_equal(raw["LOYAL_CODE"].fill_null(""), "LUNAR_RDXQR").to_numpy()
+
+    # Dates (distinct strings parsed once), rows without TXN_DATE dropped
+    days, day_idx = _parse_days(raw["TXN_DATE"], date_format)
+    keep &= ~np.isnat(days)[day_idx]
+
+    rows = np.flatnonzero(keep)
+    table = raw.take(pa.array(rows))
+    day_idx = day_idx[rows]
+
+    columns = {}
+    for name in names:
+        columns[name] = _pandas_like(table[name])
+    columns["TXN_DATE"] = pa.array(days[day_idx])
+    if "POST_DATE" in names:
+        post_days, post_idx = _parse_days(raw["POST_DATE"], date_format)
+        columns["POST_DATE"] = pa.array(post_days[post_idx[rows]], from_pandas=True)
+    if "TXN_AMOUNT" in names:
+        columns["TXN_AMOUNT"] = _numeric(table["TXN_AMOUNT"])
+
+    # Fill LOYAL_CODE
+    if "LOYAL_CODE" in names:
+        loyal = table["LOYAL_CODE"].cast(pa.string()).fill_null("None")
+    else:
+        loyal = pa.repeat(pa.scalar("None", pa.string()), len(rows))
+
+    # Time cols, per distinct day (NaT entries are never referenced by kept rows)
+    calendar = add_date_cols(pd.DataFrame({"TXN_DATE": np.where(np.isnat(days), np.datetime64(0, "ns"), days)}))
+    date_cols = {
+        col: _take(calendar[col].to_numpy(), day_idx, pa.string() if calendar[col].dtype == object else None)
+        for col in DATE_COLS
+    }
+
+    # Clean TXN_DESC + lotto / crypto week LOYAL_CODE overrides (per distinct description)
+    if desc is not None:
+        desc_codes, clean, override = classify_desc(desc.iloc[rows])
+        columns["TXN_DESC"] = _take(clean.to_numpy(dtype=object), desc_codes, pa.string())
+        has_override = pd.notna(override)
+        if has_override.any():
+            row_override = has_override[desc_codes]
+            loyal = pc.if_else(
+                pa.array(row_override),
+                _take(np.where(has_override, override, ""), desc_codes, pa.string()),
+                loyal,
+            )
+
+    columns["LOYAL_CODE"] = loyal  # appended after the raw columns when missing (as in pandas)
+    columns.update(date_cols)
+    if desc is None:
+        columns["TXN_DESC"] = pa.repeat(pa.scalar("", pa.string()), len(rows))
+
+    # Add CODE_GROUP (rules once per distinct LOYAL_CODE, see code_groups.py)
+    code_values, code_idx = _distinct(loyal)
+    groups = assign_code_group(code_values).array
+    columns["CODE_GROUP"] = pa.DictionaryArray.from_arrays(
+        pa.array(groups.codes[code_idx]),
+        pa.array(np.asarray(groups.categories, dtype=object), pa.string()),
+    )
+
+    return pa.table(columns)
+
+
+def add_customer_ids_table(table: pa.Table, path: str) -> pa.Table:
+    """add_customer_ids for a table: the id dictionary is matched on the distinct CUST_CODE values only."""
+    values, idx = _distinct(table["CUST_CODE"])
+    codes = values.astype(str).to_numpy(dtype=object)
+    if table["CUST_CODE"].null_count:
+        codes = np.append(codes, None)  # -> NULL_CUST_ID
+    ids = assign_customer_ids(path, pd.Series(codes, dtype=object)).to_numpy()
+    return table.append_column("CUST_ID", pa.array(ids[idx])).drop_columns(["CUST_CODE"])
+
+
+# =========================
+# AGGREGATES / JOINS
+# =========================
+
+def _sort_indices(table: pa.Table, keys: list[str]) -> pa.Array:
+    """Row order of pandas groupby(sort=True): dictionary keys by index, missing last."""
+    cols = {}
+    for key in keys:
+        col = table[key]
+        if pa.types.is_dictionary(col.type):
+            col = pa.chunked_array([c.indices for c in col.chunks], col.type.index_type)
+        cols[key] = col
+    return pc.sort_indices(pa.table(cols), sort_keys=[(k, "ascending") for k in keys])  # nulls at the end by default
+
+
+def group_table(
+    table: pa.Table,
+    keys: list[str],
+    aggs: dict[str, tuple[str, str]],
+    dropna: bool = True,
+) -> pa.Table:
+    """One hash aggregate on Acero; keys + one column per `aggs` entry, in pandas group order."""
+    value_cols = [col for col, _ in aggs.values()]
+    table = table.select(list(dict.fromkeys(keys + value_cols))).unify_dictionaries()
+    if dropna:
+        valid = None
+        for key in keys:
+            if table[key].null_count:
+                valid = pc.is_valid(table[key]) if valid is None else pc.and_(valid, pc.is_valid(table[key]))
+        if valid is not None:
+            table = table.filter(valid)
+
+    specs = []
+    for col, func in dict.fromkeys(aggs.values()):
+        name, opts = AGG_FUNCS[func]
+        specs.append((col, name, opts) if opts is not None else (col, name))
+    result = table.group_by(keys, use_threads=True).aggregate(specs)
+
+    out = pa.table({
+        **{key: result[key] for key in keys},
+        **{name: result[f"{col}_{AGG_FUNCS[func][0]}"] for name, (col, func) in aggs.items()},
+    }).unify_dictionaries()
+    return out.take(_sort_indices(out, keys))
+
+
+def table_group_agg(
+    table: pa.Table,
+    keys: list[str],
+    aggs: dict[str, tuple[str, str]],
+    dropna: bool = True,
+) -> pd.DataFrame:
+    """df.groupby(keys, observed=True, dropna=dropna).agg(**aggs).reset_index() on a pa.Table."""
+    return group_table(table, keys, aggs, dropna).to_pandas()
+
+
+def semi_join(table: pa.Table, right: pd.DataFrame, keys: list[str]) -> pa.Table:
+    """Rows of `table` whose `keys` appear in `right` (Acero hash join, left semi)."""
+    right = pa.Table.from_pandas(right[keys].drop_duplicates(), preserve_index=False)
+    right = right.select(keys).cast(pa.schema([table.schema.field(k) for k in keys]))
+    return table.join(right, keys=keys, join_type="left semi", use_threads=True)
+
+
+# =========================
+# PAGE STEPS
+# =========================
+
+def table_achiever_profile(table: pa.Table, users: pd.DataFrame, with_year: bool = True) -> pd.DataFrame:
+    """segments.achiever_month_profile: semi join on the achiever months, one aggregate, shared normalization."""
+    keys = (["year"] if with_year else []) + ["CUST_ID", "MONTH_NUM"]
+    achievers = users.loc[users["Reached_1000_Flag"] == 1, keys]
+
+    rows = semi_join(table.select(keys + ["LOYAL_CODE", "TXN_AMOUNT"]), achievers, keys)
+    profile = table_group_agg(rows, keys + ["LOYAL_CODE"], {"TXN_AMOUNT": ("TXN_AMOUNT", "sum")}, dropna=False)
+    return normalize_profile(profile, keys)
+
+
+def table_user_sketches(table: pa.Table) -> pd.DataFrame:
+    """
+    build_user_sketches: groups (MONTH_IDX x LOYAL_CODE, with their year / MONTH_NUM /
+    CODE_GROUP) from one aggregate, each row's group id from a hash join on the group table.
+    """
+    keys = ["MONTH_IDX", "LOYAL_CODE"]
+    groups = group_table(table, keys + ["year", "MONTH_NUM", "CODE_GROUP"], {})
+
+    ids = groups.select(keys).append_column("_group", pa.array(np.arange(groups.num_rows, dtype=np.int32)))
+    rows = table.select(keys + ["CUST_ID"]).join(ids, keys=keys, join_type="inner", use_threads=True)
+    rows = known_customers(rows)  # NULL_CUST_ID is not a user
+
+    out = groups.to_pandas()
+    regs = build_sketches(rows["_group"].to_numpy(), len(out), rows["CUST_ID"].to_numpy())
+    out["SKETCH"] = to_bytes(regs)
+    return out
@@ -0,0 +1,185 @@
+"""
+code_groups.py
+
+Declarative LOYAL_CODE -> CODE_GROUP rules.
+
+Rules are checked top to bottom and the first match wins. Each rule can use
+any mix of the matchers below (a code matches the rule if ANY matcher hits):
+
+    equals   : exact codes
+    prefix   : code.startswith(...)
+    suffix   : code.endswith(...)
+    contains : substring anywhere in the code
+    regex    : re.match from the start of the code
+
+Codes are normalized with str(code).strip().upper() before matching.
+To add a new campaign, add a matcher / rule here - the pipeline hot path
+(`assign_code_group`) does not change.
+"""
+
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CODE_GROUP = "Other"
+MISSING_CODE_GROUP = "Financial Transactions"
+
+GEO_CODES = {
+    "BAGANUUR", "BULGAN", "DARKHAN", "ERDENET",
+    "KHENTII", "CHOIR", "SAINSHAND", "SELENGE"
+}
+
+CODE_GROUP_RULES = [
+    {
+        "group": "Core Transactions",
+        "equals": {
+            "10K_TRANSACTION",
+            "10K_CHARGE_CUPCAKE",
+            "10K_CHARGE_CUPCAKE_1",
+            "10K_TULBUR_TSES",
+            "10K_TRANSACTION_CARD",
+        },
+    },
+    {
+        "group": "Campaigns & Events",
+        "equals": GEO_CODES,
+    },
+    {
+        "group": "Account Opening",
+        "prefix": ("10K_OPEN",),
+        "equals": {"ARD_SEC", "ARD_SEC1", "ARD_SEC100", "10K_KIDS61"},
+        "suffix": ("UTSD",),
+        "contains": ("TETDANS",),
+    },
+    {
+        "group": "Financial Transactions",
+        "contains": ("TRANSACTION", "CHARGE", "CCA", "AFFILIATE"),
+        "equals": {"LOYALTY_LIMIT", "ACO", "ZEEL_TULULT"},
+    },
+    {
+        "group": "Insurance",
+        "contains": ("INSUR", "DAATGAL"),
+    },
+    {
+        "group": "Merchant & Lifestyle",
+        "prefix": ("MARAL", "MARAN"),
+        "contains": ("KRYPTOS", "PNP", "LOTTO"),
+        "equals": {"10K_GAME"},
+    },
+    {
+        "group": "Campaigns & Events",
+        "contains": ("SOCIAL", "FACEBOOK", "SELFIE", "MEDEE", "TUUH"),
+    },
+    {
+        "group": "Investments & Securities",
+        "prefix": ("10K_BUY", "ARD_"),
+        "contains": ("1072", "HOS", "HOUS"),
+    },
+    {
+        "group": "Campaigns & Events",
+        "prefix": (
+            "INVESTORWEEK", "TVMEN", "SMART", "HURUNGU",
+            "PENSION_SURGALT", "CREDIT_SURGALT", "CREDIT_ZEEL",
+            "ARDCOIN", "CREDIT_AIRDROP",
+        ),
+    },
+    {
+        # INF + 4 digits, e.g. INF2025_RDX_50
+        "group": "Campaigns & Events",
+        "regex": r"INF\d{4}",
+    },
+]
+
+
+# =========================
+# COMPILE
+# =========================
+
+def compile_rule(rule: dict) -> re.Pattern:
+    """Turn one declarative rule into a single anchored regex."""
+    parts = []
+    parts += [re.escape(c) + r"\Z" for c in sorted(rule.get("equals", ()))]
+    parts += [re.escape(p) for p in rule.get("prefix", ())]
+    parts += [r".*" + re.escape(s) + r"\Z" for s in rule.get("suffix", ())]
+    parts += [r".*" + re.escape(s) for s in rule.get("contains", ())]
+    if rule.get("regex"):
+        parts.append(rule["regex"])
+
+    if not parts:
+        raise ValueError(f"CODE_GROUP rule has no matchers: {rule}")
+
+    return re.compile("(?:" + "|".join(parts) + ")", flags=re.DOTALL)
+
+
+def compile_rules(rules: list[dict] = CODE_GROUP_RULES) -> list[tuple[str, re.Pattern]]:
+    return [(rule["group"], compile_rule(rule)) for rule in rules]
+
+
+COMPILED_RULES = compile_rules()
+
+
+# =========================
+# APPLY
+# =========================
+
+def map_code_group(code: str) -> str:
+    """Scalar version (one code). Kept for ad-hoc use / notebooks."""
+    if pd.isna(code):
+        return MISSING_CODE_GROUP
+
+    code = str(code).strip().upper()
+
+    for group, pattern in COMPILED_RULES:
+        if pattern.match(code):
+            return group
+
+    return DEFAULT_CODE_GROUP
+
+
+def map_code_groups_unique(codes: pd.Series | np.ndarray) -> np.ndarray:
+    """
+    Evaluate the rules on (already distinct) codes.
+    Each rule is one vectorized regex scan over the distinct values only.
+    """
+    codes = pd.Series(codes, dtype=object)
+    missing = codes.isna().to_numpy()
+    norm = codes.fillna("").astype(str).str.strip().str.upper()
+
+    out = np.full(len(norm), DEFAULT_CODE_GROUP, dtype=object)
+    unassigned = ~missing
+
+    for group, pattern in COMPILED_RULES:
+        if not unassigned.any():
+            break
+        hit = norm.str.match(pattern).to_numpy(dtype=bool) & unassigned
+        out[hit] = group
+        unassigned &= ~hit
+
+    out[missing] = MISSING_CODE_GROUP
+    return out
+
+
+def assign_code_group(loyal_code: pd.Series) -> pd.Series:
+    """
+    CODE_GROUP for every row of a LOYAL_CODE column.
+
+    The rules run once per DISTINCT code, then the result is broadcast
+    back through the categorical codes (no per-row python call).
+    """
+    codes, uniques = pd.factorize(loyal_code, use_na_sentinel=True)
+    groups = map_code_groups_unique(np.asarray(uniques, dtype=object))
+
+    # NaN rows come back as -1 -> append the "missing" group as last category
+    group_cats, group_codes = np.unique(
+        np.append(groups, MISSING_CODE_GROUP), return_inverse=True
+    )
+    row_codes = group_codes[codes]
+
+    return pd.Series(
+        pd.Categorical.from_codes(row_codes, categories=group_cats),
+        index=loyal_code.index,
+        name="CODE_GROUP",
+    )
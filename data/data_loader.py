@@ -1,63 +1,439 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
+
+from data import hll
+from data.data_manifest import check_outputs, read_manifest
+from data.date_cols import DATE_COLS, add_date_cols, month_keys, month_year
+from data.ipc_store import fixed_binary_view, map_table, to_frame
+from data.master_store import APP_COLS, NULL_CUST_ID, app_dtypes, count_customers, is_text, known_customers, master_schema, master_years, read_master_table
+from data.point_hist import point_histogram
+from data.segments import achiever_month_profile, add_flags, assign_segments, segment_thresholds
+
 # ------------------- BASE DATA -------------------
 
-DATA_PATH = Path("data/ardiin_erh_code_grouped_combined.pqt")
+# Hive-partitioned folder (year=YYYY/MONTH_NUM=M/), written by data_pre_compute.py
+DATA_PATH = Path("data/ardiin_erh_code_grouped_combined")
 LOOKUP_PATH = Path("data/loyalty_lookup_2.csv")
 
-@st.cache_resource(show_spinner=True)
-def load_data() -> pd.DataFrame:
+def with_cust_id(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Customers are int32 CUST_ID everywhere (CUST_CODE only in the master's side dictionary).
+    Files written before CUST_ID existed get per-file ids from their CUST_CODE.
+    """
+    if "CUST_ID" not in df.columns and "CUST_CODE" in df.columns:
+        df = df.assign(CUST_ID=pd.factorize(df["CUST_CODE"])[0].astype("int32")).drop(columns=["CUST_CODE"])
+    return df
+
+
+def with_month_key(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Load the main parquet ONCE as a resource (best for big data).
-    Reduce columns early to save RAM.
+    Months are the int32 MONTH_IDX key everywhere (labels only at render time, date_cols.with_month_label).
+    Files written before the key get it from their "YYYY-MM" year_month strings.
     """
-    df = pd.read_parquet(DATA_PATH)
-
-    # Keep only columns used across your pages (reduce RAM)
-    keep_cols = [
-        "TXN_DATE",
-        "CUST_CODE",
-        "MONTH_NUM",
-        "MONTH_NAME",
-        "TXN_AMOUNT",
-        "LOYAL_CODE",
-        "JRNO",
-        "CODE_GROUP"
-    ]
-    existing = [c for c in keep_cols if c in df.columns]
-    df = df[existing].copy()
-
-    # Clean / types
-    df["TXN_DATE"] = pd.to_datetime(df["TXN_DATE"], errors="coerce")
-    df = df[df["TXN_DATE"].notna()].copy()
-
-    df["year"] = df["TXN_DATE"].dt.year.astype("int16")
-
-    df["year_month"] = df["TXN_DATE"].dt.to_period("M").astype(str)
-
-    # Dtypes
-    df["CUST_CODE"] = df["CUST_CODE"].astype("category")
-    df["MONTH_NUM"] = df["MONTH_NUM"].astype("int16")
-    df["TXN_AMOUNT"] = pd.to_numeric(df["TXN_AMOUNT"], errors="coerce").fillna(0).astype("int32")
-
-    if "LOYAL_CODE" in df.columns:
-        df["LOYAL_CODE"] = df["LOYAL_CODE"].astype("category")
+    if "MONTH_IDX" not in df.columns and "year_month" in df.columns:
+        df = df.assign(MONTH_IDX=month_keys(df["year_month"])).drop(columns=["year_month"])
+    return df
+
+
+# ------------------- MANIFEST -------------------
+
+# written by the pipeline next to the outputs (data_manifest.py)
+PRECOMPUTED_DIR = Path("data/pre_computed_data")
+
+# output key (path under PRECOMPUTED_DIR) -> columns the pages rely on
+APP_OUTPUTS = {
+    "page1/precomputed_user_level_stat_monthly.pqt": ["CUST_ID", "TXN_DATE", "user_total_point", "MONTH_IDX", "month_num", "point_bucket", "user_reached_1000", "is_first_month"],
+    "page1/precomputed_monthly_reward_stat.pqt": ["TXN_DATE", "total_points", "total_users", "num_user_passed_1000", "num_user_fail_1000", "percentage", "total_new_users", "MONTH_IDX"],
+    "page1/precomputed_point_histogram.pqt": ["MONTH_IDX", "POINT_BIN", "Users"],
+    "page2/precomputed_grouped_reward.pqt": ["CODE_GROUP", "MONTH_IDX", "TOTAL_AMOUNT"],
+    "page2/precomputed_transaction_summary.pqt": ["LOYAL_CODE", "MONTH_IDX", "GROUP", "Transaction_Freq", "Total_Users", "Total_Amount", "DESC", "year"],
+    "page2/precomputed_codegroup_loyalcode_map.pqt": ["CODE_GROUP", "LOYAL_CODES"],
+    "page2/precomputed_movers_monthly.pqt": ["year", "LOYAL_CODE", "MONTH_NUM", "TXN_AMOUNT"],
+    "page2/precomputed_user_sketches.pqt": ["MONTH_IDX", "LOYAL_CODE", "year", "MONTH_NUM", "CODE_GROUP", "SKETCH"],
+    "page4/users_agg_df.pqt": ["CUST_ID", "MONTH_IDX", "Total_Points", "Transaction_Count", "Unique_Loyal_Codes", "Active_Days", "User_Segment", "year"],
+    "page4/thresholds.pqt": ["year", "txn_q25", "txn_q75", "days_q25", "days_q75", "points_q25", "points_q75", "achievers_txn_q25"],
+    "page4/user_segment_monthly_df.pqt": ["year", "MONTH_IDX", "User_Segment", "count"],
+    "page4/segment_loyal_summary.pqt": ["User_Segment", "LOYAL_CODE", "TXN_AMOUNT", "DESC", "year"],
+    "page5/precomputed_users_agg_df.pqt": ["year", "CUST_ID", "MONTH_NUM", "MONTH_NAME", "Total_Points", "Transaction_Count", "Active_Days", "Reached_1000_Flag"],
+    "page5/precomputed_thresholds_by_year.pqt": ["year", "txn_q25", "txn_q75", "days_q25", "days_q75", "points_q25", "points_q75", "achievers_txn_q25"],
+    "page5/precomputed_reach_frequency_by_year.pqt": ["year", "Times_Reached_1000", "Number_of_Users", "Total"],
+    "page5/precomputed_monthly_customer_points.pqt": ["year", "MONTH_NUM", "MONTH_NAME", "CUST_ID", "Total_Points"],
+    "page5/precomputed_user_month_profile_achievers.pqt": ["year", "CUST_ID", "MONTH_NUM", "LOYAL_CODE", "Normalized_Points"],
+    "page_misc/precomputed_monthly_bucket_counts.pqt": ["year", "MONTH_IDX", "point_bucket", "Counts", "Percent"],
+    "page_misc/precomputed_loyal_avg_by_year.pqt": ["year", "LOYAL_CODE", "TXN_AMOUNT", "JRNO", "AVG", "PERCENTAGE", "DESC"],
+    "page_misc/precomputed_reach_frequency_by_year.pqt": ["year", "Times_Reached_1000", "Number_of_Users", "Total"],
+}
+# outputs the app can do without (fallbacks in the loaders below)
+OPTIONAL_OUTPUTS = {
+    "page1/precomputed_point_histogram.pqt",
+    "page2/precomputed_user_sketches.pqt",
+}
+
+
+def _manifest_mtime() -> int:
+    path = PRECOMPUTED_DIR / "manifest.json"
+    return path.stat().st_mtime_ns if path.exists() else 0
+
+
+@st.cache_data(show_spinner=False)
+def _load_manifest(mtime_ns: int) -> dict | None:
+    return read_manifest(str(PRECOMPUTED_DIR))
+
+
+def get_manifest() -> dict | None:
+    """The pipeline manifest (re-read only when the file changes); None for folders written before it existed."""
+    return _load_manifest(_manifest_mtime())
+
+
+def data_version() -> str:
+    manifest = get_manifest()
+    return manifest["data_version"] if manifest else "unversioned"
+
+
+def has_output(key: str) -> bool:
+    manifest = get_manifest()
+    if manifest is None:
+        return (PRECOMPUTED_DIR / key).exists()
+    return key in manifest["outputs"]
+
+
+def ipc_file(key: str | None = None) -> Path | None:
+    """
+    Memory-mappable copy (ipc_store.py) of an output, or of the master for key=None;
+    None if the manifest does not list one for the current file.
+    """
+    manifest = get_manifest()
+    if manifest is None:
+        return None
+    entry = manifest.get("master") if key is None else manifest["outputs"].get(key)
+    if not entry or "ipc" not in entry:
+        return None
+    path = PRECOMPUTED_DIR / entry["ipc"]
+    return path if path.exists() else None
+
+
+def check_app_outputs() -> list[str]:
+    """Missing outputs / columns, from the manifest only (no parquet is opened)."""
+    manifest = get_manifest()
+    if manifest is None:
+        return []
+    required = {}
+    for key, columns in APP_OUTPUTS.items():
+        entry = manifest["outputs"].get(key)
+        if key in OPTIONAL_OUTPUTS and entry is None:
+            continue
+        if entry and "MONTH_IDX" not in entry["schema"] and "year_month" in entry["schema"]:
+            columns = ["year_month" if c == "MONTH_IDX" else c for c in columns]  # read_output converts them
+        required[key] = columns
+    return check_outputs(manifest, required)
+
+
+@st.cache_resource(show_spinner=False)
+def _seen_data_version() -> dict:
+    return {}
+
+
+def sync_data_version() -> list[str]:
+    """
+    Call once per run (app.py). A new data version from the pipeline drops every
+    st.cache_data / st.cache_resource entry (also the pages' own caches), so the
+    app picks up new outputs without a restart. Returns check_app_outputs().
+    """
+    version = data_version()
+    seen = _seen_data_version()
+    if seen.get("version", version) != version:
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        seen = _seen_data_version()
+    seen["version"] = version
+    return check_app_outputs()
+
+
+# (key, year, columns) slices of the outputs kept per process; the least recently used is dropped first
+OUTPUT_CACHE_ENTRIES = 48
+
+
+def _output_entry(key: str) -> dict | None:
+    manifest = get_manifest()
+    return manifest["outputs"].get(key) if manifest else None
+
 
+def _output_columns(key: str) -> list[str]:
+    """Stored column names (manifest, else the parquet footer)."""
+    entry = _output_entry(key)
+    if entry is not None:
+        return list(entry["schema"])
+    return pq.read_schema(PRECOMPUTED_DIR / key).names
+
+
+def _stored_columns(columns: tuple[str, ...] | None, names: list[str]) -> list[str] | None:
+    """Columns to read for `columns`: files written before CUST_ID / MONTH_IDX hold CUST_CODE / year_month."""
+    if columns is None:
+        return None
+    legacy = {"CUST_ID": "CUST_CODE", "MONTH_IDX": "year_month"}
+    return list(dict.fromkeys(legacy[c] if c not in names and legacy.get(c) in names else c for c in columns))
+
+
+def _year_bounds(year: int | None, names: list[str]) -> tuple[str, int, int] | None:
+    """(column, first, last) of `year`'s rows; None without a year or without a year / MONTH_IDX column."""
+    if year is None:
+        return None
+    if "year" in names:
+        return "year", year, year
+    if "MONTH_IDX" in names:
+        return "MONTH_IDX", year * 12, year * 12 + 11
+    return None
+
+
+def _numpy(table: pa.Table, col: str) -> np.ndarray:
+    column = table[col]
+    return column.chunk(0).to_numpy() if column.num_chunks == 1 else column.to_numpy()
+
+
+def _sorted_slice(table: pa.Table, col: str, first: int, last: int) -> pa.Table:
+    """Rows with first <= col <= last; a zero-copy slice when `col` is sorted (output_store sorts by it)."""
+    values = _numpy(table, col)
+    if len(values) < 2 or (values[1:] >= values[:-1]).all():
+        start, stop = np.searchsorted(values, first, "left"), np.searchsorted(values, last, "right")
+        return table.slice(start, stop - start)
+    return table.filter(pa.array((values >= first) & (values <= last)))
+
+
+def _finish(df: pd.DataFrame, year: int | None, filtered: bool, columns: tuple[str, ...] | None) -> pd.DataFrame:
+    """Year rows not filtered by the read (legacy year_month files), then the requested column order."""
+    if year is not None and not filtered and "MONTH_IDX" in df.columns:
+        df = df[month_year(df["MONTH_IDX"]) == year].reset_index(drop=True)
+    if columns is not None and list(df.columns) != list(columns):
+        df = df[list(columns)]
     return df
 
 
+@st.cache_data(show_spinner=False, max_entries=OUTPUT_CACHE_ENTRIES)
+def _read_output(key: str, year: int | None, columns: tuple[str, ...] | None, version: str) -> pd.DataFrame:
+    names = _output_columns(key)
+    bounds = _year_bounds(year, names)
+    read_cols = _stored_columns(columns, names)
+    filters = None
+    if bounds is not None:
+        col, first, last = bounds
+        filters = [(col, ">=", first), (col, "<=", last)]  # row-group statistics: one row group per year
+    elif year is not None and read_cols is not None and "year_month" in names and "year_month" not in read_cols:
+        read_cols.append("year_month")  # legacy month labels: filtered after the read
+    df = pd.read_parquet(PRECOMPUTED_DIR / key, engine="pyarrow", columns=read_cols, filters=filters)
+    return _finish(with_month_key(with_cust_id(df)), year, bounds is not None, columns)
+
+
+@st.cache_resource(show_spinner=False, max_entries=OUTPUT_CACHE_ENTRIES)
+def _map_output(key: str, year: int | None, columns: tuple[str, ...] | None, version: str) -> pd.DataFrame:
+    table = map_table(ipc_file(key))
+    bounds = _year_bounds(year, table.column_names)
+    if bounds is not None:
+        table = _sorted_slice(table, *bounds)
+    read_cols = _stored_columns(columns, table.column_names)
+    if read_cols is not None:
+        table = table.select(read_cols)
+    return _finish(with_month_key(with_cust_id(to_frame(table))), year, bounds is not None, columns)
+
+
+def read_output(
+    key: str,
+    year: int | None = None,
+    columns: list[str] | tuple[str, ...] | None = None,
+) -> pd.DataFrame:
+    """
+    One precomputed output (key = path under PRECOMPUTED_DIR), cached per data version.
+    year    -> only that year's rows: a filter on year / MONTH_IDX pushed into the parquet read
+               (one row group per year, output_store.py) or a slice of the IPC copy.
+               Outputs without either column (e.g. the CODE_GROUP map) come back whole.
+    columns -> only these columns, in this order.
+    Cached per (key, year, columns), at most OUTPUT_CACHE_ENTRIES of them (least recently used dropped).
+    With an IPC copy: the memory-mapped frame shared by all server processes. Each call gets
+    a shallow copy (adding / replacing columns is fine, in-place writes raise: read-only).
+    """
+    version = data_version()
+    year = int(year) if year is not None else None
+    columns = tuple(columns) if columns is not None else None
+    if ipc_file(key) is not None:
+        return _map_output(key, year, columns, version).copy(deep=False)
+    return _read_output(key, year, columns, version)
+
+
+def output_years(key: str) -> list[int]:
+    """Years of an output (manifest, else its year / month column only); [] if it has no year."""
+    entry = _output_entry(key)
+    if entry is not None:
+        return list(entry["years"] or [])
+    names = _output_columns(key)
+    col = "year" if "year" in names else "MONTH_IDX"
+    if col not in names and "year_month" not in names:
+        return []
+    values = read_output(key, columns=[col])[col]
+    years = values if col == "year" else month_year(values)
+    return sorted(int(y) for y in pd.unique(years.dropna()))
+
+
+# columns used across the pages (load_data's default projection)
+MASTER_COLS = APP_COLS
+
+
+def load_data(
+    years: tuple[int, ...] | None = None,
+    columns: tuple[str, ...] | None = None,
+    date_range: tuple[str, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Load the main dataset ONCE per data version (and selection) as a resource (best for big data).
+    years=None -> all years, otherwise only those year partitions are read.
+    columns=None -> MASTER_COLS, otherwise only these columns are read (in this order).
+    date_range -> ("2025-01-01", "2025-12-31"): TXN_DATE inside, both ends inclusive.
+    Everything is pushed into the parquet scan; pages should ask only for what they use.
+    With the IPC store the columns are memory-mapped instead (no decode, shared page cache)
+    and years / date_range are row slices of it.
+    """
+    if years is not None:
+        years = tuple(sorted(int(y) for y in years))
+    if columns is not None:
+        columns = tuple(columns)
+    if date_range is not None:
+        date_range = tuple(str(d) if d is not None else None for d in date_range)
+    return _load_master(years, columns, date_range, data_version())
+
+
+def _ipc_rows(
+    table: pa.Table, years: tuple[int, ...] | None, date_range: tuple[str, str] | None
+) -> pa.Table:
+    """Rows of `years` / inside `date_range` of the TXN_DATE-sorted IPC master (one range = a zero-copy slice)."""
+    ranges = [(0, table.num_rows)]
+    if years is not None:
+        year = _numpy(table, "year")
+        ranges = [(np.searchsorted(year, y, "left"), np.searchsorted(year, y, "right")) for y in years]
+    if date_range is not None:
+        dates = _numpy(table, "TXN_DATE")
+        first, last = date_range
+        lo = np.searchsorted(dates, pd.Timestamp(first).to_datetime64(), "left") if first else 0
+        hi = np.searchsorted(dates, pd.Timestamp(last).to_datetime64(), "right") if last else len(dates)
+        ranges = [(max(a, lo), min(b, hi)) for a, b in ranges]
+
+    merged = []
+    for a, b in ranges:
+        if b <= a:
+            continue
+        if merged and merged[-1][1] == a:
+            merged[-1] = (merged[-1][0], b)  # adjacent years stay one slice
+        else:
+            merged.append((a, b))
+    if len(merged) == 1:
+        return table.slice(merged[0][0], merged[0][1] - merged[0][0])
+    return pa.concat_tables([table.slice(a, b - a) for a, b in merged]) if merged else table.slice(0, 0)
+
+
+@st.cache_resource(show_spinner=True)
+def _load_master(
+    years: tuple[int, ...] | None,
+    columns: tuple[str, ...] | None,
+    date_range: tuple[str, str] | None,
+    version: str,
+) -> pd.DataFrame:
+    """Only the requested columns / rows are read; no intermediate frame copies."""
+    wanted = list(columns) if columns is not None else MASTER_COLS
+
+    ipc = ipc_file()
+    if ipc is not None:
+        table = map_table(ipc)
+        if all(c in table.column_names for c in wanted):
+            return to_frame(_ipc_rows(table, years, date_range).select(wanted))
+
+    schema = master_schema(str(DATA_PATH))
+    stored = schema.names
+    string_dates = is_text(schema.field("TXN_DATE").type)
+
+    # Older masters: date columns derived from TXN_DATE, CUST_ID from CUST_CODE (read only if needed)
+    read_cols = [c for c in wanted if c in stored]
+    if any(c in DATE_COLS and c not in stored for c in wanted) or string_dates:
+        read_cols.append("TXN_DATE")
+    if "CUST_ID" in wanted and "CUST_ID" not in stored:
+        read_cols.append("CUST_CODE")
+    read_cols = list(dict.fromkeys(read_cols))
+
+    table = read_master_table(
+        str(DATA_PATH), columns=read_cols, years=years, date_range=date_range, require=["TXN_DATE"]
+    )
+    df = with_cust_id(app_dtypes(table).to_pandas(split_blocks=True, self_destruct=True))
+    del table
+
+    # Date columns are stored by the pipeline (date_cols.py); only older masters need them derived
+    if "TXN_DATE" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["TXN_DATE"]):
+        df["TXN_DATE"] = pd.to_datetime(df["TXN_DATE"], errors="coerce")
+        keep = df["TXN_DATE"].notna()
+        if date_range is not None:
+            first, last = date_range
+            keep &= df["TXN_DATE"].between(pd.Timestamp(first or pd.Timestamp.min), pd.Timestamp(last or pd.Timestamp.max))
+        df = df[keep].copy()
+    missing = [c for c in DATE_COLS if c in wanted and c not in df.columns]
+    if missing:
+        df = add_date_cols(df, missing)
+        if "year" in missing:
+            df["year"] = df["year"].astype("int16")
+        if "MONTH_NUM" in missing:
+            df["MONTH_NUM"] = df["MONTH_NUM"].astype("int16")
+    if "TXN_AMOUNT" in df.columns and not pd.api.types.is_integer_dtype(df["TXN_AMOUNT"]):
+        df["TXN_AMOUNT"] = pd.to_numeric(df["TXN_AMOUNT"], errors="coerce").fillna(0).astype("int32")
+    # partitioned masters are read in month order (master_store.open_master); legacy single files are sorted here
+    if "MONTH_IDX" in df.columns and not df["MONTH_IDX"].is_monotonic_increasing:
+        df = df.sort_values("MONTH_IDX", kind="stable", ignore_index=True)
+
+    for col in [c for c in df.columns if c not in wanted]:
+        del df[col]  # in place (one block per column)
+    order = [c for c in wanted if c in df.columns]
+    return df if list(df.columns) == order else df[order]
+
+
 @st.cache_data(show_spinner=False)
 def get_lookup() -> dict:
     lookup_df = pd.read_csv(LOOKUP_PATH)
     return dict(zip(lookup_df["LOYAL_CODE"], lookup_df["TXN_DESC"].astype(str).str.capitalize()))
 
 
-@st.cache_data(show_spinner=False)
-def filter_df_by_year(df: pd.DataFrame, year: int) -> pd.DataFrame:
-    # No need for df.copy() before filter; filter first then copy
-    out = df[df["year"] == year]
-    return out.copy()
+def get_available_years() -> list[int]:
+    # from the manifest, else the partition folder names (no data read either way);
+    # no master on disk (fresh checkout: only the committed outputs) -> the user-month output's years
+    manifest = get_manifest()
+    if manifest and manifest.get("master"):
+        return list(manifest["master"]["years"])
+    years = master_years(str(DATA_PATH))
+    if not years and has_output(USER_MONTHLY_KEY):
+        years = output_years(USER_MONTHLY_KEY)
+    return years
+
+
+# ------------------- MASTER SLICES -------------------
+
+def _row_ranges(keys: np.ndarray) -> dict[int, tuple[int, int]]:
+    """{key: (start, stop)} of the runs of a sorted key array."""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=int)
+    stops = np.r_[starts[1:], len(keys)]
+    return {int(k): (int(a), int(b)) for k, a, b in zip(keys[starts], starts, stops)}
+
+
+@st.cache_resource(show_spinner=False)
+def _master_index(version: str) -> dict:
+    """load_data() (sorted by MONTH_IDX) + the row range of every year."""
+    df = load_data()
+    return {"df": df, "years": _row_ranges(df["MONTH_IDX"].to_numpy() // 12)}  # month order == year order
+
+
+def year_view(year: int) -> pd.DataFrame:
+    """
+    Rows of `year`: a zero-copy row slice of the cached master (offsets built once
+    per data version, no argument hashing). Shares memory with the master: copy before modifying.
+    """
+    index = _master_index(data_version())
+    start, stop = index["years"].get(int(year), (0, 0))
+    return index["df"].iloc[start:stop]
 
 @st.cache_data(show_spinner=False) 
 def get_most_growing_loyal_code_from_monthly(movers_monthly: pd.DataFrame, year: int): 
@@ -81,28 +457,26 @@ def compute_new_2025_users_monthly(df: pd.DataFrame) -> pd.DataFrame:
     - POINTS (sum of TXN_AMOUNT)
     """
 
-    df = df.copy()
-
-    df["TXN_DATE"] = pd.to_datetime(df["TXN_DATE"], errors="coerce")
-    df = df[df["TXN_DATE"].notna()].copy()
+    df = known_customers(df).copy()  # rows without a customer have no first year
 
-    df["MONTH"] = df["TXN_DATE"].dt.month
+    # load_data already dropped missing dates and stores MONTH_NUM
+    df["MONTH"] = df["MONTH_NUM"]
 
     # FIRST YEAR per customer
     first_year = (
-        df.groupby("CUST_CODE", observed=True)["year"]
+        df.groupby("CUST_ID", observed=True)["year"]
         .min()
         .reset_index(name="FIRST_YEAR")
     )
 
-    df2 = df.merge(first_year, on="CUST_CODE", how="left")
+    df2 = df.merge(first_year, on="CUST_ID", how="left")
     df2["IS_NEW_2025"] = df2["FIRST_YEAR"] == 2025
 
     new_2025_users_monthly = (
         df2[df2["IS_NEW_2025"]]
         .groupby("MONTH", observed=True)
         .agg(
-            NEW_USERS=("CUST_CODE", "nunique"),
+            NEW_USERS=("CUST_ID", "nunique"),
             POINTS=("TXN_AMOUNT", "sum"),
         )
         .reset_index()
@@ -113,38 +487,173 @@ def compute_new_2025_users_monthly(df: pd.DataFrame) -> pd.DataFrame:
 
 # ------------------- PRECOMPUTED LOADERS -------------------
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page1():
-    user_level_stat_monthly = pd.read_parquet("data/pre_computed_data/page1/precomputed_user_level_stat_monthly.pqt", engine="pyarrow")
-    monthly_reward_stat = pd.read_parquet("data/pre_computed_data/page1/precomputed_monthly_reward_stat.pqt", engine="pyarrow")
-    point_cutoff = pd.read_parquet("data/pre_computed_data/page1/precomputed_point_cutoff.pqt", engine="pyarrow")
-    return user_level_stat_monthly, monthly_reward_stat, point_cutoff
+# Every loader takes year=None (all years) / columns=None (all columns), see read_output.
+# Loaders returning several frames take columns per frame: {"users_agg_df": ["CUST_ID", ...]}.
 
+USER_MONTHLY_KEY = "page1/precomputed_user_level_stat_monthly.pqt"
+POINT_HIST_KEY = "page1/precomputed_point_histogram.pqt"
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page2():
-    grouped_reward = pd.read_parquet("data/pre_computed_data/page2/precomputed_grouped_reward.pqt", engine="pyarrow")
-    transaction_summary = pd.read_parquet("data/pre_computed_data/page2/precomputed_transaction_summary.pqt", engine="pyarrow")
-    transaction_summary_with_pad = pd.read_parquet("data/pre_computed_data/page2/precomputed_transaction_summary_with_pad.pqt", engine="pyarrow")
-    return grouped_reward, transaction_summary, transaction_summary_with_pad
 
+def load_precomputed_page1(year: int | None = None, columns: dict[str, list[str]] | None = None):
+    """
+    (user_level_stat_monthly, monthly_reward_stat, point_hist).
+    point_hist: users per month x 10-point bin below 1000; cutoff counts come from
+    point_hist.cutoff_counts. Built from the user-month rows if the pipeline has not written it yet.
+    """
+    columns = columns or {}
+    user_level_stat_monthly = read_output(USER_MONTHLY_KEY, year, columns.get("user_level_stat_monthly"))
+    monthly_reward_stat = read_output(
+        "page1/precomputed_monthly_reward_stat.pqt", year, columns.get("monthly_reward_stat")
+    )
+    if has_output(POINT_HIST_KEY):
+        point_hist = read_output(POINT_HIST_KEY, year, columns.get("point_hist"))
+    else:
+        point_hist = point_histogram(read_output(USER_MONTHLY_KEY, year))
+        if columns.get("point_hist"):
+            point_hist = point_hist[columns["point_hist"]]
+    return user_level_stat_monthly, monthly_reward_stat, point_hist
+
+
+def load_precomputed_page2(year: int | None = None, columns: dict[str, list[str]] | None = None):
+    columns = columns or {}
+    grouped_reward = read_output("page2/precomputed_grouped_reward.pqt", year, columns.get("grouped_reward"))
+    transaction_summary = read_output(
+        "page2/precomputed_transaction_summary.pqt", year, columns.get("transaction_summary")
+    )
+    return grouped_reward, transaction_summary
 
-@st.cache_data(show_spinner=False)
-def load_page2_codegroup_map():
-    return pd.read_parquet("data/pre_computed_data/page2/precomputed_codegroup_loyalcode_map.pqt", engine="pyarrow")
 
+def pad_transaction_summary(ts: pd.DataFrame) -> pd.DataFrame:
+    """Month x GROUP product with EPS fill (keeps the plotly animation frames stable)."""
+    EPS = 1e-6
 
-@st.cache_data(show_spinner=False)
-def load_page2_movers_monthly():
-    return pd.read_parquet("data/pre_computed_data/page2/precomputed_movers_monthly.pqt", engine="pyarrow")
+    ts = ts.drop(columns=["year"], errors="ignore")
+
+    all_months = ts["MONTH_IDX"].unique()
+    all_groups = ts["GROUP"].unique()
+
+    pad = (
+        pd.MultiIndex.from_product([all_months, all_groups], names=["MONTH_IDX", "GROUP"])
+        .to_frame(index=False)
+    )
+
+    out = (
+        pad.merge(ts, on=["MONTH_IDX", "GROUP"], how="left")
+        .fillna(
+            {
+                "Transaction_Freq": EPS,
+                "Total_Users": EPS,
+                "Total_Amount": EPS,
+                "LOYAL_CODE": "__PAD__",
+                "DESC": "—",
+            }
+        )
+        .sort_values("MONTH_IDX")
+    )
+
+    out["year"] = month_year(out["MONTH_IDX"]).astype(int)
+    return out
+
+
+def load_page2_transaction_summary_with_pad():
+    """Padded view for the animation, derived from the unpadded summary on first use (not stored)."""
+    return _padded_transaction_summary(data_version())
 
 
 @st.cache_data(show_spinner=False)
-def load_precomputed_page4():
-    users_agg_df = pd.read_parquet("data/pre_computed_data/page4/users_agg_df.pqt", engine="pyarrow")
-    thresholds_df = pd.read_parquet("data/pre_computed_data/page4/thresholds.pqt", engine="pyarrow")
-    user_segment_monthly_df = pd.read_parquet("data/pre_computed_data/page4/user_segment_monthly_df.pqt", engine="pyarrow")
-    segment_loyal_summary = pd.read_parquet("data/pre_computed_data/page4/segment_loyal_summary.pqt", engine="pyarrow")
+def _padded_transaction_summary(version: str) -> pd.DataFrame:
+    return pad_transaction_summary(read_output("page2/precomputed_transaction_summary.pqt"))
+
+
+USER_SKETCHES_KEY = "page2/precomputed_user_sketches.pqt"
+
+
+def load_user_sketches():
+    """(cells, registers): one HLL sketch per LOYAL_CODE x month; None if the pipeline has not written them yet."""
+    if not has_output(USER_SKETCHES_KEY):
+        return None
+    return _load_user_sketches(data_version())
+
+
+@st.cache_resource(show_spinner=False)
+def _load_user_sketches(version: str):
+    ipc = ipc_file(USER_SKETCHES_KEY)
+    table = map_table(ipc) if ipc is not None else pq.read_table(PRECOMPUTED_DIR / USER_SKETCHES_KEY)
+    registers = fixed_binary_view(table["SKETCH"], hll.M)  # no copy (mapped: shared page cache)
+    if registers is None:
+        registers = hll.from_bytes(table["SKETCH"].to_pylist())
+    cells = with_month_key(to_frame(table.drop_columns(["SKETCH"])))
+    return cells, registers
+
+
+def distinct_users(
+    loyal_codes: list[str] | None = None,
+    years: list[int] | None = None,
+    year_months: list[str] | None = None,
+    code_groups: list[str] | None = None,
+    exact: bool = False,
+) -> int:
+    """
+    Distinct CUST_ID over the union of the selected LOYAL_CODE x month cells (None = all);
+    year_months as "YYYY-MM" labels.
+    Default: merged sketches (~2% error, no transaction scan).
+    exact=True (or no sketches on disk): nunique over the transactions.
+    """
+    sketches = None if exact else load_user_sketches()
+    month_ids = month_keys(year_months) if year_months is not None else None
+
+    if sketches is None:
+        columns = ["CUST_ID"]
+        columns += ["LOYAL_CODE"] if loyal_codes is not None else []
+        columns += ["MONTH_IDX"] if year_months is not None else []
+        columns += ["CODE_GROUP"] if code_groups is not None else []
+        df = load_data(years=tuple(years) if years is not None else None, columns=tuple(columns))
+        mask = df["CUST_ID"] != NULL_CUST_ID
+        if loyal_codes is not None:
+            mask &= df["LOYAL_CODE"].isin(loyal_codes)
+        if year_months is not None:
+            mask &= df["MONTH_IDX"].isin(month_ids)
+        if code_groups is not None:
+            mask &= df["CODE_GROUP"].isin(code_groups)
+        return int(df.loc[mask, "CUST_ID"].nunique())
+
+    cells, registers = sketches
+    mask = np.ones(len(cells), dtype=bool)
+    if loyal_codes is not None:
+        mask &= cells["LOYAL_CODE"].isin(loyal_codes).to_numpy()
+    if years is not None:
+        mask &= cells["year"].isin(years).to_numpy()
+    if year_months is not None:
+        mask &= cells["MONTH_IDX"].isin(month_ids).to_numpy()
+    if code_groups is not None:
+        mask &= cells["CODE_GROUP"].isin(code_groups).to_numpy()
+    if not mask.any():
+        return 0
+    return int(round(hll.estimate(hll.merge(registers[mask]))))
+
+
+def load_page2_codegroup_map(columns: list[str] | None = None):
+    return read_output("page2/precomputed_codegroup_loyalcode_map.pqt", columns=columns)
+
+
+def load_page2_movers_monthly(year: int | None = None, columns: list[str] | None = None):
+    return read_output("page2/precomputed_movers_monthly.pqt", year, columns)
+
+
+PAGE4_USERS_KEY = "page4/users_agg_df.pqt"
+
+
+def load_precomputed_page4(year: int | None = None, columns: dict[str, list[str]] | None = None):
+    """(users_agg_df, thresholds_df, user_segment_monthly_df, segment_loyal_summary); the sidebar year: output_years(PAGE4_USERS_KEY)."""
+    columns = columns or {}
+    users_agg_df = read_output(PAGE4_USERS_KEY, year, columns.get("users_agg_df"))
+    thresholds_df = read_output("page4/thresholds.pqt", year, columns.get("thresholds_df"))
+    user_segment_monthly_df = read_output(
+        "page4/user_segment_monthly_df.pqt", year, columns.get("user_segment_monthly_df")
+    )
+    segment_loyal_summary = read_output(
+        "page4/segment_loyal_summary.pqt", year, columns.get("segment_loyal_summary")
+    )
     return users_agg_df, thresholds_df, user_segment_monthly_df, segment_loyal_summary
 
 
@@ -153,7 +662,7 @@ def load_precomputed_page4():
 def get_users_agg_by_monthnum(df_year: pd.DataFrame) -> pd.DataFrame:
 
     users_agg_df = (
-        df_year.groupby(["CUST_CODE", "MONTH_NUM"], observed=True)
+        known_customers(df_year).groupby(["CUST_ID", "MONTH_NUM"], observed=True)
         .agg(
             Total_Points=("TXN_AMOUNT", "sum"),
             Transaction_Count=("JRNO", "count"),
@@ -163,43 +672,18 @@ def get_users_agg_by_monthnum(df_year: pd.DataFrame) -> pd.DataFrame:
         .reset_index()
     )
 
-    users_agg_df["Reached_1000_Flag"] = (users_agg_df["Total_Points"] >= 1000).astype("int8")
-    users_agg_df["Inactive"] = (users_agg_df["Transaction_Count"] <= 1).astype("int8")
-
-    return users_agg_df
+    return add_flags(users_agg_df)
 
 
 def get_page5_thresholds(users_agg_df: pd.DataFrame) -> dict:
-
-    user_under_1000 = users_agg_df[(users_agg_df["Reached_1000_Flag"] == 0) & (users_agg_df["Inactive"] == 0)]
-    user_reached_1000 = users_agg_df[users_agg_df["Reached_1000_Flag"] == 1]
-
-    return {
-        "txn_q25": float(user_under_1000["Transaction_Count"].quantile(0.25)),
-        "txn_q75": float(user_under_1000["Transaction_Count"].quantile(0.75)),
-        "days_q25": float(user_under_1000["Active_Days"].quantile(0.25)),
-        "days_q75": float(user_under_1000["Active_Days"].quantile(0.75)),
-        "points_q25": float(user_under_1000["Total_Points"].quantile(0.25)),
-        "points_q75": float(user_under_1000["Total_Points"].quantile(0.75)),
-        "achievers_txn_q25": float(user_reached_1000["Transaction_Count"].quantile(0.25)),
-    }
+    thresholds = segment_thresholds(users_agg_df).iloc[0].to_dict()
+    thresholds.pop("achievers_points_q25")
+    return thresholds
 
 
 def assign_page5_segments(users_agg_df: pd.DataFrame, thresholds: dict) -> pd.DataFrame:
     out = users_agg_df.copy()
-
-    txn_q75 = thresholds["txn_q75"]
-    days_q75 = thresholds["days_q75"]
-    achievers_txn_q25 = thresholds["achievers_txn_q25"]
-
-    out["User_Segment"] = "Тогтмол_бус_оролцогч"
-
-    out.loc[(out["Transaction_Count"] >= txn_q75) & (out["Active_Days"] > days_q75), "User_Segment"] = "Тогтвортой"
-    out.loc[(out["Transaction_Count"] < txn_q75) & (out["Active_Days"] <= days_q75), "User_Segment"] = "Туршигч"
-    out.loc[out["Transaction_Count"] >= achievers_txn_q25, "User_Segment"] = "Их_чармайлттай"
-    out.loc[out["Reached_1000_Flag"] == 1, "User_Segment"] = "Амжилттай"
-    out.loc[out["Inactive"] == 1, "User_Segment"] = "Идэвхгүй"
-
+    out["User_Segment"] = assign_segments(out, thresholds, lang="mn")
     return out
 
 
@@ -207,13 +691,13 @@ def get_page5_user_milestone_counts(users_agg_df: pd.DataFrame) -> pd.DataFrame:
     reached = users_agg_df[users_agg_df["Reached_1000_Flag"] == 1]
 
     user_milestone_counts = (
-        reached.groupby("CUST_CODE", observed=True)
+        reached.groupby("CUST_ID", observed=True)
         .size()
         .reset_index(name="Times_Reached_1000")
     )
 
     reach_frequency = (
-        user_milestone_counts.groupby("Times_Reached_1000", observed=True)["CUST_CODE"]
+        user_milestone_counts.groupby("Times_Reached_1000", observed=True)["CUST_ID"]
         .size()
         .reset_index(name="Number_of_Users")
         .sort_values("Times_Reached_1000")
@@ -226,51 +710,17 @@ def get_page5_user_milestone_counts(users_agg_df: pd.DataFrame) -> pd.DataFrame:
 def get_page5_loyal_normalized_profile(df_year: pd.DataFrame, users_agg_df: pd.DataFrame) -> pd.DataFrame:
     """
     Memory optimized version:
-    - filter early to achievers only
-    - remove unnecessary merges
+    - only achiever-month transactions are selected (sorted key index, no merge)
+    - code sums + monthly totals in one grouped pass
     """
-    # Only achiever months (>=1000)
-    achiever_months = users_agg_df.loc[users_agg_df["Reached_1000_Flag"] == 1, ["CUST_CODE", "MONTH_NUM"]]
-
-    # Reduce df to only achiever months BEFORE grouping
-    df_ach = df_year.merge(achiever_months, on=["CUST_CODE", "MONTH_NUM"], how="inner")
-
-    # Monthly totals for normalization
-    monthly_totals = (
-        df_ach.groupby(["CUST_CODE", "MONTH_NUM"], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index(name="True_Monthly_Total")
-    )
-
-    loyal_code_agg = (
-        df_ach.groupby(["CUST_CODE", "MONTH_NUM", "LOYAL_CODE"], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index()
-    )
-
-    final_df = loyal_code_agg.merge(monthly_totals, on=["CUST_CODE", "MONTH_NUM"], how="left")
-
-    # Business cleaning
-    final_df = final_df[final_df["LOYAL_CODE"].notna()]
-    final_df = final_df[final_df["LOYAL_CODE"] != "10K_PURCH_INSUR"]
-
-    final_df["Normalized_Points"] = (final_df["TXN_AMOUNT"] / final_df["True_Monthly_Total"]) * 1000
-
-    # profile per user-month-loyal
-    user_month_profile = (
-        final_df.groupby(["CUST_CODE", "MONTH_NUM", "LOYAL_CODE"], observed=True)["Normalized_Points"]
-        .sum()
-        .reset_index()
-    )
-
-    return user_month_profile
+    return achiever_month_profile(df_year, users_agg_df, with_year=False)
 
 
-def get_page5_bundle(df_base: pd.DataFrame, year: int, include_profile: bool = False) -> dict:
+def get_page5_bundle(year: int, include_profile: bool = False) -> dict:
     """
     include_profile=False prevents the RAM-heavy Tab3 compute.
     """
-    df_year = filter_df_by_year(df_base, year)
+    df_year = year_view(year)
 
     users_agg_df = get_users_agg_by_monthnum(df_year)
     thresholds = get_page5_thresholds(users_agg_df)
@@ -293,39 +743,37 @@ def get_page5_bundle(df_base: pd.DataFrame, year: int, include_profile: bool = F
 
 # ------------------- PAGE MISC ----------------------
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page_misc_counts():
-    return pd.read_parquet("data/pre_computed_data/page_misc/precomputed_monthly_bucket_counts.pqt", engine="pyarrow")
+MISC_COUNTS_KEY = "page_misc/precomputed_monthly_bucket_counts.pqt"
 
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page_misc_loyal_avg():
-    return pd.read_parquet("data/pre_computed_data/page_misc/precomputed_loyal_avg_by_year.pqt", engine="pyarrow")
+def load_precomputed_page_misc_counts(year: int | None = None, columns: list[str] | None = None):
+    return read_output(MISC_COUNTS_KEY, year, columns)
 
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page_misc_reach_frequency():
-    return pd.read_parquet("data/pre_computed_data/page_misc/precomputed_reach_frequency_by_year.pqt", engine="pyarrow")
+def load_precomputed_page_misc_loyal_avg(year: int | None = None, columns: list[str] | None = None):
+    return read_output("page_misc/precomputed_loyal_avg_by_year.pqt", year, columns)
+
+
+def load_precomputed_page_misc_reach_frequency(year: int | None = None, columns: list[str] | None = None):
+    return read_output("page_misc/precomputed_reach_frequency_by_year.pqt", year, columns)
 
 
 # --------------------- PAGE 5 ----------------------------
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page5_users_agg():
-    return pd.read_parquet("data/pre_computed_data/page5/precomputed_users_agg_df.pqt", engine="pyarrow")
+PAGE5_USERS_AGG_KEY = "page5/precomputed_users_agg_df.pqt"
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page5_thresholds():
-    return pd.read_parquet("data/pre_computed_data/page5/precomputed_thresholds_by_year.pqt", engine="pyarrow")
+def load_precomputed_page5_users_agg(year: int | None = None, columns: list[str] | None = None):
+    return read_output(PAGE5_USERS_AGG_KEY, year, columns)
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page5_reach_frequency():
-    return pd.read_parquet("data/pre_computed_data/page5/precomputed_reach_frequency_by_year.pqt", engine="pyarrow")
+def load_precomputed_page5_thresholds(year: int | None = None, columns: list[str] | None = None):
+    return read_output("page5/precomputed_thresholds_by_year.pqt", year, columns)
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page5_monthly_points():
-    return pd.read_parquet("data/pre_computed_data/page5/precomputed_monthly_customer_points.pqt", engine="pyarrow")
+def load_precomputed_page5_reach_frequency(year: int | None = None, columns: list[str] | None = None):
+    return read_output("page5/precomputed_reach_frequency_by_year.pqt", year, columns)
 
-@st.cache_data(show_spinner=False)
-def load_precomputed_page5_user_month_profile():
-    return pd.read_parquet("data/pre_computed_data/page5/precomputed_user_month_profile_achievers.pqt", engine="pyarrow")
+def load_precomputed_page5_monthly_points(year: int | None = None, columns: list[str] | None = None):
+    return read_output("page5/precomputed_monthly_customer_points.pqt", year, columns)
+
+def load_precomputed_page5_user_month_profile(year: int | None = None, columns: list[str] | None = None):
+    # the biggest output: pages should load one year (row group) and only the columns they use
+    return read_output("page5/precomputed_user_month_profile_achievers.pqt", year, columns)
@@ -0,0 +1,151 @@
+"""
+data_manifest.py
+
+Manifest of the precomputed outputs (written by the pipeline, read by data_loader at startup).
+
+    pre_computed_data/manifest.json
+    {
+      "format": 1,
+      "data_version": "3f9c0a1b2c4d5e6f",          # changes whenever any output / the master changes
+      "built_at": "2025-01-31T12:00:00",
+      "master": {"path": "ardiin_erh_code_grouped_combined", "years": [2024, 2025], "rows": ..., "bytes": ...,
+                 "ipc": "ipc/master.arrow"},
+      "outputs": {
+        "page1/precomputed_point_histogram.pqt": {
+          "rows": 2400, "bytes": 6512, "years": [2024, 2025], "sha256": "...",
+          "schema": {"MONTH_IDX": "int32", "POINT_BIN": "int16", "Users": "int32"},
+          "ipc": "ipc/page1/precomputed_point_histogram.arrow"
+        },
+        ...
+      }
+    }
+
+Output keys are paths relative to pre_computed_data/. The app validates the
+outputs it needs (check_outputs), picks files and gets the available years
+from here, without opening any parquet footer. "ipc" (optional) is the memory-mappable
+copy of an output / the master (ipc_store.py), listed only while it was built from
+exactly that file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _years(pf: pq.ParquetFile) -> list[int] | None:
+    names = pf.schema_arrow.names
+    if "year" in names:
+        years = pf.read(columns=["year"]).column("year")
+    elif "MONTH_IDX" in names:
+        years = pc.divide(pf.read(columns=["MONTH_IDX"]).column("MONTH_IDX"), 12)  # integer division
+    elif "year_month" in names:  # files written before the month key
+        years = pc.utf8_slice_codeunits(pf.read(columns=["year_month"]).column("year_month").cast("string"), 0, 4)
+    else:
+        return None
+    return sorted(int(y) for y in pc.unique(years).to_pylist() if y is not None)
+
+
+def describe_output(path: str) -> dict:
+    pf = pq.ParquetFile(path)
+    return {
+        "rows": pf.metadata.num_rows,
+        "bytes": os.path.getsize(path),
+        "years": _years(pf),
+        "sha256": sha256_file(path),
+        "schema": {field.name: str(field.type) for field in pf.schema_arrow},
+    }
+
+
+def build_manifest(
+    out_root: str,
+    outputs: list[str],
+    master: dict | None = None,
+    ipc: dict[str, tuple[str, str]] | None = None,
+) -> dict:
+    """
+    outputs: parquet paths under out_root (missing ones are left out); master: path / years / rows / bytes (/ ipc).
+    ipc: {output path: (ipc key, sha256 it was built from)}; kept only where that is the output's sha256.
+    """
+    described = {}
+    for path in sorted(outputs):
+        if not os.path.exists(path):
+            continue
+        entry = describe_output(path)
+        ipc_key, source = (ipc or {}).get(path, (None, None))
+        if ipc_key is not None and source == entry["sha256"]:
+            entry["ipc"] = ipc_key
+        described[os.path.relpath(path, out_root).replace(os.sep, "/")] = entry
+
+    version_of = {
+        "outputs": {key: d["sha256"] for key, d in described.items()},
+        "master": master,
+        "ipc": sorted(key for key, d in described.items() if "ipc" in d),  # the app switches to the mapped copies
+    }
+    data_version = hashlib.sha256(json.dumps(version_of, sort_keys=True).encode()).hexdigest()[:16]
+    return {
+        "format": MANIFEST_FORMAT,
+        "data_version": data_version,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "master": master,
+        "outputs": described,
+    }
+
+
+def write_manifest(
+    out_root: str,
+    outputs: list[str],
+    master: dict | None = None,
+    ipc: dict[str, tuple[str, str]] | None = None,
+) -> dict:
+    manifest = build_manifest(out_root, outputs, master, ipc)
+    path = os.path.join(out_root, MANIFEST_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return manifest
+
+
+def read_manifest(out_root: str) -> dict | None:
+    path = os.path.join(out_root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    return manifest
+
+
+def check_outputs(manifest: dict, expected: dict[str, list[str]]) -> list[str]:
+    """Problems (missing output / missing columns / empty) for {output key: required columns}."""
+    problems = []
+    outputs = manifest.get("outputs", {})
+    for key, columns in expected.items():
+        entry = outputs.get(key)
+        if entry is None:
+            problems.append(f"{key}: missing")
+            continue
+        missing = [c for c in columns if c not in entry["schema"]]
+        if missing:
+            problems.append(f"{key}: missing columns {missing}")
+        if entry["rows"] == 0:
+            problems.append(f"{key}: no rows")
+    return problems
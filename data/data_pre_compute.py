@@ -15,10 +15,34 @@ Recommended outputs:
 
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
 import os
+import time
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from functools import partial
 from pathlib import Path
 
+from arrow_backend import add_customer_ids_table, build_code_grouped_table, table_achiever_profile, table_group_agg, table_user_sketches
+from code_groups import CODE_GROUP_RULES, assign_code_group
+from data_manifest import sha256_file, write_manifest
+from date_cols import add_date_cols, month_idx, month_keys, month_year, parse_dates
+from hll import build_sketches, to_bytes
+from ipc_store import IPC_DIR, MASTER_FILE, ipc_key, ipc_source, write_ipc
+from master_store import APP_COLS, app_dtypes, assign_customer_ids, clear_master, drop_months, known_customers, master_bytes, master_years, null_customer_mask, open_master, read_master, read_master_table, write_master
+from output_store import write_output
+from point_hist import point_histogram
+from run_report import instrument, new_run_id, previous_run, print_summary, step, take_records, track_input, track_output, write_report
+from segments import achiever_month_profile, add_flags, assign_segments, segment_thresholds
+from stage_graph import load_manifest, parquet_stats_fingerprint, record_stages, run_stages, select_stages
+from txn_desc import TXN_DESC_RULES, desc_is_test, factorize_desc, normalize_txn_desc
+
 # =========================
 # CONFIG
 # =========================
@@ -28,8 +52,8 @@ BASE_DIR = Path(__file__).resolve().parent
 INPUT_PARQUET = str(BASE_DIR / "ardiin_erh_2024_2025.pqt") # Put new RAW dataset here 
 LOOKUP_CSV = str(BASE_DIR / "loyalty_lookup_2.csv")
 
-# overwrite output
-CODE_GROUPED_OUTPUT = "ardiin_erh_code_grouped_combined.pqt"
+# overwrite output (Hive-partitioned folder: year=YYYY/MONTH_NUM=M/, see master_store.py)
+CODE_GROUPED_OUTPUT = "ardiin_erh_code_grouped_combined"
 
 # filter years (probaly gonna need later on)
 
@@ -38,22 +62,24 @@ CODE_GROUPED_OUTPUT = "ardiin_erh_code_grouped_combined.pqt"
 
 
 # Streamlit precompute folders
+OUT_DIR = "pre_computed_data"
 OUT_DIR_PAGE_1 = os.path.join("pre_computed_data", "page1")
 OUT_DIR_PAGE_2 = os.path.join("pre_computed_data", "page2")
 OUT_DIR_PAGE_4 = os.path.join("pre_computed_data", "page4")
 OUT_DIR_PAGE_5 = os.path.join("pre_computed_data", "page5")
 OUT_DIR_PAGE_MISC = os.path.join("pre_computed_data", "page_misc")
+OUT_DIR_STATE = os.path.join("pre_computed_data", "_state")  # pipeline-only (incremental runs)
 
 
 # Page 1 outputs
 OUT_USER_MONTHLY = os.path.join(OUT_DIR_PAGE_1, "precomputed_user_level_stat_monthly.pqt")
 OUT_MONTHLY_SUMMARY = os.path.join(OUT_DIR_PAGE_1, "precomputed_monthly_reward_stat.pqt")
-OUT_POINT_CUTOFF = os.path.join(OUT_DIR_PAGE_1, "precomputed_point_cutoff.pqt")
+OUT_POINT_HIST = os.path.join(OUT_DIR_PAGE_1, "precomputed_point_histogram.pqt")
 
 # Page 2 outputs
 OUT_GROUPED_REWARD = os.path.join(OUT_DIR_PAGE_2, "precomputed_grouped_reward.pqt")
 OUT_TS_NO_PAD = os.path.join(OUT_DIR_PAGE_2, "precomputed_transaction_summary.pqt")
-OUT_TS_PAD = os.path.join(OUT_DIR_PAGE_2, "precomputed_transaction_summary_with_pad.pqt")
+OUT_USER_SKETCHES = os.path.join(OUT_DIR_PAGE_2, "precomputed_user_sketches.pqt")
 OUT_CODEGROUP_MAP = os.path.join(OUT_DIR_PAGE_2, "precomputed_codegroup_loyalcode_map.pqt")
 OUT_MOVERS_BASE = os.path.join(OUT_DIR_PAGE_2, "precomputed_movers_monthly.pqt")
 
@@ -75,6 +101,38 @@ OUT_PAGE5_REACH_FREQ = os.path.join(OUT_DIR_PAGE_5, "precomputed_reach_frequency
 OUT_PAGE5_MONTHLY_POINTS = os.path.join(OUT_DIR_PAGE_5, "precomputed_monthly_customer_points.pqt")
 OUT_PAGE5_USER_MONTH_PROFILE = os.path.join(OUT_DIR_PAGE_5, "precomputed_user_month_profile_achievers.pqt")
 
+# Incremental state
+OUT_USER_MONTH_FACTS = os.path.join(OUT_DIR_STATE, "user_month_facts.pqt")
+WATERMARK_JSON = os.path.join(OUT_DIR_STATE, "watermark.json")
+
+# Uncompressed Arrow IPC snapshot of PRECOMPUTE_COLS: stage workers memory-map it
+# (shared OS page cache) instead of receiving a pickled DataFrame
+BASE_ARROW = os.path.join(OUT_DIR_STATE, "code_grouped_base.arrow")
+
+# Uncompressed Arrow IPC copies of the app outputs + the master's app columns (ipc_store.py):
+# every Streamlit process memory-maps them (shared OS page cache, no parquet decode at startup)
+OUT_DIR_IPC = os.path.join(OUT_DIR, IPC_DIR)
+OUT_IPC_MASTER = os.path.join(OUT_DIR_IPC, MASTER_FILE)
+
+# Raw columns hashed per month to detect new / changed months
+FINGERPRINT_COLS = ["TXN_DATE", "TXN_AMOUNT", "CUST_CODE", "LOYAL_CODE", "TXN_DESC"]
+RAW_DATE_FORMAT = "%d-%b-%y"
+
+# Streaming build: rows per raw record batch (peak RAM ~ a few x one batch)
+STREAM_BATCH_ROWS = 2_000_000
+
+# Engine of the transaction-level steps (CODE_GROUPED build + every aggregate over the base snapshot):
+#   pandas: DataFrames
+#   arrow : pa.Table + Acero hash aggregates / joins on all cores (arrow_backend.py), same output files
+BACKENDS = ["pandas", "arrow"]
+DEFAULT_BACKEND = "pandas"
+
+# Columns the page precompute needs from the master dataset (streaming mode reads only these back)
+PRECOMPUTE_COLS = [
+    "TXN_DATE", "CUST_ID", "TXN_AMOUNT", "LOYAL_CODE", "CODE_GROUP",
+    "year", "MONTH_NUM", "MONTH_NAME", "MONTH_IDX",
+]
+
 
 # =========================
 # HELPERS
@@ -87,6 +145,7 @@ def ensure_dirs() -> None:
     os.makedirs(OUT_DIR_PAGE_4, exist_ok=True)
     os.makedirs(OUT_DIR_PAGE_5, exist_ok=True)
     os.makedirs(OUT_DIR_PAGE_MISC, exist_ok=True)
+    os.makedirs(OUT_DIR_STATE, exist_ok=True)
 
 
 def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -99,96 +158,24 @@ def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
 # 1) BUILD CODE_GROUPED DATASET
 # =========================
 
-GEO_CODES = {
-    "BAGANUUR", "BULGAN", "DARKHAN", "ERDENET",
-    "KHENTII", "CHOIR", "SAINSHAND", "SELENGE"
-}
-
-def map_code_group(code: str) -> str:
-    if pd.isna(code):
-        return "Financial Transactions"
-
-    code = str(code).strip().upper()
-
-    if code in {
-        "10K_TRANSACTION",
-        "10K_CHARGE_CUPCAKE",
-        "10K_CHARGE_CUPCAKE_1",
-        "10K_TULBUR_TSES",
-        '10K_TRANSACTION_CARD'
-    }:
-        return "Core Transactions"
-
-    if code in GEO_CODES:
-        return "Campaigns & Events"
-
-    if (
-        code.startswith("10K_OPEN")
-        or code in {"ARD_SEC", "ARD_SEC1", "ARD_SEC100", "10K_KIDS61"}
-        or code.endswith("UTSD")
-        or "TETDANS" in code
-    ):
-        return "Account Opening"
-
-    if (
-        "TRANSACTION" in code
-        or "CHARGE" in code
-        or "CCA" in code
-        or "AFFILIATE" in code
-        or code in {"LOYALTY_LIMIT", "ACO", "ZEEL_TULULT"}
-    ):
-        return "Financial Transactions"
-
-    if "INSUR" in code or "DAATGAL" in code:
-        return "Insurance"
-
-    if (
-        code.startswith(("MARAL", "MARAN"))
-        or "KRYPTOS" in code
-        or "PNP" in code
-        or "LOTTO" in code
-        or code == "10K_GAME"
-    ):
-        return "Merchant & Lifestyle"
-
-    if (
-        "SOCIAL" in code
-        or "FACEBOOK" in code
-        or "SELFIE" in code
-        or "MEDEE" in code
-        or "TUUH" in code
-    ):
-        return "Campaigns & Events"
-
-    if (
-        code.startswith("10K_BUY")
-        or code.startswith("ARD_")
-        or "1072" in code
-        or "HOS" in code
-        or "HOUS" in code
-    ):
-        return "Investments & Securities"
-
-    if code.startswith((
-        "INVESTORWEEK", "TVMEN", "SMART", "HURUNGU",
-        "PENSION_SURGALT", "CREDIT_SURGALT", "CREDIT_ZEEL",
-        "ARDCOIN", "CREDIT_AIRDROP"
-    )):
-        return "Campaigns & Events"
-
-    if code.startswith("INF") and len(code) >= 7 and code[3:7].isdigit():
-        return "Campaigns & Events"
-
-    return "Other"
-
-def build_code_grouped_dataset() -> pd.DataFrame:
-    print("Loading raw parquet:", INPUT_PARQUET)
-    df = pd.read_parquet(INPUT_PARQUET)
-    df = standardize_columns(df)
+@instrument
+def build_code_grouped_dataset(
+    raw: pd.DataFrame | pa.Table | None = None, backend: str = DEFAULT_BACKEND, path: str | None = None
+) -> pd.DataFrame | pa.Table:
+    """Clean `raw` (default: the whole raw parquet at `path`, else INPUT_PARQUET) into the CODE_GROUPED schema."""
+    if raw is None:
+        path = path or INPUT_PARQUET
+        print("Loading raw parquet:", path)
+        raw = pq.read_table(path) if backend == "arrow" else pd.read_parquet(path)
+        track_input(len(raw), os.path.getsize(path))
+    if isinstance(raw, pa.Table):
+        return build_code_grouped_table(raw, RAW_DATE_FORMAT)
+    df = standardize_columns(raw)
 
     # Remove test / invalid (from your pipeline) :contentReference[oaicite:5]{index=5}
     if "TXN_DESC" in df.columns:
-        df = df[df["TXN_DESC"].fillna("").astype(str).str.strip() != "Тест"]
+        df["TXN_DESC"] = factorize_desc(df["TXN_DESC"])
+        df = df[~desc_is_test(df["TXN_DESC"])]
     if "LOYAL_CODE" in df.columns:
         df = df[df["LOYAL_CODE"].fillna("") != "LUNAR_RDXQR"]
 
@@ -198,351 +185,457 @@ def build_code_grouped_dataset() -> pd.DataFrame:
     df["LOYAL_CODE"] = df["LOYAL_CODE"].fillna("None").astype(str)
 
 
-    # Dates
-    df["TXN_DATE"] = pd.to_datetime(df["TXN_DATE"], format="%d-%b-%y", errors="coerce")
+    # Dates (each distinct date string parsed once, see date_cols.py)
+    df["TXN_DATE"] = parse_dates(df["TXN_DATE"], RAW_DATE_FORMAT)
     if "POST_DATE" in df.columns:
-        df["POST_DATE"] = pd.to_datetime(df["POST_DATE"], format="%d-%b-%y", errors="coerce")
+        df["POST_DATE"] = parse_dates(df["POST_DATE"], RAW_DATE_FORMAT)
         
     df = df[df["TXN_DATE"].notna()].copy()
 
     # Filter year range (overwrite output = stable) 
     #df = df[(df["TXN_DATE"] >= DATE_START) & (df["TXN_DATE"] <= DATE_END)].copy()
 
-    # Time cols
-    df["year"] = df["TXN_DATE"].dt.year.astype("int16")
-    df["MONTH_NUM"] = df["TXN_DATE"].dt.month.astype("int8")
-    df["MONTH_NAME"] = df["TXN_DATE"].dt.strftime("%b").str.upper()
-    df["year_month"] = df["TXN_DATE"].dt.to_period("M").astype(str)
+    # Time cols: year, MONTH_NUM, MONTH_IDX, MONTH_NAME (stored, the app reads them as is)
+    df = add_date_cols(df)
 
     # TXN_AMOUNT numeric
     if "TXN_AMOUNT" in df.columns:
         df["TXN_AMOUNT"] = pd.to_numeric(df["TXN_AMOUNT"], errors="coerce").fillna(0)
 
-    # Clean TXN_DESC
+    # Clean TXN_DESC + lotto / crypto week LOYAL_CODE overrides (once per distinct description, see txn_desc.py)
     if "TXN_DESC" not in df.columns:
         df["TXN_DESC"] = ""
-    df["TXN_DESC"] = df["TXN_DESC"].fillna("").astype(str).str.strip()
-
-    df["TXN_DESC"] = (
-        df["TXN_DESC"]
-        .str.replace("Крипто Вик", "Crypto Week", regex=False)
-        .str.replace("Кривто Вик", "Crypto Week", regex=False)
-        .str.replace(".", "", regex=False)
-        .str.lower()
-    )
+    df["TXN_DESC"], df["LOYAL_CODE"] = normalize_txn_desc(df["TXN_DESC"], df["LOYAL_CODE"])
 
-    mask_crypto_week = df["TXN_DESC"].str.contains("crypto week", case=False, na=False)
-    df.loc[mask_crypto_week, "LOYAL_CODE"] = "ARD_LOTTO"
+    # Add CODE_GROUP (rules evaluated once per distinct LOYAL_CODE, see code_groups.py)
+    df["CODE_GROUP"] = assign_code_group(df["LOYAL_CODE"])
 
-    # 2) Lotto keywords BUT not crypto week → 10K_GET_LOTTO
-    mask_lotto = df["TXN_DESC"].str.contains(r"lotto|6/42|лотто", case=False, na=False)
-    mask_not_crypto_week = ~mask_crypto_week
+    return df
 
-    df.loc[mask_lotto & mask_not_crypto_week, "LOYAL_CODE"] = "10K_GET_LOTTO"
 
-    # Add CODE_GROUP
-    df["CODE_GROUP"] = df["LOYAL_CODE"].apply(map_code_group)
+def add_customer_ids(df: pd.DataFrame | pa.Table) -> pd.DataFrame | pa.Table:
+    """CUST_CODE -> dense int32 CUST_ID (dictionary kept next to the master, see master_store.py)."""
+    if isinstance(df, pa.Table):
+        return add_customer_ids_table(df, CODE_GROUPED_OUTPUT)
+    df["CUST_ID"] = assign_customer_ids(CODE_GROUPED_OUTPUT, df["CUST_CODE"])
+    return df.drop(columns=["CUST_CODE"])
 
-    return df
 
+def distinct_years(df: pd.DataFrame | pa.Table) -> list[int]:
+    return sorted(int(y) for y in df["year"].unique().tolist())
 
-def save_code_grouped(df: pd.DataFrame) -> None:
+
+@instrument
+def save_code_grouped(df: pd.DataFrame | pa.Table) -> None:
     ensure_dirs()
-    df.to_parquet(CODE_GROUPED_OUTPUT, index=False)
+    clear_master(CODE_GROUPED_OUTPUT)
+    df = add_customer_ids(df)
+    write_master(df, CODE_GROUPED_OUTPUT)
+    track_output(len(df), master_bytes(CODE_GROUPED_OUTPUT))
     print("✅ Saved CODE_GROUPED:", CODE_GROUPED_OUTPUT)
     print("Rows:", len(df))
-    print("Years:", sorted(df["year"].unique().tolist()))
+    print("Years:", distinct_years(df))
+
+
+@instrument
+def build_code_grouped_streaming(
+    batch_rows: int = STREAM_BATCH_ROWS, backend: str = DEFAULT_BACKEND, path: str | None = None
+) -> None:
+    """
+    Bounded-memory version of build_code_grouped_dataset + save_code_grouped.
+
+    Reads the raw parquet (`path`, else INPUT_PARQUET) in record batches of `batch_rows`, runs the
+    same cleaning / lotto + crypto-week relabelling / CODE_GROUP mapping per batch, and appends each
+    batch to the partitioned CODE_GROUPED_OUTPUT (one file per batch per month).
+    The full raw file is never in memory.
+    """
+    ensure_dirs()
+    path = path or INPUT_PARQUET
+    print("Streaming raw parquet:", path, f"(batch_rows={batch_rows:,})")
+
+    pf = pq.ParquetFile(path)
+    clear_master(CODE_GROUPED_OUTPUT)
+    schema = None  # first batch fixes the output schema; later batches are cast to it
+    total_rows = 0
+    years = set()
+
+    for i, batch in enumerate(pf.iter_batches(batch_size=batch_rows), start=1):
+        track_input(batch.num_rows, batch.nbytes)
+        raw = pa.Table.from_batches([batch]) if backend == "arrow" else batch.to_pandas()
+        df = add_customer_ids(build_code_grouped_dataset(raw))
+        schema = write_master(
+            df, CODE_GROUPED_OUTPUT, basename=f"part-{i}-{{i}}.parquet", replace=False, schema=schema
+        )
+
+        total_rows += len(df)
+        years.update(distinct_years(df))
+        print(f"[STREAM] batch {i}: {batch.num_rows:,} raw -> {len(df):,} rows")
+        del df, raw, batch
+
+    track_output(total_rows, master_bytes(CODE_GROUPED_OUTPUT))
+    print("✅ Saved CODE_GROUPED:", CODE_GROUPED_OUTPUT)
+    print("Rows:", total_rows)
+    print("Years:", sorted(years))
+
+
+def load_code_grouped(columns: list[str] | None = None, years: list[int] | None = None) -> pd.DataFrame:
+    """Read the master dataset back (only the needed columns / year partitions)."""
+    return read_master(CODE_GROUPED_OUTPUT, columns=columns, years=years)
 
 
 # =========================
 # 2) PRECOMPUTE FILES (PAGE OUTPUTS)
 # =========================
 
+@instrument
+def write_base_snapshot() -> None:
+    table = read_master_table(CODE_GROUPED_OUTPUT, columns=PRECOMPUTE_COLS)
+    track_input(table.num_rows, table.nbytes)
+    feather.write_feather(table, BASE_ARROW, compression="uncompressed")
+    track_output(table.num_rows, os.path.getsize(BASE_ARROW))
+    print("Saved base snapshot:", BASE_ARROW, f"({table.num_rows:,} rows)")
+
+
+def load_base(columns: list[str] | None = None, backend: str = DEFAULT_BACKEND) -> pd.DataFrame | pa.Table:
+    """
+    Memory-mapped read of the base snapshot; only `columns` are converted to pandas
+    (arrow backend: the memory-mapped table itself, never converted).
+    """
+    source = pa.memory_map(BASE_ARROW, "r")
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    track_input(table.num_rows, table.nbytes)
+    return table if backend == "arrow" else table.to_pandas()
+
+
+def group_agg(df: pd.DataFrame | pa.Table, keys: list[str], aggs: dict[str, tuple[str, str]]) -> pd.DataFrame:
+    """df.groupby(keys, observed=True).agg(**aggs).reset_index() for either backend (arrow: Acero, all cores)."""
+    if isinstance(df, pa.Table):
+        return table_group_agg(df, keys, aggs)
+    return df.groupby(keys, observed=True).agg(**aggs).reset_index()
+
+
 def load_lookup() -> dict:
     lookup_df = pd.read_csv(LOOKUP_CSV)
     lookup_df["TXN_DESC"] = lookup_df["TXN_DESC"].astype(str).str.capitalize()
     return dict(zip(lookup_df["LOYAL_CODE"], lookup_df["TXN_DESC"]))
 
 
-def pre_compute_user_and_monthly_data(df: pd.DataFrame):
-    df = df[["CUST_CODE", "TXN_DATE", "TXN_AMOUNT"]].copy()
+# ---------- USER x MONTH FACTS (shared by page1 / misc / page4 / page5) ----------
+POINT_BINS = [0, 50, 100, 200, 300, 400, 500, 600, 700, 800, 900, 1000, float("inf")]
+POINT_BUCKET_LABELS = [
+    "0-49", "50-99", "100-199", "200-299", "300-399",
+    "400-499", "500-599", "600-699", "700-799",
+    "800-899", "900-999", "1000+",
+]
 
-    user_level_stat_monthly = (
-        df.groupby(["CUST_CODE", pd.Grouper(key="TXN_DATE", freq="ME")], observed=True)
-        .agg(user_total_point=("TXN_AMOUNT", "sum"))
-        .reset_index()
-    )
-
-    user_level_stat_monthly["year_month"] = user_level_stat_monthly["TXN_DATE"].dt.to_period("M").astype(str)
-    user_level_stat_monthly["month_num"] = user_level_stat_monthly["TXN_DATE"].dt.month.astype("int8")
-
-    # bucket
-    point_bins = [0, 50, 100, 200, 300, 400, 500, 600, 700, 800, 900, 1000, float("inf")]
-    labels = [
-        "0-49", "50-99", "100-199", "200-299", "300-399",
-        "400-499", "500-599", "600-699", "700-799",
-        "800-899", "900-999", "1000+",
-    ]
 
-    user_level_stat_monthly["point_bucket"] = pd.cut(
-        user_level_stat_monthly["user_total_point"],
-        bins=point_bins,
-        labels=labels,
+def add_point_bucket(points: pd.Series) -> pd.Categorical:
+    return pd.cut(
+        points,
+        bins=POINT_BINS,
+        labels=POINT_BUCKET_LABELS,
         right=False,
         include_lowest=True,
     )
 
-    monthly_reward_stat = (
-        df.groupby(pd.Grouper(key="TXN_DATE", freq="ME"), observed=True)
-        .agg(
-            total_points=("TXN_AMOUNT", "sum"),
-            total_users=("CUST_CODE", "nunique"),
-        )
-        .reset_index()
+
+FACT_KEYS = ["year", "MONTH_NUM", "CUST_ID"]
+FACT_MEASURES = ["Total_Points", "Transaction_Count", "Unique_Loyal_Codes", "Active_Days"]
+
+
+def aggregate_user_months(df: pd.DataFrame | pa.Table) -> pd.DataFrame:
+    """
+    The only transaction-level pass: measures per (year, MONTH_NUM, CUST_ID).
+    Rows without a customer stay in as one NULL_CUST_ID row per month: their points count in the
+    monthly totals, the per-user outputs drop it (known_customers).
+    """
+    return group_agg(
+        df,
+        FACT_KEYS,
+        {
+            "Total_Points": ("TXN_AMOUNT", "sum"),
+            "Transaction_Count": ("TXN_AMOUNT", "size"),
+            "Unique_Loyal_Codes": ("LOYAL_CODE", "nunique"),
+            "Active_Days": ("TXN_DATE", "nunique"),
+        },
+    )
+
+
+def finalize_user_month_facts(facts: pd.DataFrame) -> pd.DataFrame:
+    """(Re)derive the cross-month flag + month key / labels. Cost: users x months."""
+    facts = facts[FACT_KEYS + FACT_MEASURES].copy()
+
+    # first month per user (over the whole history)
+    month_index = month_idx(facts["year"].astype("int32"), facts["MONTH_NUM"].astype("int32"))
+    first_month = month_index.groupby(facts["CUST_ID"], observed=True).transform("min")
+    facts["is_first_month"] = (month_index == first_month).astype("int8")
+
+    # month columns: computed on distinct months only, then joined back
+    months = facts[["year", "MONTH_NUM"]].drop_duplicates()
+    month_start = pd.to_datetime(
+        pd.DataFrame({"year": months["year"], "month": months["MONTH_NUM"], "day": 1})
     )
+    months["TXN_DATE"] = month_start + pd.offsets.MonthEnd(0)
+    months["MONTH_IDX"] = month_idx(months["year"].astype("int32"), months["MONTH_NUM"].astype("int32"))
+    months["MONTH_NAME"] = months["TXN_DATE"].dt.strftime("%b").str.upper()
+
+    return facts.merge(months, on=["year", "MONTH_NUM"], how="left")
+
+
+@instrument
+def build_user_month_facts(df: pd.DataFrame | pa.Table) -> pd.DataFrame:
+    """
+    ONE pass over the transactions -> one row per (year, MONTH_NUM, CUST_ID).
+
+    Every user-month output (page1, misc, page4, page5) is derived from this table,
+    so their cost scales with users x months instead of transactions.
+    """
+    return finalize_user_month_facts(aggregate_user_months(df))
+
+
+@instrument
+def pre_compute_user_and_monthly_data(facts: pd.DataFrame):
+    user_level_stat_monthly = known_customers(facts)[
+        ["CUST_ID", "TXN_DATE", "Total_Points", "MONTH_IDX", "MONTH_NUM", "is_first_month"]
+    ].rename(columns={"Total_Points": "user_total_point", "MONTH_NUM": "month_num"})
+
+    # bucket
+    user_level_stat_monthly["point_bucket"] = add_point_bucket(user_level_stat_monthly["user_total_point"])
 
     # passed 1000 counts per month
     user_level_stat_monthly["user_reached_1000"] = (user_level_stat_monthly["user_total_point"] >= 1000).astype("int8")
 
-    passed_1000 = (
-        user_level_stat_monthly.groupby("TXN_DATE", observed=True)["user_reached_1000"]
-        .sum()
-        .reset_index(name="num_user_passed_1000")
+    user_level_stat_monthly = user_level_stat_monthly[
+        ["CUST_ID", "TXN_DATE", "user_total_point", "MONTH_IDX", "month_num",
+         "point_bucket", "user_reached_1000", "is_first_month"]
+    ]
+
+    # points: every row of the month (incl. the NULL_CUST_ID row, as the sum over all transactions);
+    # users: one row per user-month -> size() == nunique(CUST_ID); a month with no known user has 0
+    monthly_users = user_level_stat_monthly.groupby("TXN_DATE", observed=True).agg(
+        total_users=("user_total_point", "size"),
+        num_user_passed_1000=("user_reached_1000", "sum"),
+        total_new_users=("is_first_month", "sum"),
+    )
+    monthly_reward_stat = (
+        facts.groupby("TXN_DATE", observed=True)
+        .agg(total_points=("Total_Points", "sum"))
+        .join(monthly_users)
+        .fillna(0)
+        .reset_index()
     )
 
-    monthly_reward_stat = monthly_reward_stat.merge(passed_1000, on="TXN_DATE", how="left")
-    monthly_reward_stat["num_user_passed_1000"] = monthly_reward_stat["num_user_passed_1000"].fillna(0).astype("int32")
+    monthly_reward_stat["total_users"] = monthly_reward_stat["total_users"].astype("int64")
+    monthly_reward_stat["num_user_passed_1000"] = monthly_reward_stat["num_user_passed_1000"].astype("int32")
     monthly_reward_stat["num_user_fail_1000"] = (monthly_reward_stat["total_users"] - monthly_reward_stat["num_user_passed_1000"]).astype("int32")
 
     monthly_reward_stat["percentage"] = (
         monthly_reward_stat["num_user_passed_1000"] / monthly_reward_stat["total_users"] * 100
     ).round(2)
 
-    # new users in their first month
-    first_month = user_level_stat_monthly.groupby("CUST_CODE", observed=True)["TXN_DATE"].transform("min")
-    user_level_stat_monthly["is_first_month"] = (user_level_stat_monthly["TXN_DATE"] == first_month).astype("int8")
-
-    new_users = (
-        user_level_stat_monthly.groupby("TXN_DATE", observed=True)["is_first_month"]
-        .sum()
-        .reset_index(name="total_new_users")
-    )
+    monthly_reward_stat["total_new_users"] = monthly_reward_stat["total_new_users"].astype("int32")
+    dates = monthly_reward_stat["TXN_DATE"].dt
+    monthly_reward_stat["MONTH_IDX"] = month_idx(dates.year, dates.month).astype("int32")
 
-    monthly_reward_stat = monthly_reward_stat.merge(new_users, on="TXN_DATE", how="left")
-    monthly_reward_stat["total_new_users"] = monthly_reward_stat["total_new_users"].fillna(0).astype("int32")
-    monthly_reward_stat["year_month"] = monthly_reward_stat["TXN_DATE"].dt.to_period("M").astype(str)
+    monthly_reward_stat = monthly_reward_stat[
+        ["TXN_DATE", "total_points", "total_users", "num_user_passed_1000",
+         "num_user_fail_1000", "percentage", "total_new_users", "MONTH_IDX"]
+    ]
 
     return user_level_stat_monthly, monthly_reward_stat
 
 
-def load_segment_counts_cutoff_fast(user_level_stat_monthly: pd.DataFrame, cutoffs: list[int]) -> pd.DataFrame:
-    out = []
-    user_level_stat_monthly_under_1000 = user_level_stat_monthly[user_level_stat_monthly["user_total_point"] < 1000]
-
-    for c in cutoffs:
-        tmp = (
-            user_level_stat_monthly_under_1000[user_level_stat_monthly_under_1000["user_total_point"] >= c]
-            .groupby("year_month", observed=True)
-            .size()
-            .reset_index(name="Counts")
-        )
-        tmp["cutoff"] = f"{c}+"
-        out.append(tmp)
-
-    segment_counts_all = pd.concat(out, ignore_index=True)
-
-    segment_counts_all["cutoff"] = pd.Categorical(
-        segment_counts_all["cutoff"],
-        categories=[f"{c}+" for c in cutoffs],
-        ordered=True,
-    )
-
-    return segment_counts_all
+@instrument
+def build_point_histogram(user_level_stat_monthly: pd.DataFrame) -> pd.DataFrame:
+    """
+    Users per month x 10-point bin below 1000 (point_hist.py). The app turns it
+    into "c <= points < 1000" counts for any cutoff with a reverse cumsum.
+    """
+    return point_histogram(user_level_stat_monthly)
 
 
 # ---------- PAGE 2 ----------
-def get_grouped_reward(df: pd.DataFrame) -> pd.DataFrame:
-    return (
-        df.groupby(["CODE_GROUP", "year_month"], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index(name="TOTAL_AMOUNT")
-        .sort_values("year_month")
+@instrument
+def get_grouped_reward(df: pd.DataFrame | pa.Table) -> pd.DataFrame:
+    return group_agg(
+        df, ["CODE_GROUP", "MONTH_IDX"], {"TOTAL_AMOUNT": ("TXN_AMOUNT", "sum")}
+    ).sort_values("MONTH_IDX", kind="stable")
+
+
+@instrument
+def build_transaction_summary_no_pad(df: pd.DataFrame | pa.Table, lookup: dict) -> pd.DataFrame:
+    keys = ["LOYAL_CODE", "MONTH_IDX", "CODE_GROUP"]
+    ts = group_agg(
+        df,
+        keys,
+        {
+            "Transaction_Freq": ("TXN_AMOUNT", "size"),
+            "Total_Users": ("CUST_ID", "nunique"),
+            "Total_Amount": ("TXN_AMOUNT", "sum"),
+        },
     )
 
-
-def build_transaction_summary_no_pad(df: pd.DataFrame, lookup: dict) -> pd.DataFrame:
-    ts = (
-        df.groupby(["LOYAL_CODE", "year_month", "CODE_GROUP"], observed=True)
-        .agg(
-            Transaction_Freq=("TXN_AMOUNT", "size"),
-            Total_Users=("CUST_CODE", "nunique"),
-            Total_Amount=("TXN_AMOUNT", "sum"),
-        )
-        .reset_index()
-        .rename(columns={"CODE_GROUP": "GROUP"})
-    )
+    # NULL_CUST_ID is not a user: one less in the groups that have rows without a customer
+    nulls = null_customer_mask(df)
+    if nulls.any():
+        if isinstance(df, pa.Table):
+            hit = df.filter(pa.array(nulls)).select(keys).to_pandas()
+        else:
+            hit = df.loc[nulls, keys]
+        hit = pd.MultiIndex.from_frame(ts[keys]).isin(pd.MultiIndex.from_frame(hit.drop_duplicates()))
+        ts["Total_Users"] = ts["Total_Users"] - hit.astype(ts["Total_Users"].dtype)
+
+    ts = ts.rename(columns={"CODE_GROUP": "GROUP"})
     ts["DESC"] = ts["LOYAL_CODE"].map(lookup).fillna(ts["LOYAL_CODE"])
-    ts["year"] = ts["year_month"].astype(str).str[:4].astype(int)
+    ts["year"] = month_year(ts["MONTH_IDX"]).astype(int)
     return ts
 
 
-def build_transaction_summary_with_pad(df: pd.DataFrame, lookup: dict) -> pd.DataFrame:
-    EPS = 1e-6
-
-    ts = (
-        df.groupby(["LOYAL_CODE", "year_month", "CODE_GROUP"], observed=True)
-        .agg(
-            Transaction_Freq=("TXN_AMOUNT", "size"),
-            Total_Users=("CUST_CODE", "nunique"),
-            Total_Amount=("TXN_AMOUNT", "sum"),
-        )
+@instrument
+def build_codegroup_loyalcode_map(ts: pd.DataFrame) -> pd.DataFrame:
+    """From the (unpadded) transaction summary - it already holds every LOYAL_CODE x GROUP pair."""
+    return (
+        ts.groupby("GROUP", observed=True)["LOYAL_CODE"]
+        .unique()
         .reset_index()
-        .rename(columns={"CODE_GROUP": "GROUP"})
+        .rename(columns={"GROUP": "CODE_GROUP", "LOYAL_CODE": "LOYAL_CODES"})
     )
 
-    ts["DESC"] = ts["LOYAL_CODE"].map(lookup).fillna(ts["LOYAL_CODE"])
 
-    all_months = ts["year_month"].unique()
-    all_groups = ts["GROUP"].unique()
+@instrument
+def build_movers_monthly(df: pd.DataFrame | pa.Table) -> pd.DataFrame:
+    # "None" codes dropped after the aggregate (same groups, one pass less over the rows)
+    movers = group_agg(df, ["year", "LOYAL_CODE", "MONTH_NUM"], {"TXN_AMOUNT": ("TXN_AMOUNT", "sum")})
+    return movers[movers["LOYAL_CODE"] != "None"].reset_index(drop=True)
+
+
+@instrument
+def build_user_sketches(df: pd.DataFrame | pa.Table) -> pd.DataFrame:
+    """
+    Distinct-user HLL sketch (hll.py) per LOYAL_CODE x month. The app merges
+    them for any union of codes / months instead of a nunique over transactions.
+    """
+    if isinstance(df, pa.Table):
+        return table_user_sketches(df)
+    g = df.groupby(["MONTH_IDX", "LOYAL_CODE"], observed=True, sort=True)
+    out = g.agg(
+        year=("year", "first"),
+        MONTH_NUM=("MONTH_NUM", "first"),
+        CODE_GROUP=("CODE_GROUP", "first"),
+    ).reset_index()
+
+    keep = ~null_customer_mask(df)  # NULL_CUST_ID is not a user
+    regs = build_sketches(g.ngroup().to_numpy()[keep], len(out), df["CUST_ID"].to_numpy()[keep])
+    out["SKETCH"] = to_bytes(regs)
+    return out
 
-    pad = (
-        pd.MultiIndex.from_product([all_months, all_groups], names=["year_month", "GROUP"])
-        .to_frame(index=False)
-    )
 
-    out = (
-        pad.merge(ts, on=["year_month", "GROUP"], how="left")
-        .fillna(
-            {
-                "Transaction_Freq": EPS,
-                "Total_Users": EPS,
-                "Total_Amount": EPS,
-                "LOYAL_CODE": "__PAD__",
-                "DESC": "—",
-            }
-        )
-        .sort_values("year_month")
-    )
+@instrument
+def save_outputs(outputs: dict[str, pd.DataFrame]) -> None:
+    print("Saved:")
+    for path, out in outputs.items():
+        track_output(len(out), write_output(out, path))
+        print("-", path)
 
-    out["year"] = out["year_month"].astype(str).str[:4].astype(int)
-    return out
 
+def compute_page_1(facts: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    user_level_stat_monthly, monthly_reward_stat = pre_compute_user_and_monthly_data(facts)
 
-def build_codegroup_loyalcode_map(df: pd.DataFrame) -> pd.DataFrame:
-    return (
-        df.groupby("CODE_GROUP", observed=True)["LOYAL_CODE"]
-        .unique()
-        .reset_index()
-        .rename(columns={"LOYAL_CODE": "LOYAL_CODES"})
-    )
+    return {
+        OUT_USER_MONTHLY: user_level_stat_monthly,
+        OUT_MONTHLY_SUMMARY: monthly_reward_stat,
+        OUT_POINT_HIST: build_point_histogram(user_level_stat_monthly),
+    }
 
 
-def build_movers_monthly(df: pd.DataFrame) -> pd.DataFrame:
-    base = df[df["LOYAL_CODE"].notna() & (df["LOYAL_CODE"] != "None")].copy()
-    return (
-        base.groupby(["year", "LOYAL_CODE", "MONTH_NUM"], as_index=False, observed=True)["TXN_AMOUNT"]
-        .sum()
-        .sort_values(["year", "LOYAL_CODE", "MONTH_NUM"])
-    )
+def make_precompute_page_1(facts: pd.DataFrame) -> None:
+    print("\n PAGE1: precomputing user monthly + monthly summary + point histogram...")
+    save_outputs(compute_page_1(facts))
 
 
-def make_precompute_page_1(df: pd.DataFrame) -> None:
-    print("\n PAGE1: precomputing user monthly + monthly summary + cutoff counts...")
-    cutoffs = [400, 500, 600, 700, 800, 900]
+PAGE2_COLS = [
+    "TXN_AMOUNT",
+    "CUST_ID",
+    "LOYAL_CODE",
+    "CODE_GROUP",
+    "MONTH_IDX",
+    "year",
+    "MONTH_NUM",
+]
 
-    user_level_stat_monthly, monthly_reward_stat = pre_compute_user_and_monthly_data(df)
-    segment_counts_all = load_segment_counts_cutoff_fast(user_level_stat_monthly, cutoffs)
 
-    user_level_stat_monthly.to_parquet(OUT_USER_MONTHLY, index=False)
-    monthly_reward_stat.to_parquet(OUT_MONTHLY_SUMMARY, index=False)
-    segment_counts_all.to_parquet(OUT_POINT_CUTOFF, index=False)
+def compute_page_2_rewards(df: pd.DataFrame | pa.Table) -> dict[str, pd.DataFrame]:
+    """Page 2 outputs without DESC labels (lookup changes do not touch them)."""
+    return {
+        OUT_GROUPED_REWARD: get_grouped_reward(df),
+        OUT_MOVERS_BASE: build_movers_monthly(df),
+        OUT_USER_SKETCHES: build_user_sketches(df),
+    }
 
-    print("Saved:")
-    print("-", OUT_USER_MONTHLY)
-    print("-", OUT_MONTHLY_SUMMARY)
-    print("-", OUT_POINT_CUTOFF)
 
+def compute_page_2_summary(df: pd.DataFrame | pa.Table, loyal_code_to_desc: dict) -> dict[str, pd.DataFrame]:
+    """
+    Page 2 outputs that carry DESC labels. The month x GROUP padding for the
+    plotly animation is derived from the unpadded summary in the app (data_loader).
+    """
+    ts_no_pad = build_transaction_summary_no_pad(df, loyal_code_to_desc)
+    codegroup_map = build_codegroup_loyalcode_map(ts_no_pad)
 
-def make_precompute_page_2(df: pd.DataFrame, loyal_code_to_desc: dict) -> None:
-    print("\nPAGE2: precomputing grouped_reward / transaction_summary / codegroup_map / movers...")
-    keep_cols = [
-        "TXN_AMOUNT",
-        "CUST_CODE",
-        "LOYAL_CODE",
-        "CODE_GROUP",
-        "year_month",
-        "year",
-        "MONTH_NUM",
-    ]
-    keep_cols = [c for c in keep_cols if c in df.columns]
+    return {
+        OUT_TS_NO_PAD: ts_no_pad,
+        OUT_CODEGROUP_MAP: codegroup_map,
+    }
+
+
+def compute_page_2(df: pd.DataFrame, loyal_code_to_desc: dict) -> dict[str, pd.DataFrame]:
+    keep_cols = [c for c in PAGE2_COLS if c in df.columns]
     base = df[keep_cols].copy()
 
-    grouped_reward = get_grouped_reward(base)
-    ts_no_pad = build_transaction_summary_no_pad(base, loyal_code_to_desc)
-    ts_pad = build_transaction_summary_with_pad(base, loyal_code_to_desc)
-    codegroup_map = build_codegroup_loyalcode_map(base)
-    movers_monthly = build_movers_monthly(base)
+    out = compute_page_2_rewards(base)
+    out.update(compute_page_2_summary(base, loyal_code_to_desc))
+    return out
 
-    grouped_reward.to_parquet(OUT_GROUPED_REWARD, index=False)
-    ts_no_pad.to_parquet(OUT_TS_NO_PAD, index=False)
-    ts_pad.to_parquet(OUT_TS_PAD, index=False)
-    codegroup_map.to_parquet(OUT_CODEGROUP_MAP, index=False)
-    movers_monthly.to_parquet(OUT_MOVERS_BASE, index=False)
 
-    print("Saved:")
-    print("-", OUT_GROUPED_REWARD)
-    print("-", OUT_TS_NO_PAD)
-    print("-", OUT_TS_PAD)
-    print("-", OUT_CODEGROUP_MAP)
-    print("-", OUT_MOVERS_BASE)
+def make_precompute_page_2(df: pd.DataFrame, loyal_code_to_desc: dict) -> None:
+    print("\nPAGE2: precomputing grouped_reward / transaction_summary / codegroup_map / movers...")
+    save_outputs(compute_page_2(df, loyal_code_to_desc))
 
 
 # ---------- PAGE MISC ----------
-def build_monthly_bucket_counts(df: pd.DataFrame) -> pd.DataFrame:
-    user_monthly = (
-        df.groupby(["year", "CUST_CODE", "year_month"], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index(name="user_total_point")
+@instrument
+def build_monthly_bucket_counts(facts: pd.DataFrame) -> pd.DataFrame:
+    user_monthly = known_customers(facts)[["year", "CUST_ID", "MONTH_IDX", "Total_Points"]].rename(
+        columns={"Total_Points": "user_total_point"}
     )
 
-    point_bins = [0, 50, 100, 200, 300, 400, 500, 600, 700, 800, 900, 1000, float("inf")]
-    labels = [
-        "0-49", "50-99", "100-199", "200-299", "300-399",
-        "400-499", "500-599", "600-699", "700-799",
-        "800-899", "900-999", "1000+",
-    ]
-
-    user_monthly["point_bucket"] = pd.cut(
-        user_monthly["user_total_point"],
-        bins=point_bins,
-        labels=labels,
-        right=False,
-        include_lowest=True,
-    )
+    user_monthly["point_bucket"] = add_point_bucket(user_monthly["user_total_point"])
 
     counts = (
-        user_monthly.groupby(["year", "year_month", "point_bucket"], observed=True)
+        user_monthly.groupby(["year", "MONTH_IDX", "point_bucket"], observed=True)
         .size()
         .reset_index(name="Counts")
     )
 
     counts["Percent"] = (
         counts["Counts"]
-        / counts.groupby(["year", "year_month"], observed=True)["Counts"].transform("sum")
+        / counts.groupby(["year", "MONTH_IDX"], observed=True)["Counts"].transform("sum")
         * 100
     ).round(2)
 
     return counts
 
 
-def build_loyal_avg_by_year(df: pd.DataFrame, lookup: dict) -> pd.DataFrame:
-    ts = (
-        df.groupby(["year", "LOYAL_CODE"], observed=True)
-        .agg(
-            TXN_AMOUNT=("TXN_AMOUNT", "sum"),
-            JRNO=("TXN_AMOUNT", "size"),
-        )
-        .reset_index()
+@instrument
+def build_loyal_avg_by_year(df: pd.DataFrame | pa.Table, lookup: dict) -> pd.DataFrame:
+    ts = group_agg(
+        df,
+        ["year", "LOYAL_CODE"],
+        {
+            "TXN_AMOUNT": ("TXN_AMOUNT", "sum"),
+            "JRNO": ("TXN_AMOUNT", "size"),
+        },
     )
     ts["AVG"] = (ts["TXN_AMOUNT"] / ts["JRNO"]).round(2)
     ts["PERCENTAGE"] = (
@@ -552,24 +645,19 @@ def build_loyal_avg_by_year(df: pd.DataFrame, lookup: dict) -> pd.DataFrame:
     return ts
 
 
-def build_reach_frequency(df: pd.DataFrame) -> pd.DataFrame:
-    user_monthly = (
-        df.groupby(["year", "CUST_CODE", df["TXN_DATE"].dt.to_period("M")], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index(name="Total_Points")
-    )
-
-    user_monthly["Reached_1000_Flag"] = (user_monthly["Total_Points"] >= 1000).astype("int8")
-    reached = user_monthly[user_monthly["Reached_1000_Flag"] == 1]
+@instrument
+def build_reach_frequency(facts: pd.DataFrame) -> pd.DataFrame:
+    facts = known_customers(facts)
+    reached = facts[facts["Total_Points"] >= 1000]
 
     counts = (
-        reached.groupby(["year", "CUST_CODE"], observed=True)
+        reached.groupby(["year", "CUST_ID"], observed=True)
         .size()
         .reset_index(name="Times_Reached_1000")
     )
 
     reach_frequency = (
-        counts.groupby(["year", "Times_Reached_1000"], observed=True)["CUST_CODE"]
+        counts.groupby(["year", "Times_Reached_1000"], observed=True)["CUST_ID"]
         .size()
         .reset_index(name="Number_of_Users")
     )
@@ -578,211 +666,134 @@ def build_reach_frequency(df: pd.DataFrame) -> pd.DataFrame:
     return reach_frequency
 
 
-def make_precompute_misc(df: pd.DataFrame, loyal_code_to_desc: dict) -> None:
-    print("\nMISC: precomputing bucket counts / loyal avg / reach frequency...")
+def compute_misc_facts(facts: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    return {
+        OUT_COUNTS: build_monthly_bucket_counts(facts),
+        OUT_REACH_FREQ: build_reach_frequency(facts),
+    }
 
-    counts = build_monthly_bucket_counts(df)
-    loyal_avg = build_loyal_avg_by_year(df, loyal_code_to_desc)
-    reach_freq = build_reach_frequency(df)
 
-    counts.to_parquet(OUT_COUNTS, index=False)
-    loyal_avg.to_parquet(OUT_LOYAL_AVG, index=False)
-    reach_freq.to_parquet(OUT_REACH_FREQ, index=False)
+def compute_misc(df: pd.DataFrame, facts: pd.DataFrame, loyal_code_to_desc: dict) -> dict[str, pd.DataFrame]:
+    out = compute_misc_facts(facts)
+    out[OUT_LOYAL_AVG] = build_loyal_avg_by_year(df, loyal_code_to_desc)
+    return {path: out[path] for path in (OUT_COUNTS, OUT_LOYAL_AVG, OUT_REACH_FREQ)}
 
-    print("Saved:")
-    print("-", OUT_COUNTS)
-    print("-", OUT_LOYAL_AVG)
-    print("-", OUT_REACH_FREQ)
 
-def make_precompute_page_4_all_years(df: pd.DataFrame, loyal_code_to_desc: dict) -> None:
-    os.makedirs(OUT_DIR_PAGE_4, exist_ok=True)
+def make_precompute_misc(df: pd.DataFrame, facts: pd.DataFrame, loyal_code_to_desc: dict) -> None:
+    print("\nMISC: precomputing bucket counts / loyal avg / reach frequency...")
+    save_outputs(compute_misc(df, facts, loyal_code_to_desc))
+
+
+@instrument
+def compute_page_4_segments(facts: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Users / thresholds / segment counts of every year at once - from the facts table only (segments.py)."""
+    # 1) users monthly agg (from the shared facts table, ordered by year)
+    facts = known_customers(facts)
+    users_agg_df = facts.loc[
+        facts["year"].sort_values(kind="stable").index,
+        ["CUST_ID", "MONTH_IDX", "Total_Points", "Transaction_Count", "Unique_Loyal_Codes", "Active_Days", "year"],
+    ].reset_index(drop=True)
+    users_agg_df = add_flags(users_agg_df)
+
+    # 2) thresholds: one grouped quantile over all years
+    thresholds = segment_thresholds(users_agg_df, by=["year"])
+    thresholds[["achievers_txn_q25", "achievers_points_q25"]] = thresholds[
+        ["achievers_txn_q25", "achievers_points_q25"]
+    ].fillna(0.0)
+
+    # 3) segmentation (categorical, English labels)
+    users_agg_df["User_Segment"] = assign_segments(users_agg_df, thresholds, by=["year"])
+    users_agg_df = users_agg_df[[c for c in users_agg_df.columns if c != "year"] + ["year"]]
+
+    # 4) user segment monthly counts
+    user_segment_monthly_df = (
+        users_agg_df.groupby(["year", "MONTH_IDX", "User_Segment"], observed=True)
+        .size()
+        .reset_index(name="count")
+    )
 
-    years = sorted(df["year"].unique().tolist())  # use year (consistent)
-
-    all_users = []
-    all_seg_monthly = []
-    all_loyal_summary = []
-    all_thresholds = []
-
-    for y in years:
-        df_year = df[df["year"] == y].copy()
-
-        # 1) users monthly agg for this year
-        users_agg_df = (
-            df_year.groupby(["CUST_CODE", "year_month"], observed=True)
-            .agg(
-                Total_Points=("TXN_AMOUNT", "sum"),
-                Transaction_Count=("TXN_AMOUNT", "size"),
-                Unique_Loyal_Codes=("LOYAL_CODE", "nunique"),
-                Active_Days=("TXN_DATE", "nunique"),
-            )
-            .reset_index()
-        )
+    return {
+        OUT_PAGE4_USERS: users_agg_df,
+        OUT_PAGE4_THRESH: thresholds,
+        OUT_PAGE4_SEG_MONTH: user_segment_monthly_df,
+    }
 
-        users_agg_df["Reached_1000_Flag"] = (users_agg_df["Total_Points"] >= 1000).astype("int8")
-        users_agg_df["Inactive"] = (users_agg_df["Transaction_Count"] <= 1).astype("int8")
-
-        # 2) thresholds
-        reached = users_agg_df[users_agg_df["Reached_1000_Flag"] == 1]
-        under = users_agg_df[(users_agg_df["Reached_1000_Flag"] == 0) & (users_agg_df["Inactive"] == 0)]
-
-        thresholds = {
-            "year": y,
-            "txn_q25": float(under["Transaction_Count"].quantile(0.25)),
-            "txn_q75": float(under["Transaction_Count"].quantile(0.75)),
-            "days_q25": float(under["Active_Days"].quantile(0.25)),
-            "days_q75": float(under["Active_Days"].quantile(0.75)),
-            "points_q25": float(under["Total_Points"].quantile(0.25)),
-            "points_q75": float(under["Total_Points"].quantile(0.75)),
-            "achievers_txn_q25": float(reached["Transaction_Count"].quantile(0.25)) if len(reached) else 0.0,
-            "achievers_points_q25": float(reached["Total_Points"].quantile(0.25)) if len(reached) else 0.0,
-        }
 
-        all_thresholds.append(thresholds)
-
-        # 3) segmentation
-        txn_q75 = thresholds["txn_q75"]
-        days_q75 = thresholds["days_q75"]
-        achievers_txn_q25 = thresholds["achievers_txn_q25"]
-
-        users_agg_df["User_Segment"] = "Irregular_Participant"
-        users_agg_df.loc[
-            (users_agg_df["Transaction_Count"] >= txn_q75) & (users_agg_df["Active_Days"] > days_q75),
-            "User_Segment"
-        ] = "Consistent"
-
-        users_agg_df.loc[
-            (users_agg_df["Transaction_Count"] < txn_q75) & (users_agg_df["Active_Days"] <= days_q75),
-            "User_Segment"
-        ] = "Explorer"
-
-        users_agg_df.loc[
-            users_agg_df["Transaction_Count"] >= achievers_txn_q25,
-            "User_Segment"
-        ] = "High_Effort"
-
-        users_agg_df.loc[
-            users_agg_df["Reached_1000_Flag"] == 1,
-            "User_Segment"
-        ] = "Achiever"
-
-        users_agg_df.loc[
-            users_agg_df["Inactive"] == 1,
-            "User_Segment"
-        ] = "Inactive"
-
-        users_agg_df["year"] = y
-
-        # 4) user segment monthly counts
-        user_segment_monthly_df = (
-            users_agg_df.groupby(["year", "year_month", "User_Segment"], observed=True)
-            .size()
-            .reset_index(name="count")
-        )
+@instrument
+def build_segment_loyal_summary(
+    df: pd.DataFrame | pa.Table, users: pd.DataFrame, loyal_code_to_desc: dict
+) -> pd.DataFrame:
+    """LOYAL_CODE points per User_Segment and year (+ DESC labels); `users` = page 4 users_agg_df."""
+    segment_map = users[["year", "CUST_ID", "MONTH_IDX", "User_Segment"]]
 
-        # 5) segment-loyal summary
-        segment_map = users_agg_df[["CUST_CODE", "year_month", "User_Segment"]].copy()
+    loyal_code_agg = group_agg(
+        df, ["year", "CUST_ID", "LOYAL_CODE", "MONTH_IDX"], {"TXN_AMOUNT": ("TXN_AMOUNT", "sum")}
+    )
 
-        loyal_code_agg = (
-            df_year.groupby(["CUST_CODE", "LOYAL_CODE", "year_month"], observed=True)["TXN_AMOUNT"]
-            .sum()
-            .reset_index()
-        )
+    loyal_with_segments = loyal_code_agg.merge(
+        segment_map,
+        on=["year", "CUST_ID", "MONTH_IDX"],
+        how="inner",
+    )
 
-        loyal_with_segments = loyal_code_agg.merge(
-            segment_map,
-            on=["CUST_CODE", "year_month"],
-            how="inner",
-        )
+    segment_loyal_summary = (
+        loyal_with_segments.groupby(["year", "User_Segment", "LOYAL_CODE"], observed=True)["TXN_AMOUNT"]
+        .sum()
+        .reset_index()
+    )
 
-        segment_loyal_summary = (
-            loyal_with_segments.groupby(["User_Segment", "LOYAL_CODE"], observed=True)["TXN_AMOUNT"]
-            .sum()
-            .reset_index()
-        )
+    segment_loyal_summary["DESC"] = segment_loyal_summary["LOYAL_CODE"].map(loyal_code_to_desc)
+    return (
+        segment_loyal_summary.sort_values(["year", "User_Segment", "TXN_AMOUNT"], ascending=[True, True, False])
+        [["User_Segment", "LOYAL_CODE", "TXN_AMOUNT", "DESC", "year"]]
+        .reset_index(drop=True)
+    )
 
-        segment_loyal_summary["DESC"] = segment_loyal_summary["LOYAL_CODE"].map(loyal_code_to_desc)
-        segment_loyal_summary["year"] = y
-        segment_loyal_summary = segment_loyal_summary.sort_values(
-            ["User_Segment", "TXN_AMOUNT"], ascending=[True, False]
-        )
 
-        all_users.append(users_agg_df)
-        all_seg_monthly.append(user_segment_monthly_df)
-        all_loyal_summary.append(segment_loyal_summary)
+def compute_page_4_all_years(df: pd.DataFrame, facts: pd.DataFrame, loyal_code_to_desc: dict) -> dict[str, pd.DataFrame]:
+    out = compute_page_4_segments(facts)
+    out[OUT_PAGE4_SEG_LOYAL] = build_segment_loyal_summary(df, out[OUT_PAGE4_USERS], loyal_code_to_desc)
+    return out
+
 
-    # concat all years
-    users_all_years = pd.concat(all_users, ignore_index=True)
-    seg_monthly_all_years = pd.concat(all_seg_monthly, ignore_index=True)
-    loyal_summary_all_years = pd.concat(all_loyal_summary, ignore_index=True)
-    thresholds_all_years = pd.DataFrame(all_thresholds)
+def make_precompute_page_4_all_years(df: pd.DataFrame, facts: pd.DataFrame, loyal_code_to_desc: dict) -> None:
+    os.makedirs(OUT_DIR_PAGE_4, exist_ok=True)
 
-    # export
-    users_all_years.to_parquet(OUT_PAGE4_USERS, index=False)
-    thresholds_all_years.to_parquet(OUT_PAGE4_THRESH, index=False)
-    seg_monthly_all_years.to_parquet(OUT_PAGE4_SEG_MONTH, index=False)
-    loyal_summary_all_years.to_parquet(OUT_PAGE4_SEG_LOYAL, index=False)
+    outputs = compute_page_4_all_years(df, facts, loyal_code_to_desc)
 
     print("\n PAGE4 DONE")
-    print("-", OUT_PAGE4_USERS)
-    print("-", OUT_PAGE4_THRESH)
-    print("-", OUT_PAGE4_SEG_MONTH)
-    print("-", OUT_PAGE4_SEG_LOYAL)
+    save_outputs(outputs)
 
 
 # ---------- PAGE 5 ----------
-def page5_users_agg_by_monthnum(df_all: pd.DataFrame) -> pd.DataFrame:
-    out = (
-        df_all.groupby(["year", "CUST_CODE", "MONTH_NUM", "MONTH_NAME"], observed=True)
-        .agg(
-            Total_Points=("TXN_AMOUNT", "sum"),
-            Transaction_Count=("TXN_AMOUNT", "size"),
-            Unique_Loyal_Codes=("LOYAL_CODE", "nunique"),
-            Active_Days=("TXN_DATE", "nunique"),
-        )
-        .reset_index()
-    )
-
-    out["Reached_1000_Flag"] = (out["Total_Points"] >= 1000).astype("int8")
-    out["Inactive"] = (out["Transaction_Count"] <= 1).astype("int8")
-    return out
+@instrument
+def page5_users_agg_by_monthnum(facts: pd.DataFrame) -> pd.DataFrame:
+    out = known_customers(facts)[
+        ["year", "CUST_ID", "MONTH_NUM", "MONTH_NAME",
+         "Total_Points", "Transaction_Count", "Unique_Loyal_Codes", "Active_Days"]
+    ].copy()
+    return add_flags(out)
 
 
+@instrument
 def page5_thresholds_by_year(users_agg_all_years: pd.DataFrame) -> pd.DataFrame:
-    out = []
-
-    for y in sorted(users_agg_all_years["year"].unique()):
-        dfy = users_agg_all_years[users_agg_all_years["year"] == y].copy()
-
-        reached = dfy[dfy["Reached_1000_Flag"] == 1]
-        under = dfy[(dfy["Reached_1000_Flag"] == 0) & (dfy["Inactive"] == 0)]
-
-        thresholds = {
-            "year": y,
-            "txn_q25": float(under["Transaction_Count"].quantile(0.25)),
-            "txn_q75": float(under["Transaction_Count"].quantile(0.75)),
-            "days_q25": float(under["Active_Days"].quantile(0.25)),
-            "days_q75": float(under["Active_Days"].quantile(0.75)),
-            "points_q25": float(under["Total_Points"].quantile(0.25)),
-            "points_q75": float(under["Total_Points"].quantile(0.75)),
-            "achievers_txn_q25": float(reached["Transaction_Count"].quantile(0.25)) if len(reached) else 0.0,
-        }
-        out.append(thresholds)
-
-    return pd.DataFrame(out)
+    thresholds = segment_thresholds(users_agg_all_years, by=["year"]).drop(columns=["achievers_points_q25"])
+    thresholds["achievers_txn_q25"] = thresholds["achievers_txn_q25"].fillna(0.0)
+    return thresholds
 
 
+@instrument
 def page5_reach_frequency(users_agg_all_years: pd.DataFrame) -> pd.DataFrame:
     reached = users_agg_all_years[users_agg_all_years["Reached_1000_Flag"] == 1]
 
     user_counts = (
-        reached.groupby(["year", "CUST_CODE"], observed=True)
+        reached.groupby(["year", "CUST_ID"], observed=True)
         .size()
         .reset_index(name="Times_Reached_1000")
     )
 
     reach_frequency = (
-        user_counts.groupby(["year", "Times_Reached_1000"], observed=True)["CUST_CODE"]
+        user_counts.groupby(["year", "Times_Reached_1000"], observed=True)["CUST_ID"]
         .size()
         .reset_index(name="Number_of_Users")
         .sort_values(["year", "Times_Reached_1000"])
@@ -792,80 +803,404 @@ def page5_reach_frequency(users_agg_all_years: pd.DataFrame) -> pd.DataFrame:
     return reach_frequency
 
 
-def page5_monthly_customer_points(df_all: pd.DataFrame) -> pd.DataFrame:
-    return (
-        df_all.groupby(["year", "MONTH_NUM", "MONTH_NAME", "CUST_CODE"], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index(name="Total_Points")
-    )
+@instrument
+def page5_monthly_customer_points(facts: pd.DataFrame) -> pd.DataFrame:
+    return known_customers(facts)[["year", "MONTH_NUM", "MONTH_NAME", "CUST_ID", "Total_Points"]].copy()
 
 
-def page5_user_month_profile_achievers(df_all: pd.DataFrame, users_agg_all_years: pd.DataFrame) -> pd.DataFrame:
-    achiever_months = users_agg_all_years.loc[
-        users_agg_all_years["Reached_1000_Flag"] == 1,
-        ["year", "CUST_CODE", "MONTH_NUM"]
-    ].copy()
+@instrument
+def page5_user_month_profile_achievers(df_all: pd.DataFrame | pa.Table, users_agg_all_years: pd.DataFrame) -> pd.DataFrame:
+    """Achiever user-months only: semi-join on a sorted key index, no merges (segments.py; arrow: hash semi join)."""
+    if isinstance(df_all, pa.Table):
+        return table_achiever_profile(df_all, users_agg_all_years)
+    return achiever_month_profile(df_all, users_agg_all_years)
 
-    df_ach = df_all.merge(achiever_months, on=["year", "CUST_CODE", "MONTH_NUM"], how="inner")
 
-    monthly_totals = (
-        df_ach.groupby(["year", "CUST_CODE", "MONTH_NUM"], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index(name="True_Monthly_Total")
-    )
+def compute_page_5(df_all: pd.DataFrame | pa.Table, facts: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    users_agg_all = page5_users_agg_by_monthnum(facts)
+    thresholds_all = page5_thresholds_by_year(users_agg_all)
+    reach_freq_all = page5_reach_frequency(users_agg_all)
+    monthly_points_all = page5_monthly_customer_points(facts)
 
-    loyal_code_agg = (
-        df_ach.groupby(["year", "CUST_CODE", "MONTH_NUM", "LOYAL_CODE"], observed=True)["TXN_AMOUNT"]
-        .sum()
-        .reset_index()
-    )
+    print("PAGE5 heavy step: user_month_profile_achievers ...")
+    user_month_profile = page5_user_month_profile_achievers(df_all, users_agg_all)
 
-    final_df = loyal_code_agg.merge(monthly_totals, on=["year", "CUST_CODE", "MONTH_NUM"], how="left")
+    return {
+        OUT_PAGE5_USERS_AGG: users_agg_all,
+        OUT_PAGE5_THRESHOLDS: thresholds_all,
+        OUT_PAGE5_REACH_FREQ: reach_freq_all,
+        OUT_PAGE5_MONTHLY_POINTS: monthly_points_all,
+        OUT_PAGE5_USER_MONTH_PROFILE: user_month_profile,
+    }
 
-    final_df = final_df[final_df["LOYAL_CODE"].notna()]
-    final_df = final_df[final_df["LOYAL_CODE"] != "10K_PURCH_INSUR"]
 
-    final_df["Normalized_Points"] = (final_df["TXN_AMOUNT"] / final_df["True_Monthly_Total"]) * 1000
+def make_precompute_page_5(df_all: pd.DataFrame | pa.Table, facts: pd.DataFrame) -> None:
+    print("\nPAGE5: computing users agg + thresholds + reach freq + heavy achiever profile...")
+    save_outputs(compute_page_5(df_all, facts))
 
-    user_month_profile = (
-        final_df.groupby(["year", "CUST_CODE", "MONTH_NUM", "LOYAL_CODE"], observed=True)["Normalized_Points"]
-        .sum()
-        .reset_index()
-    )
 
-    return user_month_profile
+# =========================
+# 3) IPC STORE (memory-mapped by the app)
+# =========================
 
+def app_output_paths() -> list[str]:
+    """Parquet outputs the app reads (everything but the pipeline-only _state/)."""
+    return [
+        path
+        for stage in pipeline_stages().values()
+        for path in stage["outputs"]
+        if path.endswith(".pqt") and not path.startswith(OUT_DIR_STATE)
+    ]
 
-def make_precompute_page_5(df_all: pd.DataFrame) -> None:
-    print("\nPAGE5: computing users agg + thresholds + reach freq + heavy achiever profile...")
 
-    users_agg_all = page5_users_agg_by_monthnum(df_all)
-    thresholds_all = page5_thresholds_by_year(users_agg_all)
-    reach_freq_all = page5_reach_frequency(users_agg_all)
-    monthly_points_all = page5_monthly_customer_points(df_all)
+def ipc_path(path: str) -> str:
+    """pre_computed_data/page1/x.pqt -> pre_computed_data/ipc/page1/x.arrow"""
+    return os.path.join(OUT_DIR, ipc_key(os.path.relpath(path, OUT_DIR).replace(os.sep, "/")))
 
-    print("PAGE5 heavy step: user_month_profile_achievers ...")
-    user_month_profile = page5_user_month_profile_achievers(df_all, users_agg_all)
 
-    users_agg_all.to_parquet(OUT_PAGE5_USERS_AGG, index=False)
-    thresholds_all.to_parquet(OUT_PAGE5_THRESHOLDS, index=False)
-    reach_freq_all.to_parquet(OUT_PAGE5_REACH_FREQ, index=False)
-    monthly_points_all.to_parquet(OUT_PAGE5_MONTHLY_POINTS, index=False)
-    user_month_profile.to_parquet(OUT_PAGE5_USER_MONTH_PROFILE, index=False)
+def master_fingerprint() -> str:
+    """Footer statistics of every master file (no data read): source tag of the IPC master."""
+    files = open_master(CODE_GROUPED_OUTPUT).files
+    stats = {os.path.relpath(f, CODE_GROUPED_OUTPUT): parquet_stats_fingerprint(f) for f in files}
+    return hashlib.sha256(json.dumps(stats, sort_keys=True).encode()).hexdigest()
 
-    print("Saved:")
-    print("-", OUT_PAGE5_USERS_AGG)
-    print("-", OUT_PAGE5_THRESHOLDS)
-    print("-", OUT_PAGE5_REACH_FREQ)
-    print("-", OUT_PAGE5_MONTHLY_POINTS)
-    print("-", OUT_PAGE5_USER_MONTH_PROFILE)
+
+@instrument
+def write_ipc_store() -> None:
+    """Every app output as is + APP_COLS of the master in the app dtypes, sorted by TXN_DATE (data_loader slices years / date ranges)."""
+    for path in app_output_paths():
+        if not os.path.exists(path):
+            continue
+        table = pq.read_table(path)
+        track_input(table.num_rows, os.path.getsize(path))
+        track_output(table.num_rows, write_ipc(table, ipc_path(path), sha256_file(path)))
+
+    master = app_dtypes(read_master_table(CODE_GROUPED_OUTPUT, columns=APP_COLS, require=["TXN_DATE"]))
+    track_input(master.num_rows, master.nbytes)
+    dates = master["TXN_DATE"]
+    if master.num_rows > 1 and not pc.all(pc.greater_equal(dates[1:], dates[:-1])).as_py():
+        master = master.take(pc.sort_indices(master, sort_keys=[("TXN_DATE", "ascending")]))  # stable
+    track_output(master.num_rows, write_ipc(master, OUT_IPC_MASTER, master_fingerprint()))
+    print("Saved IPC store:", OUT_DIR_IPC, f"(master {master.num_rows:,} rows)")
+
+
+# =========================
+# INCREMENTAL STATE (watermark + month / year partitions)
+# =========================
+
+# Page outputs that are a pure union of per-month (or per-year) pieces.
+# Incremental runs replace only the affected partitions in these files.
+MONTH_PARTITIONED_OUTPUTS = [OUT_GROUPED_REWARD, OUT_TS_NO_PAD, OUT_MOVERS_BASE, OUT_USER_SKETCHES, OUT_COUNTS]
+YEAR_PARTITIONED_OUTPUTS = [
+    OUT_LOYAL_AVG, OUT_REACH_FREQ,
+    OUT_PAGE4_USERS, OUT_PAGE4_THRESH, OUT_PAGE4_SEG_MONTH, OUT_PAGE4_SEG_LOYAL,
+    OUT_PAGE5_USERS_AGG, OUT_PAGE5_THRESHOLDS, OUT_PAGE5_REACH_FREQ,
+    OUT_PAGE5_MONTHLY_POINTS, OUT_PAGE5_USER_MONTH_PROFILE,
+]
+
+
+@instrument
+def raw_month_fingerprints(path: str | None = None, batch_size: int = 1_000_000) -> tuple[dict, dict]:
+    """
+    Scan only FINGERPRINT_COLS of the raw parquet (batch by batch) and return:
+      - {year_month: "<rows>:<hash>"}   order-independent hash of the month's raw rows
+      - {year_month: [raw TXN_DATE strings]}   used to read just those months back
+    """
+    pf = pq.ParquetFile(path or INPUT_PARQUET)
+    name_map = {c.strip(): c for c in pf.schema_arrow.names}  # raw names may have spaces
+    cols = [name_map[c] for c in FINGERPRINT_COLS if c in name_map]
+
+    rows, hashes, date_strings = {}, {}, {}
+    month_of = {}  # raw date string -> year_month (parsed once per distinct string)
+
+    for batch in pf.iter_batches(columns=cols, batch_size=batch_size):
+        b = standardize_columns(batch.to_pandas())
+
+        codes, uniques = pd.factorize(b["TXN_DATE"])
+        new = [u for u in uniques if u not in month_of]
+        if new:
+            parsed = pd.to_datetime(pd.Series(new), format=RAW_DATE_FORMAT, errors="coerce")
+            for raw, ts in zip(new, parsed):
+                month_of[raw] = None if pd.isna(ts) else ts.strftime("%Y-%m")
+
+        row_month = np.asarray([month_of[u] for u in uniques], dtype=object)[codes] if len(codes) else []
+        row_hash = pd.util.hash_pandas_object(b, index=False).to_numpy()
+
+        for m in set(row_month) - {None}:
+            mask = row_month == m
+            rows[m] = rows.get(m, 0) + int(mask.sum())
+            hashes[m] = (hashes.get(m, 0) + int(row_hash[mask].sum())) % (1 << 64)
+
+    for raw, m in month_of.items():
+        if m is not None:
+            date_strings.setdefault(m, []).append(raw)
+
+    fingerprints = {m: f"{rows[m]}:{hashes[m]:016x}" for m in sorted(rows)}
+    return fingerprints, date_strings
+
+
+def read_raw_months(date_strings: list[str], path: str | None = None) -> pd.DataFrame:
+    """Read only the raw rows whose TXN_DATE string is in `date_strings` (filter pushed into the scan)."""
+    path = path or INPUT_PARQUET
+    schema_names = pq.ParquetFile(path).schema_arrow.names
+    date_col = next(c for c in schema_names if c.strip() == "TXN_DATE")
+    return pq.read_table(path, filters=[(date_col, "in", date_strings)]).to_pandas()
+
+
+def load_watermark() -> dict | None:
+    if not os.path.exists(WATERMARK_JSON):
+        return None
+    with open(WATERMARK_JSON, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_watermark(fingerprints: dict, path: str) -> None:
+    with open(WATERMARK_JSON, "w", encoding="utf-8") as f:
+        json.dump({"input": path, "months": fingerprints}, f, indent=2)
+    print("- watermark:", WATERMARK_JSON, f"({len(fingerprints)} months)")
+
+
+def partition_key(df: pd.DataFrame, by: str) -> pd.Series:
+    """by="month" -> month key (MONTH_IDX), by="year" -> int year."""
+    if by == "year":
+        return df["year"].astype(int)
+    if "MONTH_IDX" in df.columns:
+        return df["MONTH_IDX"].astype(int)
+    return month_idx(df["year"].astype(int), df["MONTH_NUM"].astype(int))
+
+
+def replace_partitions(path: str, new_part: pd.DataFrame, by: str, keys: list) -> pd.DataFrame:
+    """Existing output minus the `keys` partitions, plus the freshly computed `new_part`."""
+    if not os.path.exists(path):
+        return new_part
+
+    old = pd.read_parquet(path)
+    old = old[~partition_key(old, by).isin(keys)]
+    out = pd.concat([old, new_part], ignore_index=True)
+
+    order = partition_key(out, by).sort_values(kind="stable").index
+    return out.loc[order].reset_index(drop=True)
+
+
+# =========================
+# STAGE GRAPH (what each output needs)
+# =========================
+# Outputs that carry DESC labels (lookup csv) are separate stages, so a
+# lookup-only change rebuilds just those. Bump a stage's "version" when its logic changes.
+
+STAGE_MANIFEST_JSON = os.path.join(OUT_DIR_STATE, "stage_manifest.json")
+REPORT_DIR = os.path.join(OUT_DIR_STATE, "run_reports")
+
+FACTS_BASE_COLS = ["year", "MONTH_NUM", "CUST_ID", "TXN_AMOUNT", "LOYAL_CODE", "TXN_DATE"]
+MISC_BASE_COLS = ["year", "LOYAL_CODE", "TXN_AMOUNT"]
+PAGE4_BASE_COLS = ["year", "MONTH_IDX", "CUST_ID", "LOYAL_CODE", "TXN_AMOUNT"]
+PAGE5_BASE_COLS = ["year", "MONTH_NUM", "CUST_ID", "LOYAL_CODE", "TXN_AMOUNT"]
+
+
+def code_group_rules_version() -> str:
+    """CODE_GROUP / TXN_DESC rules are part of the code_grouped stage logic."""
+    rules = json.dumps([CODE_GROUP_RULES, TXN_DESC_RULES], sort_keys=True, default=sorted)
+    return hashlib.sha256(rules.encode()).hexdigest()[:12]
+
+
+def read_facts() -> pd.DataFrame:
+    facts = pd.read_parquet(OUT_USER_MONTH_FACTS)
+    track_input(len(facts), os.path.getsize(OUT_USER_MONTH_FACTS))
+    return facts
+
+
+def stage_code_grouped(
+    input_path: str, stream: bool = False, batch_rows: int = STREAM_BATCH_ROWS, backend: str = DEFAULT_BACKEND
+) -> None:
+    print(f"[LOAD] INPUT_PARQUET = {input_path}")
+    print(f"[SAVE] CODE_GROUPED_OUTPUT = {CODE_GROUPED_OUTPUT}")
+    if stream:
+        build_code_grouped_streaming(batch_rows, backend, input_path)
+    else:
+        save_code_grouped(build_code_grouped_dataset(backend=backend, path=input_path))
+
+
+def stage_base_snapshot() -> None:
+    write_base_snapshot()
+
+
+def stage_watermark(input_path: str) -> None:
+    fingerprints, _ = raw_month_fingerprints(input_path)
+    save_watermark(fingerprints, input_path)
+
+
+def stage_facts(backend: str = DEFAULT_BACKEND) -> None:
+    facts = build_user_month_facts(load_base(FACTS_BASE_COLS, backend))
+    track_output(len(facts), write_output(facts, OUT_USER_MONTH_FACTS))
+    print(f"[INFO] user-month rows: {len(facts):,} -> {OUT_USER_MONTH_FACTS}")
+
+
+def stage_page_1() -> None:
+    make_precompute_page_1(read_facts())
+
+
+def stage_page_2(backend: str = DEFAULT_BACKEND) -> None:
+    save_outputs(compute_page_2_rewards(load_base(PAGE2_COLS, backend)))
+
+
+def stage_page_2_summary(backend: str = DEFAULT_BACKEND) -> None:
+    save_outputs(compute_page_2_summary(load_base(PAGE2_COLS, backend), load_lookup()))
+
+
+def stage_misc() -> None:
+    save_outputs(compute_misc_facts(read_facts()))
+
+
+def stage_misc_loyal_avg(backend: str = DEFAULT_BACKEND) -> None:
+    save_outputs({OUT_LOYAL_AVG: build_loyal_avg_by_year(load_base(MISC_BASE_COLS, backend), load_lookup())})
+
+
+def stage_page_4() -> None:
+    os.makedirs(OUT_DIR_PAGE_4, exist_ok=True)
+    save_outputs(compute_page_4_segments(read_facts()))
+
+
+def stage_page_4_loyal(backend: str = DEFAULT_BACKEND) -> None:
+    users = pd.read_parquet(OUT_PAGE4_USERS, columns=["CUST_ID", "MONTH_IDX", "User_Segment", "year"])
+    summary = build_segment_loyal_summary(load_base(PAGE4_BASE_COLS, backend), users, load_lookup())
+    save_outputs({OUT_PAGE4_SEG_LOYAL: summary})
+
+
+def stage_page_5(backend: str = DEFAULT_BACKEND) -> None:
+    make_precompute_page_5(load_base(PAGE5_BASE_COLS, backend), read_facts())
+
+
+def stage_ipc_store() -> None:
+    write_ipc_store()
+
+
+def pipeline_stages(
+    stream: bool = False,
+    batch_rows: int = STREAM_BATCH_ROWS,
+    backend: str = DEFAULT_BACKEND,
+    input_path: str | None = None,
+) -> dict[str, dict]:
+    # the raw path is bound into the stage functions: workers never read the module global
+    input_path = input_path or INPUT_PARQUET
+    return {
+        "code_grouped": {
+            "deps": [],
+            "inputs": [input_path],
+            "version": f"4-{code_group_rules_version()}",
+            "outputs": [CODE_GROUPED_OUTPUT],
+            "run": partial(stage_code_grouped, input_path, stream, batch_rows, backend),
+        },
+        "base_snapshot": {
+            "deps": ["code_grouped"],
+            "version": 3,
+            "outputs": [BASE_ARROW],
+            "run": stage_base_snapshot,
+        },
+        "watermark": {
+            "deps": ["code_grouped"],
+            "inputs": [input_path],
+            "version": 2,
+            "outputs": [WATERMARK_JSON],
+            "run": partial(stage_watermark, input_path),
+        },
+        "facts": {
+            "deps": ["base_snapshot"],
+            "version": 5,
+            "outputs": [OUT_USER_MONTH_FACTS],
+            "run": partial(stage_facts, backend),
+        },
+        "page1": {
+            "deps": ["facts"],
+            "version": 5,
+            "outputs": [OUT_USER_MONTHLY, OUT_MONTHLY_SUMMARY, OUT_POINT_HIST],
+            "run": stage_page_1,
+        },
+        "page2": {
+            "deps": ["base_snapshot"],
+            "version": 5,
+            "outputs": [OUT_GROUPED_REWARD, OUT_MOVERS_BASE, OUT_USER_SKETCHES],
+            "run": partial(stage_page_2, backend),
+        },
+        "page2_summary": {
+            "deps": ["base_snapshot"],
+            "inputs": [LOOKUP_CSV],
+            "version": 5,
+            "outputs": [OUT_TS_NO_PAD, OUT_CODEGROUP_MAP],
+            "run": partial(stage_page_2_summary, backend),
+        },
+        "misc": {
+            "deps": ["facts"],
+            "version": 3,
+            "outputs": [OUT_COUNTS, OUT_REACH_FREQ],
+            "run": stage_misc,
+        },
+        "misc_loyal_avg": {
+            "deps": ["base_snapshot"],
+            "inputs": [LOOKUP_CSV],
+            "version": 2,
+            "outputs": [OUT_LOYAL_AVG],
+            "run": partial(stage_misc_loyal_avg, backend),
+        },
+        "page4": {
+            "deps": ["facts"],
+            "version": 3,
+            "outputs": [OUT_PAGE4_USERS, OUT_PAGE4_THRESH, OUT_PAGE4_SEG_MONTH],
+            "run": stage_page_4,
+        },
+        "page4_loyal": {
+            "deps": ["base_snapshot", "page4"],
+            "inputs": [LOOKUP_CSV],
+            "version": 3,
+            "outputs": [OUT_PAGE4_SEG_LOYAL],
+            "run": partial(stage_page_4_loyal, backend),
+        },
+        "page5": {
+            "deps": ["base_snapshot", "facts"],
+            "version": 2,
+            "outputs": [
+                OUT_PAGE5_USERS_AGG, OUT_PAGE5_THRESHOLDS, OUT_PAGE5_REACH_FREQ,
+                OUT_PAGE5_MONTHLY_POINTS, OUT_PAGE5_USER_MONTH_PROFILE,
+            ],
+            "run": partial(stage_page_5, backend),
+        },
+        "ipc_store": {
+            "deps": [
+                "code_grouped", "page1", "page2", "page2_summary", "misc",
+                "misc_loyal_avg", "page4", "page4_loyal", "page5",
+            ],
+            "version": 1,
+            "outputs": [OUT_DIR_IPC],
+            "run": stage_ipc_store,
+        },
+    }
 
 
 # =========================
 # MASTER RUNNER
 # =========================
 
-def run_pipeline(run_precompute: bool = True) -> None:
+def run_pipeline(
+    run_precompute: bool = True,
+    stream: bool = False,
+    batch_rows: int = STREAM_BATCH_ROWS,
+    targets: list[str] | None = None,
+    workers: int | None = None,
+    use_cache: bool = True,
+    force: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    input_path: str | None = None,
+) -> None:
+    """
+    targets=None -> everything. Otherwise only those stages / output files
+    (+ their upstream stages), e.g. targets=["page4"].
+    Independent stages run on `workers` processes (1 = serial).
+    use_cache -> stages whose inputs / upstream outputs / version did not change are
+    skipped (see STAGE_MANIFEST_JSON); force=True rebuilds the selected stages anyway.
+    backend -> "pandas" / "arrow" engine of the transaction-level steps (see BACKENDS);
+    both write the same outputs, so the backend is not part of the stage cache key.
+    input_path -> raw parquet (default INPUT_PARQUET), passed to the stages explicitly.
+    """
+    input_path = input_path or INPUT_PARQUET
     print("\n" + "=" * 60)
     print("[PIPELINE] START")
     print("=" * 60)
@@ -873,47 +1208,267 @@ def run_pipeline(run_precompute: bool = True) -> None:
     ensure_dirs()
     print("[INIT] ensured output folders: pre_computed_data/...")
 
-    # 1) build + save main dataset
-    print("\n[STEP 1] build CODE_GROUPED dataset")
-    print(f"[LOAD] INPUT_PARQUET = {INPUT_PARQUET}")
-    df = build_code_grouped_dataset()
-
-    print(f"[SAVE] CODE_GROUPED_OUTPUT = {CODE_GROUPED_OUTPUT}")
-    save_code_grouped(df)
-
     if not run_precompute:
         print("\n[INFO] run_precompute=False -> skipping page precompute outputs")
-        print("[PIPELINE] COMPLETE")
-        return
+        targets = ["code_grouped"]
+
+    stages = pipeline_stages(stream, batch_rows, backend, input_path)
+    selected = select_stages(stages, targets, all_deps=use_cache)
+    print(f"[DAG] stages: {', '.join(selected)}")
+
+    run_id = new_run_id()
+    t0 = time.perf_counter()
+    records = run_stages(
+        stages,
+        selected,
+        workers,
+        manifest_path=STAGE_MANIFEST_JSON if use_cache else None,
+        force=force,
+    )
 
-    # 2) lookup + precompute smaller pieces
-    print("\n[STEP 2] load lookup mapping")
-    print(f"[LOAD] LOOKUP_CSV = {LOOKUP_CSV}")
-    loyal_code_to_desc = load_lookup()
-    print(f"[INFO] lookup mappings loaded: {len(loyal_code_to_desc):,}")
+    write_output_manifest()
+
+    finish_run_report(
+        records,
+        run_id,
+        {
+            "mode": "stream" if stream else "full",
+            "backend": backend,
+            "targets": targets,
+            "workers": workers,
+            "total_wall_s": round(time.perf_counter() - t0, 3),
+        },
+        input_path,
+    )
+
+    print("\n" + "=" * 60)
+    print("[PIPELINE] COMPLETE")
+    print("=" * 60)
+
+
+def write_output_manifest() -> None:
+    """
+    pre_computed_data/manifest.json: schema / rows / years / bytes of every app-facing output + data version.
+    IPC copies are listed only where they were built from the current file (else the app reads the parquet).
+    """
+    outputs = app_output_paths()
+    ipc = {
+        path: (ipc_key(os.path.relpath(path, OUT_DIR).replace(os.sep, "/")), ipc_source(ipc_path(path)))
+        for path in outputs
+    }
+    master = None
+    if os.path.exists(CODE_GROUPED_OUTPUT):
+        master = {
+            "path": os.path.basename(CODE_GROUPED_OUTPUT),
+            "years": master_years(CODE_GROUPED_OUTPUT),
+            "rows": open_master(CODE_GROUPED_OUTPUT).count_rows(),
+            "bytes": master_bytes(CODE_GROUPED_OUTPUT),
+        }
+        if ipc_source(OUT_IPC_MASTER) == master_fingerprint():
+            master["ipc"] = f"{IPC_DIR}/{MASTER_FILE}"
+    manifest = write_manifest(OUT_DIR, outputs, master, ipc)
+    print(f"[MANIFEST] {len(manifest['outputs'])} outputs, data_version {manifest['data_version']}")
 
-    print("\n[PAGE 1] precompute outputs")
-    make_precompute_page_1(df)
 
-    print("\n[PAGE 2] precompute outputs")
-    make_precompute_page_2(df, loyal_code_to_desc)
+def finish_run_report(records: list[dict], run_id: str, meta: dict, input_path: str) -> None:
+    """Write the run report (JSON + history parquet) and print the slowest steps."""
+    if os.path.exists(BASE_ARROW):
+        meta["base_rows"] = pa.ipc.open_file(pa.memory_map(BASE_ARROW, "r")).read_all().num_rows
+    meta["raw_parquet"] = input_path
 
-    print("\n[MISC] precompute outputs")
-    make_precompute_misc(df, loyal_code_to_desc)
+    report = write_report(records, REPORT_DIR, run_id, meta)
+    print_summary(report, previous_run(REPORT_DIR, run_id))
+    print(f"[REPORT] {os.path.join(REPORT_DIR, f'run_{run_id}.json')}")
 
-    print("\n[PAGE 4] precompute outputs")
-    make_precompute_page_4_all_years(df, loyal_code_to_desc)
 
-    print("\n[PAGE 5] precompute outputs")
-    make_precompute_page_5(df)
+def run_pipeline_incremental(input_path: str | None = None) -> None:
+    """
+    Only re-process raw months whose fingerprint changed since the last run
+    (input_path: raw parquet, default INPUT_PARQUET).
 
+    - master dataset / monthly aggregates: affected month partitions are replaced
+    - user-month facts: affected months replaced, first-month flags re-derived (users x months)
+    - yearly outputs (thresholds, segments, reach frequency, ...): affected years recomputed
+    """
     print("\n" + "=" * 60)
-    print("[PIPELINE] COMPLETE")
+    print("[PIPELINE] START (incremental)")
     print("=" * 60)
 
+    ensure_dirs()
+    input_path = input_path or INPUT_PARQUET
+    watermark = load_watermark()
+    if (
+        watermark is None
+        or not os.path.exists(CODE_GROUPED_OUTPUT)
+        or not os.path.exists(OUT_USER_MONTH_FACTS)
+        or "MONTH_IDX" not in pq.read_schema(OUT_USER_MONTH_FACTS).names  # state written before the month key
+        or facts_version_changed(input_path)
+    ):
+        print("[INFO] no previous state (or facts built by older logic) -> full run")
+        run_pipeline(run_precompute=True, input_path=input_path)
+        return
+
+    run_id = new_run_id()
+    t0 = time.perf_counter()
+    with step("incremental", kind="stage"):
+        update_changed_months(watermark, input_path)
+
+    finish_run_report(
+        take_records(),
+        run_id,
+        {"mode": "incremental", "total_wall_s": round(time.perf_counter() - t0, 3)},
+        input_path,
+    )
+
+    print("\n" + "=" * 60)
+    print("[PIPELINE] COMPLETE (incremental)")
+    print("=" * 60)
+
+
+def facts_version_changed(input_path: str) -> bool:
+    """The stored facts were built by other facts logic (stage version): months cannot be patched into them."""
+    recorded = load_manifest(STAGE_MANIFEST_JSON).get("facts", {}).get("version")
+    return recorded != pipeline_stages(input_path=input_path)["facts"]["version"]
+
+
+def update_changed_months(watermark: dict, input_path: str) -> None:
+    """Body of run_pipeline_incremental (master / facts / outputs for the changed months)."""
+    print(f"\n[STEP 1] fingerprint raw months: {input_path}")
+    fingerprints, date_strings = raw_month_fingerprints(input_path)
+    previous = watermark.get("months", {})
+    months = sorted(m for m in set(fingerprints) | set(previous) if fingerprints.get(m) != previous.get(m))
+
+    if not months:
+        print("[INFO] no new or changed months -> nothing to do")
+        return
+
+    years = sorted({int(m[:4]) for m in months})
+    month_ids = month_keys(months).tolist()
+    print(f"[INFO] changed months: {months}")
+    print(f"[INFO] affected years: {years}")
+
+    print("\n[STEP 2] rebuild CODE_GROUPED rows for changed months")
+    raw = read_raw_months([d for m in months for d in date_strings.get(m, [])], input_path)
+    new_rows = add_customer_ids(build_code_grouped_dataset(raw))
+    del raw
+    print(f"[INFO] new rows: {len(new_rows):,}")
+
+    # only the changed month partitions are (re)written / removed
+    drop_months(CODE_GROUPED_OUTPUT, [m for m in months if m not in fingerprints])
+    if len(new_rows):
+        write_master(new_rows, CODE_GROUPED_OUTPUT)
+    print("✅ Updated CODE_GROUPED partitions:", CODE_GROUPED_OUTPUT)
+
+    print("\n[STEP 3] update user x month facts")
+    facts = pd.read_parquet(OUT_USER_MONTH_FACTS)
+    facts = finalize_user_month_facts(
+        pd.concat([facts[~facts["MONTH_IDX"].isin(month_ids)], aggregate_user_months(new_rows)], ignore_index=True)
+    )
+    write_output(facts, OUT_USER_MONTH_FACTS)
+    print(f"[INFO] user-month rows: {len(facts):,}")
+
+    loyal_code_to_desc = load_lookup()
+
+    print("\n[PAGE 1] recompute from facts")
+    make_precompute_page_1(facts)
+
+    print("\n[MONTHLY] replace month partitions")
+    monthly = compute_page_2(new_rows, loyal_code_to_desc)
+    monthly[OUT_COUNTS] = build_monthly_bucket_counts(facts[facts["MONTH_IDX"].isin(month_ids)])
+
+    outputs = {
+        path: replace_partitions(path, monthly[path], "month", month_ids)
+        for path in MONTH_PARTITIONED_OUTPUTS
+    }
+    outputs[OUT_CODEGROUP_MAP] = build_codegroup_loyalcode_map(outputs[OUT_TS_NO_PAD])
+    save_outputs(outputs)
+
+    print("\n[YEARLY] recompute affected years")
+    facts_years = facts[facts["year"].isin(years)]
+    master_part = load_code_grouped(PRECOMPUTE_COLS, years=years)
+
+    yearly = {}
+    yearly.update(compute_misc(master_part, facts_years, loyal_code_to_desc))
+    yearly.update(compute_page_4_all_years(master_part, facts_years, loyal_code_to_desc))
+    yearly.update(compute_page_5(master_part, facts_years))
+
+    save_outputs({
+        path: replace_partitions(path, yearly[path], "year", years)
+        for path in YEAR_PARTITIONED_OUTPUTS
+    })
+
+    print("\n[STATE] watermark + base snapshot + IPC store")
+    save_watermark(fingerprints, input_path)
+    write_base_snapshot()
+    write_ipc_store()
+    record_stages(pipeline_stages(input_path=input_path), STAGE_MANIFEST_JSON)
+    write_output_manifest()
+
 
 def main():
-    run_pipeline(run_precompute=True)
+    parser = argparse.ArgumentParser(description="Build CODE_GROUPED + Streamlit precomputed outputs.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-process new / changed TXN_DATE months (falls back to a full run without previous state)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="build CODE_GROUPED from raw record batches (bounded memory)",
+    )
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=STREAM_BATCH_ROWS,
+        help=f"rows per raw batch in --stream mode (default {STREAM_BATCH_ROWS:,})",
+    )
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        help="stage names or output files to rebuild, e.g. --targets page4 (default: all)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="parallel stage processes (default: cpu count, 1 = serial)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=DEFAULT_BACKEND,
+        help="engine of the transaction-level steps (arrow: pyarrow compute / Acero on all cores)",
+    )
+    parser.add_argument("--force", action="store_true", help="rebuild selected stages even if unchanged")
+    parser.add_argument("--no-cache", action="store_true", help="do not read / write the stage manifest")
+    parser.add_argument("--list", action="store_true", help="print the stage graph and exit")
+    parser.add_argument("--input", help=f"raw parquet (default {INPUT_PARQUET})")
+    args = parser.parse_args()
+
+    input_path = os.path.abspath(args.input) if args.input else INPUT_PARQUET
+
+    if args.list:
+        for name, stage in pipeline_stages(input_path=input_path).items():
+            print(f"{name:15s} deps={stage['deps']}")
+            for out in stage["outputs"]:
+                print(f"{'':15s} -> {out}")
+        return
+
+    if args.incremental:
+        run_pipeline_incremental(input_path)
+    else:
+        run_pipeline(
+            run_precompute=True,
+            stream=args.stream,
+            batch_rows=args.batch_rows,
+            targets=args.targets,
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            force=args.force,
+            backend=args.backend,
+            input_path=input_path,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""
+date_cols.py
+
+TXN_DATE parsing + the derived calendar columns + the month key (shared by the pipeline and data_loader).
+
+Two years of transactions have only ~730 distinct dates, so everything here
+runs on the DISTINCT values and is broadcast back to the rows:
+
+    parse_dates      raw strings ("01-JAN-24") -> datetime64, each distinct string parsed once
+    add_date_cols    TXN_DATE -> year, MONTH_NUM, MONTH_IDX, MONTH_NAME (or just the ones an older master lacks)
+
+Columns (stored in the master dataset, so the app never re-derives them):
+
+    year        int16   2025
+    MONTH_NUM   int8    1..12
+    MONTH_IDX   int32   year * 12 + MONTH_NUM - 1  (consecutive months differ by 1)
+    MONTH_NAME  str     JAN..DEC
+
+Month key: MONTH_IDX is the only month column of the master and of every
+precomputed output (groupby / sort / filter on an int32). The "YYYY-MM" label
+is made at render time for the few rows of a chart:
+
+    with_month_label(df)          df + year_month "2025-01" (chart axes, animation frames)
+    month_label_table(df)         year_month in place of MONTH_IDX (tables shown to users)
+    month_year(key) / month_of(key)   2025 / 1..12
+    month_keys(["2025-01"])       labels -> keys (user input, files written before the key)
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+DATE_COLS = ["year", "MONTH_NUM", "MONTH_IDX", "MONTH_NAME"]
+MONTH_KEY = "MONTH_IDX"
+MONTH_LABEL = "year_month"
+
+
+def month_idx(year, month):
+    """year * 12 + month - 1 (scalars or arrays)."""
+    return year * 12 + month - 1
+
+
+def month_year(key):
+    """Year of a month key (scalars, arrays or Series)."""
+    return key // 12
+
+
+def month_of(key):
+    """Month 1..12 of a month key (scalars, arrays or Series)."""
+    return key % 12 + 1
+
+
+def month_label(key: int) -> str:
+    return f"{int(key) // 12:04d}-{int(key) % 12 + 1:02d}"
+
+
+def month_labels(keys) -> np.ndarray:
+    """Month keys -> "YYYY-MM" labels, formatted once per distinct month."""
+    codes, uniques = pd.factorize(np.asarray(keys))
+    labels = np.array([month_label(k) for k in uniques] + [None], dtype=object)
+    return labels[codes]  # missing keys (-1) -> None
+
+
+def month_keys(labels) -> np.ndarray:
+    """"YYYY-MM" labels -> int32 month keys, parsed once per distinct label."""
+    codes, uniques = pd.factorize(np.asarray(labels, dtype=object))
+    keys = np.array([month_idx(int(str(u)[:4]), int(str(u)[5:7])) for u in uniques], dtype="int32")
+    return keys[codes]
+
+
+def with_month_label(df: pd.DataFrame, key: str = MONTH_KEY, label: str = MONTH_LABEL) -> pd.DataFrame:
+    """Copy of `df` with the "YYYY-MM" label column; for the (small) frames a chart / table shows."""
+    return df.assign(**{label: month_labels(df[key])})
+
+
+def month_label_table(df: pd.DataFrame, key: str = MONTH_KEY, label: str = MONTH_LABEL) -> pd.DataFrame:
+    """Copy of `df` with the "YYYY-MM" label in place of the key column (users never see the int key)."""
+    cols = [c for c in df.columns if c != label]
+    out = df[cols].drop(columns=key)
+    out.insert(cols.index(key), label, month_labels(df[key]))
+    return out
+
+
+def parse_dates(values: pd.Series, fmt: str) -> pd.Series:
+    """pd.to_datetime(values, format=fmt, errors="coerce"), one parse per distinct string."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    parsed = pd.to_datetime(pd.Index(uniques), format=fmt, errors="coerce")
+
+    # missing rows (-1) -> NaT appended at the end
+    out = np.append(parsed.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(out[codes], index=values.index, name=values.name)
+
+
+def _date_table(dates: pd.DatetimeIndex) -> dict[str, np.ndarray]:
+    year = dates.year.to_numpy()
+    month = dates.month.to_numpy()
+    return {
+        "year": year.astype("int16"),
+        "MONTH_NUM": month.astype("int8"),
+        "MONTH_IDX": month_idx(year, month).astype("int32"),
+        "MONTH_NAME": dates.strftime("%b").str.upper().to_numpy(dtype=object),
+    }
+
+
+def add_date_cols(df: pd.DataFrame, columns: list[str] = DATE_COLS, date_col: str = "TXN_DATE") -> pd.DataFrame:
+    """Derive `columns` from `date_col` (no NaT) once per distinct date."""
+    codes, uniques = pd.factorize(df[date_col])
+    table = _date_table(pd.DatetimeIndex(uniques))
+    for col in columns:
+        df[col] = table[col][codes]
+    return df
@@ -0,0 +1,84 @@
+"""
+hll.py
+
+Mergeable distinct-user sketches (HyperLogLog, numpy only; shared by the pipeline and data_loader).
+
+    regs = build_sketches(group_codes, n_groups, cust_id)   # (n_groups, M) uint8, one pass
+    estimate(merge(regs[rows]))                             # distinct users of any union of groups
+
+A sketch is M = 2**P one-byte registers. Merging is an element-wise max, so
+the distinct users of any set of LOYAL_CODE x month cells (a quarter, a
+CODE_GROUP-year, ...) come from the stored cells without touching transactions.
+
+P = 11 -> 2 KB per sketch, standard error 1.04 / sqrt(2048) ~ 2.3%.
+Use exact counts (nunique) where the number is a headline metric.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+P = 11
+M = 1 << P
+HASH_BITS = 64
+
+_ALPHA = 0.7213 / (1 + 1.079 / M)
+
+
+def hash_ids(ids: np.ndarray) -> np.ndarray:
+    """splitmix64 of integer ids -> uniform uint64."""
+    z = np.asarray(ids).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _register_rank(h: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Register index (top P bits) + rank (1 + leading zeros of the other 64 - P bits)."""
+    rest_bits = HASH_BITS - P
+    idx = (h >> np.uint64(rest_bits)).astype(np.intp)
+    rest = h & np.uint64((1 << rest_bits) - 1)
+
+    # rest < 2**53 is exact in float64: frexp exponent == bit length
+    _, bit_len = np.frexp(rest.astype(np.float64))
+    rank = (rest_bits - bit_len + 1).astype(np.uint8)  # rest == 0 -> bit_len 0 -> max rank
+    return idx, rank
+
+
+def build_sketches(group_codes: np.ndarray, n_groups: int, ids: np.ndarray) -> np.ndarray:
+    """One sketch per group: group_codes[i] in 0..n_groups-1 is the group of ids[i]."""
+    regs = np.zeros(n_groups * M, dtype=np.uint8)
+    if len(ids):
+        idx, rank = _register_rank(hash_ids(ids))
+        np.maximum.at(regs, np.asarray(group_codes, dtype=np.intp) * M + idx, rank)
+    return regs.reshape(n_groups, M)
+
+
+def merge(regs: np.ndarray) -> np.ndarray:
+    """(k, M) sketches -> one sketch of their union."""
+    if regs.ndim == 1:
+        return regs
+    if len(regs) == 0:
+        return np.zeros(M, dtype=np.uint8)
+    return regs.max(axis=0)
+
+
+def estimate(sketch: np.ndarray) -> float:
+    """Distinct count of one sketch (small-range linear counting, no large-range term with 64-bit hashes)."""
+    sketch = np.asarray(sketch)
+    raw = _ALPHA * M * M / np.ldexp(1.0, -sketch.astype(np.int32)).sum()
+    zeros = int((sketch == 0).sum())
+    if raw <= 2.5 * M and zeros:
+        return M * np.log(M / zeros)
+    return float(raw)
+
+
+def to_bytes(regs: np.ndarray) -> list[bytes]:
+    return [row.tobytes() for row in regs]
+
+
+def from_bytes(values) -> np.ndarray:
+    """Column of stored sketches (bytes) -> (n, M) uint8."""
+    if len(values) == 0:
+        return np.zeros((0, M), dtype=np.uint8)
+    return np.frombuffer(b"".join(values), dtype=np.uint8).reshape(len(values), M)
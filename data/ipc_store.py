@@ -0,0 +1,96 @@
+"""
+ipc_store.py
+
+Uncompressed Arrow IPC (Feather v2) copies of the app-facing data, written by the pipeline
+and memory-mapped by data_loader (shared by both, pyarrow only).
+
+    pre_computed_data/ipc/
+        master.arrow                                   (app columns of the master, app dtypes)
+        page1/precomputed_user_level_stat_monthly.arrow   (one per parquet output, same key)
+        ...
+
+- no compression and ONE record batch per file: a mapped file is used in place, and
+  to_pandas(split_blocks=True) hands numeric / datetime / dictionary-code columns to pandas
+  without a copy. Every Streamlit process on the host then reads the same OS page cache:
+  resident memory per process is the pages actually touched, startup has no parquet decode.
+  (string columns still become per-process Python objects)
+- mapped columns are read-only: an in-place write (.loc[...] = ...) raises instead of
+  changing the data shared with other processes
+- each file records the source it was built from (IPC_SOURCE schema metadata: the parquet
+  sha256 / the master fingerprint); data_manifest lists it only while that still matches,
+  so a stale store is never read and the parquet stays the fallback
+- files are replaced atomically (tmp + os.replace): processes that still map the old file
+  keep reading it until they re-open
+"""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+IPC_DIR = "ipc"
+MASTER_FILE = "master.arrow"
+IPC_SOURCE = b"ipc_source"
+
+
+def ipc_key(key: str) -> str:
+    """Output key -> key of its IPC copy: "page1/x.pqt" -> "ipc/page1/x.arrow"."""
+    return f"{IPC_DIR}/{os.path.splitext(key)[0]}.arrow"
+
+
+def write_ipc(table: pa.Table, path: str, source: str) -> int:
+    """Write `table` as one uncompressed record batch tagged with `source`; returns the file size."""
+    table = table.combine_chunks()
+    metadata = dict(table.schema.metadata or {})
+    metadata[IPC_SOURCE] = source.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def ipc_source(path: str) -> str | None:
+    """The source tag of an IPC file (schema only, no data read); None if missing / untagged."""
+    if not os.path.exists(path):
+        return None
+    with pa.memory_map(path, "r") as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    tag = metadata.get(IPC_SOURCE)
+    return tag.decode() if tag is not None else None
+
+
+def map_table(path: str) -> pa.Table:
+    """The file as a table over a read-only memory map (nothing is read until used)."""
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """One block per column, so mapped numeric / datetime / dictionary columns are not copied."""
+    return table.to_pandas(split_blocks=True)
+
+
+def fixed_binary_view(column: pa.ChunkedArray | pa.Array, width: int) -> np.ndarray | None:
+    """
+    (n, width) uint8 view of a binary column whose values all have `width` bytes
+    (e.g. the HLL sketches), without a copy; None if the column does not qualify.
+    """
+    if isinstance(column, pa.ChunkedArray):
+        if column.num_chunks != 1:
+            return None
+        column = column.chunk(0)
+    if not pa.types.is_binary(column.type) or column.null_count:
+        return None
+    _, offsets, data = column.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int32)[column.offset : column.offset + len(column) + 1]
+    if len(column) == 0 or not (np.diff(offsets) == width).all():
+        return None
+    start = int(offsets[0])
+    return np.frombuffer(data, dtype=np.uint8)[start : start + len(column) * width].reshape(len(column), width)
@@ -0,0 +1,378 @@
+"""
+master_store.py
+
+Storage layout of the CODE_GROUPED master dataset (shared by the pipeline and data_loader).
+
+    ardiin_erh_code_grouped_combined/
+        year=2024/MONTH_NUM=1/part-0.parquet
+        year=2024/MONTH_NUM=2/part-0.parquet
+        ...
+        _customer_ids.parquet          (CUST_ID -> CUST_CODE dictionary)
+
+- Hive-style partitions on (year, MONTH_NUM): a year / month filter only opens those folders;
+  files are read in (year, MONTH_NUM) order, so rows come back sorted by month (MONTH_IDX)
+- rows sorted by TXN_DATE, CUST_ID inside each file, row-group statistics on
+- TXN_DATE stored as a date32 day (time part is always 00:00), readers get datetime64[ns];
+  year / MONTH_NUM / MONTH_IDX / MONTH_NAME are stored too (see date_cols.py)
+- a new month = a new partition folder (other months are not rewritten)
+- customers are stored as a dense int32 CUST_ID (0..n-1); the side dictionary maps
+  back to CUST_CODE. Ids are stable: new customers are appended, never renumbered.
+  A null CUST_CODE gets NULL_CUST_ID (-1): the row keeps its amounts, but it is left out
+  of per-user aggregates / distinct counts (as NaN codes were by groupby / nunique)
+  (files starting with "_" are skipped by the dataset reader)
+
+A legacy single-file `.pqt` path is still readable with `read_master`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_COLS = ["year", "MONTH_NUM"]
+PARTITION_SCHEMA = pa.schema([("year", pa.int16()), ("MONTH_NUM", pa.int8())])
+SORT_COLS = ["TXN_DATE", "CUST_ID"]
+DAY_COLS = ["TXN_DATE"]  # stored as date32 (4 bytes), read back as datetime64[ns]
+CUSTOMER_IDS_FILE = "_customer_ids.parquet"
+NULL_CUST_ID = -1  # rows without a CUST_CODE
+
+ROW_GROUP_ROWS = 500_000
+
+
+def _partitioning() -> ds.Partitioning:
+    return ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+
+def partition_dir(path: str, year: int, month: int) -> str:
+    return os.path.join(path, f"year={int(year)}", f"MONTH_NUM={int(month)}")
+
+
+def clear_master(path: str) -> None:
+    """
+    Remove the dataset rows (every partition, or the legacy single file). The customer id
+    dictionary is kept, so a full rebuild gives every known customer the same CUST_ID again.
+    """
+    if os.path.isdir(path):
+        for name in os.listdir(path):
+            if name == CUSTOMER_IDS_FILE:
+                continue
+            entry = os.path.join(path, name)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry)
+            else:
+                os.remove(entry)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def drop_months(path: str, year_months: list[str]) -> None:
+    """Delete the partition folders of `year_months` ("YYYY-MM")."""
+    for ym in year_months:
+        year, month = ym.split("-")
+        shutil.rmtree(partition_dir(path, int(year), int(month)), ignore_errors=True)
+
+
+def write_master(
+    df: pd.DataFrame | pa.Table,
+    path: str,
+    basename: str = "part-{i}.parquet",
+    replace: bool = True,
+    schema: pa.Schema | None = None,
+) -> pa.Schema:
+    """
+    Write `df` into the partitioned dataset and return the arrow schema used.
+
+    replace=True  -> partitions present in `df` are replaced, all others are kept
+    replace=False -> files are added next to existing ones (streaming batches)
+    schema        -> cast to this schema first (keeps every file of the dataset identical)
+    `df` may be a pa.Table (arrow backend): same stable sort, no pandas round trip.
+    """
+    names = df.column_names if isinstance(df, pa.Table) else df.columns
+    sort_cols = [c for c in SORT_COLS if c in names]
+    if isinstance(df, pa.Table):
+        table = df
+        if sort_cols:
+            keys = [(c, "ascending") for c in PARTITION_COLS + sort_cols]
+            table = table.take(pc.sort_indices(table, sort_keys=keys))  # stable
+    else:
+        if sort_cols:
+            df = df.sort_values(PARTITION_COLS + sort_cols, kind="stable")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+    table = table.set_column(
+        table.schema.get_field_index("year"), "year", table["year"].cast(pa.int16())
+    )
+    table = table.set_column(
+        table.schema.get_field_index("MONTH_NUM"), "MONTH_NUM", table["MONTH_NUM"].cast(pa.int8())
+    )
+    for col in DAY_COLS:
+        i = table.schema.get_field_index(col)
+        if i >= 0 and pa.types.is_timestamp(table.schema.field(i).type):
+            table = table.set_column(i, col, table[col].cast(pa.date32()))  # raises if a time part would be lost
+    if schema is not None:
+        table = table.cast(schema)
+
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=_partitioning(),
+        basename_template=basename,
+        existing_data_behavior="delete_matching" if replace else "overwrite_or_ignore",
+        max_rows_per_group=ROW_GROUP_ROWS,
+        min_rows_per_group=min(ROW_GROUP_ROWS, 100_000),
+        preserve_order=True,  # keep the sort above (multi-chunk tables are otherwise written out of order)
+    )
+    return table.schema
+
+
+def _file_order(path: str, file: str) -> tuple[int, ...]:
+    """(year, MONTH_NUM, part numbers) of a partition file, numeric: MONTH_NUM=10 comes after MONTH_NUM=9."""
+    return tuple(int(n) for n in re.findall(r"\d+", os.path.relpath(file, path)))
+
+
+def open_master(path: str) -> ds.Dataset:
+    """Partition files in (year, MONTH_NUM) order, so every read comes back sorted by month."""
+    if os.path.isfile(path):
+        return ds.dataset(path, format="parquet")
+    found = ds.dataset(path, format="parquet", partitioning=_partitioning())
+    files = sorted(found.files, key=lambda f: _file_order(path, f))
+    return ds.dataset(files, format="parquet", partitioning=_partitioning(), partition_base_dir=path)
+
+
+def _and(flt: ds.Expression | None, part: ds.Expression) -> ds.Expression:
+    return part if flt is None else (flt & part)
+
+
+def _day_scalar(value, type_: pa.DataType) -> pa.Scalar:
+    """A date ("2025-01-01", date, Timestamp) as a scalar of the stored TXN_DATE type."""
+    return pa.scalar(pd.Timestamp(value).to_pydatetime()).cast(type_)
+
+
+def read_master_table(
+    path: str,
+    columns: list[str] | None = None,
+    years: list[int] | tuple[int, ...] | None = None,
+    year_months: list[str] | None = None,
+    date_range: tuple | None = None,
+    require: list[str] | None = None,
+) -> pa.Table:
+    """
+    Read only the partitions (and columns) that are needed.
+
+    date_range -> (first, last) TXN_DATE, both inclusive (None = open end); also prunes the year partitions
+    require    -> only rows where these columns are not null
+    Both are pushed into the scan (partition folders + row-group statistics), the
+    filter columns do not have to be in `columns`.
+    """
+    dataset = open_master(path)
+    schema = dataset.schema
+
+    flt = None
+    if years is not None:
+        flt = ds.field("year").isin([int(y) for y in years])
+    if year_months is not None:
+        ym_flt = None
+        for ym in year_months:
+            year, month = ym.split("-")
+            part = (ds.field("year") == int(year)) & (ds.field("MONTH_NUM") == int(month))
+            ym_flt = part if ym_flt is None else (ym_flt | part)
+        flt = ym_flt if flt is None else (flt & ym_flt)
+    if date_range is not None:
+        first, last = date_range
+        type_ = schema.field("TXN_DATE").type
+        temporal = pa.types.is_date(type_) or pa.types.is_timestamp(type_)  # legacy string dates: caller filters
+        if first is not None:
+            if temporal:
+                flt = _and(flt, ds.field("TXN_DATE") >= _day_scalar(first, type_))
+            if "year" in schema.names:
+                flt = _and(flt, ds.field("year") >= pd.Timestamp(first).year)
+        if last is not None:
+            if temporal:
+                flt = _and(flt, ds.field("TXN_DATE") <= _day_scalar(last, type_))
+            if "year" in schema.names:
+                flt = _and(flt, ds.field("year") <= pd.Timestamp(last).year)
+    for col in require or []:
+        if col in schema.names:
+            flt = _and(flt, ds.field(col).is_valid())
+
+    if columns is not None:
+        columns = [c for c in columns if c in schema.names]
+
+    table = dataset.to_table(columns=columns, filter=flt)
+    for col in DAY_COLS:
+        i = table.schema.get_field_index(col)
+        if i >= 0 and pa.types.is_date32(table.schema.field(i).type):
+            table = table.set_column(i, col, table[col].cast(pa.timestamp("ns")))
+    return table
+
+
+def read_master(
+    path: str,
+    columns: list[str] | None = None,
+    years: list[int] | tuple[int, ...] | None = None,
+    year_months: list[str] | None = None,
+    date_range: tuple | None = None,
+    require: list[str] | None = None,
+) -> pd.DataFrame:
+    return read_master_table(path, columns, years, year_months, date_range, require).to_pandas()
+
+
+def master_schema(path: str) -> pa.Schema:
+    """Schema of the dataset (partition columns included); no data is read."""
+    return open_master(path).schema
+
+
+# =========================
+# APP DTYPES
+# =========================
+
+# columns the app reads (data_loader.MASTER_COLS, the IPC copy of the master)
+APP_COLS = [
+    "TXN_DATE",
+    "CUST_ID",
+    "MONTH_NUM",
+    "MONTH_NAME",
+    "TXN_AMOUNT",
+    "LOYAL_CODE",
+    "JRNO",
+    "CODE_GROUP",
+    "year",
+    "MONTH_IDX",
+]
+
+
+def is_text(type_: pa.DataType) -> bool:
+    return pa.types.is_string(type_) or pa.types.is_large_string(type_)
+
+
+def app_dtypes(table: pa.Table) -> pa.Table:
+    """The app dtypes, set on the arrow table (to_pandas then builds the final frame directly)."""
+    casts = {"CUST_ID": pa.int32(), "year": pa.int16(), "MONTH_NUM": pa.int16()}
+    for col, type_ in casts.items():
+        if col in table.column_names:
+            table = table.set_column(table.schema.get_field_index(col), col, table[col].cast(type_))
+
+    if "TXN_AMOUNT" in table.column_names and pa.types.is_floating(table.schema.field("TXN_AMOUNT").type):
+        amount = table["TXN_AMOUNT"]
+        amount = pc.fill_null(pc.if_else(pc.is_nan(amount), 0.0, amount), 0.0)  # == to_numeric().fillna(0)
+        table = table.set_column(
+            table.schema.get_field_index("TXN_AMOUNT"), "TXN_AMOUNT", amount.cast(pa.int32(), safe=False)
+        )
+
+    if "LOYAL_CODE" in table.column_names and is_text(table.schema.field("LOYAL_CODE").type):
+        # category with sorted categories (same as .astype("category"))
+        codes = table["LOYAL_CODE"]
+        categories = pc.unique(codes).drop_null()
+        categories = categories.take(pc.array_sort_indices(categories))
+        loyal = pa.chunked_array(
+            [pa.DictionaryArray.from_arrays(pc.index_in(chunk, value_set=categories), categories) for chunk in codes.chunks],
+            type=pa.dictionary(pa.int32(), categories.type),
+        )
+        table = table.set_column(table.schema.get_field_index("LOYAL_CODE"), "LOYAL_CODE", loyal)
+    return table
+
+
+# =========================
+# CUSTOMER IDS
+# =========================
+
+def customer_ids_path(path: str) -> str:
+    return os.path.join(path, CUSTOMER_IDS_FILE)
+
+
+def read_customer_ids(path: str) -> pd.DataFrame:
+    """CUST_ID (int32, == row position) / CUST_CODE; empty if none assigned yet."""
+    file = customer_ids_path(path)
+    if not os.path.exists(file):
+        return pd.DataFrame({"CUST_ID": pd.Series(dtype="int32"), "CUST_CODE": pd.Series(dtype=object)})
+    return pd.read_parquet(file)
+
+
+def assign_customer_ids(path: str, cust_code: pd.Series) -> pd.Series:
+    """
+    int32 CUST_ID for every row of `cust_code`. Unknown codes get the next ids
+    (in sorted order, so a fresh build is deterministic) and are appended to the dictionary.
+    Null codes get NULL_CUST_ID (not a dictionary entry).
+    """
+    valid = cust_code.notna().to_numpy()
+    valid_codes, uniques = pd.factorize(cust_code[valid].astype(str))
+    codes = np.full(len(cust_code), -1, dtype=np.intp)
+    codes[valid] = valid_codes
+    known = read_customer_ids(path)
+
+    pos = pd.Index(known["CUST_CODE"]).get_indexer(uniques)
+    new_codes = np.sort(np.asarray(uniques[pos == -1], dtype=object))
+
+    if len(new_codes):
+        new = pd.DataFrame(
+            {
+                "CUST_ID": np.arange(len(known), len(known) + len(new_codes), dtype="int32"),
+                "CUST_CODE": new_codes,
+            }
+        )
+        known = pd.concat([known, new], ignore_index=True)
+        os.makedirs(path, exist_ok=True)
+        known.to_parquet(customer_ids_path(path), index=False)
+        pos = pd.Index(known["CUST_CODE"]).get_indexer(uniques)
+
+    ids = np.append(known["CUST_ID"].to_numpy(dtype="int32")[pos], np.int32(NULL_CUST_ID))
+    return pd.Series(ids[codes], index=cust_code.index, name="CUST_ID")  # code -1 -> the appended NULL_CUST_ID
+
+
+def null_customer_mask(df: pd.DataFrame | pa.Table) -> np.ndarray:
+    """Rows whose CUST_CODE was null (CUST_ID == NULL_CUST_ID)."""
+    ids = df["CUST_ID"]
+    if isinstance(ids, pa.ChunkedArray):
+        return pc.equal(ids, NULL_CUST_ID).to_numpy()
+    return ids.to_numpy() == NULL_CUST_ID
+
+
+def known_customers(df: pd.DataFrame | pa.Table) -> pd.DataFrame | pa.Table:
+    """
+    `df` without the null-customer rows, for per-user aggregates (like groupby on CUST_CODE dropped NaN).
+    Amount totals (per month / code / group) keep every row.
+    """
+    mask = null_customer_mask(df)
+    if not mask.any():
+        return df
+    if isinstance(df, pa.Table):
+        return df.filter(pa.array(~mask))
+    return df[~mask]
+
+
+def count_customers(ids: pd.Series) -> int:
+    """Distinct CUST_ID without NULL_CUST_ID (nunique over CUST_CODE skipped NaN)."""
+    return int(ids[ids != NULL_CUST_ID].nunique())
+
+
+def master_bytes(path: str) -> int:
+    """Size on disk of the dataset (all partition files)."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+def master_years(path: str) -> list[int]:
+    """Available years from the folder names only (no data is read); [] if there is no dataset."""
+    if not os.path.exists(path):
+        return []
+    if os.path.isfile(path):
+        return sorted(pq.read_table(path, columns=["year"])["year"].unique().to_pylist())
+    return sorted(
+        int(name.split("=", 1)[1])
+        for name in os.listdir(path)
+        if name.startswith("year=")
+    )
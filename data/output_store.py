@@ -0,0 +1,79 @@
+"""
+output_store.py
+
+Parquet profile of the precomputed outputs (pipeline side; data_loader reads them with plain read_parquet).
+
+    write_output(df, path)        # every save in data_pre_compute.py goes through here
+
+- rows sorted by the table's time keys (SORT_KEYS present in the frame: year, MONTH_IDX, MONTH_NUM),
+  stable, so the order inside a month is kept
+- one row group per year (split further at ROW_GROUP_ROWS): row-group statistics on
+  year / MONTH_IDX let `filters=[("year", "==", 2025)]` skip the other years
+- dictionary encoding for the label columns (LOYAL_CODE, CODE_GROUP, DESC, User_Segment, ...)
+  and the low-cardinality counts; only PLAIN_COLS (HLL sketches: 2 KB random bytes) are stored plain
+- zstd compression
+
+Column dtypes are not changed, so readers get the same frame as before (up to row order).
+"""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from date_cols import month_year
+
+SORT_KEYS = ["year", "MONTH_IDX", "MONTH_NUM"]
+PLAIN_COLS = ["SKETCH"]
+COMPRESSION = "zstd"
+ROW_GROUP_ROWS = 250_000
+
+
+def sort_keys(df: pd.DataFrame) -> list[str]:
+    return [c for c in SORT_KEYS if c in df.columns]
+
+
+def _year_of_rows(df: pd.DataFrame) -> np.ndarray | None:
+    if "year" in df.columns:
+        return df["year"].to_numpy()
+    if "MONTH_IDX" in df.columns:
+        return month_year(df["MONTH_IDX"].to_numpy())
+    return None
+
+
+def year_slices(df: pd.DataFrame) -> list[tuple[int, int]]:
+    """(start, stop) row ranges of each year in a year-sorted frame (one range if there is no year)."""
+    years = _year_of_rows(df)
+    if years is None or len(df) == 0:
+        return [(0, len(df))]
+    cuts = np.flatnonzero(years[1:] != years[:-1]) + 1
+    bounds = [0, *cuts.tolist(), len(df)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def write_output(df: pd.DataFrame, path: str, keys: list[str] | None = None) -> int:
+    """Write one output with the profile above; returns the file size in bytes."""
+    keys = sort_keys(df) if keys is None else keys
+    if keys:
+        df = df.sort_values(keys, kind="stable", ignore_index=True)
+    else:
+        df = df.reset_index(drop=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    dict_cols = [c for c in df.columns if c not in PLAIN_COLS]
+
+    with pq.ParquetWriter(
+        path,
+        table.schema,
+        compression=COMPRESSION,
+        use_dictionary=dict_cols,
+        write_statistics=True,
+    ) as writer:
+        for start, stop in year_slices(df):
+            writer.write_table(table.slice(start, stop - start), row_group_size=ROW_GROUP_ROWS)
+
+    return os.path.getsize(path)
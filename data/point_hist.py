@@ -0,0 +1,73 @@
+"""
+point_hist.py
+
+Per-month histogram of user monthly points below the 1000 threshold (shared by
+the pipeline and data_loader).
+
+    hist = point_histogram(user_level_stat_monthly)     # MONTH_IDX x POINT_BIN -> Users
+    cutoff_counts(hist, [400, 500, 600])                # users with c <= points < 1000, per month
+
+POINT_BIN is the lower edge of a BIN_WIDTH-point bin (0, 10, ..., 990). The count
+for a cutoff is a reverse cumulative sum over the bins, so any cutoff on the
+bin grid is answered from the histogram without the user-level rows.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+BIN_WIDTH = 10
+POINT_LIMIT = 1000
+BIN_EDGES = np.arange(0, POINT_LIMIT, BIN_WIDTH)
+
+
+def point_histogram(users: pd.DataFrame, points_col: str = "user_total_point", by: str = "MONTH_IDX") -> pd.DataFrame:
+    """One pass over user-month rows -> dense (month x bin) counts of 0 <= points < POINT_LIMIT."""
+    points = users[points_col].to_numpy(dtype=float)
+    under = (points >= 0) & (points < POINT_LIMIT)
+
+    month_codes, months = pd.factorize(users[by], sort=True)
+    month_codes = month_codes[under]
+    bin_codes = points[under].astype(np.intp) // BIN_WIDTH  # points >= 0: truncation == floor
+
+    counts = np.bincount(
+        month_codes * len(BIN_EDGES) + bin_codes,
+        minlength=len(months) * len(BIN_EDGES),
+    ).reshape(len(months), len(BIN_EDGES))
+
+    return pd.DataFrame({
+        by: np.repeat(np.asarray(months), len(BIN_EDGES)),
+        "POINT_BIN": np.tile(BIN_EDGES, len(months)).astype("int16"),
+        "Users": counts.ravel().astype("int32"),
+    })
+
+
+def cutoff_table(hist: pd.DataFrame, by: str = "MONTH_IDX") -> pd.DataFrame:
+    """month x POINT_BIN matrix of users with POINT_BIN <= points < POINT_LIMIT (reverse cumsum)."""
+    dense = (
+        hist.pivot_table(index=by, columns="POINT_BIN", values="Users", aggfunc="sum", fill_value=0)
+        .reindex(columns=BIN_EDGES, fill_value=0)
+        .sort_index()
+    )
+    at_least = dense.to_numpy()[:, ::-1].cumsum(axis=1)[:, ::-1]
+    return pd.DataFrame(at_least, index=dense.index, columns=BIN_EDGES)
+
+
+def cutoff_counts(hist: pd.DataFrame, cutoffs: list[int], by: str = "MONTH_IDX") -> pd.DataFrame:
+    """
+    Long frame (by, Counts, cutoff "c+") for plotting, cutoff ordered as given.
+    Cutoffs are rounded down to the bin grid.
+    """
+    cutoffs = list(dict.fromkeys(int(c) for c in cutoffs))
+    table = cutoff_table(hist, by)
+    cols = [c // BIN_WIDTH * BIN_WIDTH for c in cutoffs]
+    labels = [f"{c}+" for c in cutoffs]
+
+    out = pd.DataFrame({
+        by: np.tile(table.index.to_numpy(), len(cols)),
+        "Counts": table[cols].to_numpy().T.ravel().astype("int64"),
+        "cutoff": np.repeat(labels, len(table)),
+    })
+    out["cutoff"] = pd.Categorical(out["cutoff"], categories=labels, ordered=True)
+    return out
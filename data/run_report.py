@@ -0,0 +1,267 @@
+"""
+run_report.py
+
+Per-stage / per-step instrumentation of the precompute pipeline.
+
+    with step("page4"):              # a stage (or any block)
+        ...
+
+    @instrument                      # a sub-step: rows in / out taken from the
+    def build_xxx(df, ...): ...      # first DataFrame / pa.Table argument and the result
+
+Every step records wall time, CPU time, peak RSS above the RSS at start,
+input / output rows and bytes. @instrument counts the in-memory DataFrames of
+its own step; file reads / writes (load_base, save_outputs, ...) call
+track_input / track_output, which count for every open step, so a stage shows
+the rows / bytes it read and wrote. Nested steps are named "stage/step".
+
+Stage workers return their records (`take_records`) and the parent writes one
+report per run:
+
+    pre_computed_data/_state/run_reports/run_<run_id>.json   (this run)
+    pre_computed_data/_state/run_reports/history.pqt         (all runs, one row per step)
+
+`print_summary` shows the slowest steps and the change against the previous run.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import platform
+import resource
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+
+REPORT_COLS = [
+    "run_id", "step", "kind", "status",
+    "wall_s", "cpu_s", "peak_rss_delta_mb",
+    "rows_in", "rows_out", "bytes_in", "bytes_out",
+]
+
+_records: list[dict] = []
+_stack: list[dict] = []
+
+
+# =========================
+# MEMORY
+# =========================
+
+def _proc_status_kb(key: str) -> int | None:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _rss_bytes() -> int:
+    kb = _proc_status_kb("VmRSS")
+    return kb * 1024 if kb is not None else _peak_rss_bytes()
+
+
+def _peak_rss_bytes() -> int:
+    kb = _proc_status_kb("VmHWM")
+    if kb is not None:
+        return kb * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # linux: kB
+
+
+def _reset_peak_rss() -> None:
+    """Linux: restart the VmHWM high-water mark (elsewhere the peak is process-wide)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+# =========================
+# STEPS
+# =========================
+
+@contextmanager
+def step(name: str, kind: str = "step"):
+    """Measure the enclosed block; yields the record (extra keys may be set on it)."""
+    # close the parent's peak window before resetting the counter
+    if _stack:
+        _stack[-1]["_peak"] = max(_stack[-1]["_peak"], _peak_rss_bytes())
+    _reset_peak_rss()
+
+    rec = {
+        "step": f"{_stack[-1]['step']}/{name}" if _stack else name,
+        "kind": kind,
+        "status": "ok",
+        "rows_in": 0,
+        "rows_out": 0,
+        "bytes_in": 0,
+        "bytes_out": 0,
+        "_rss0": _rss_bytes(),
+        "_peak": 0,
+    }
+    _stack.append(rec)
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield rec
+    except BaseException:
+        rec["status"] = "error"
+        raise
+    finally:
+        rec["wall_s"] = round(time.perf_counter() - wall0, 3)
+        rec["cpu_s"] = round(time.process_time() - cpu0, 3)
+        peak = max(rec.pop("_peak"), _peak_rss_bytes())
+        rec["peak_rss_delta_mb"] = round(max(peak - rec.pop("_rss0"), 0) / 1024**2, 1)
+        _stack.pop()
+        if _stack:
+            _stack[-1]["_peak"] = max(_stack[-1]["_peak"], peak)
+        _records.append(rec)
+
+
+def _count(obj) -> tuple[int, int]:
+    if isinstance(obj, pd.DataFrame):
+        return len(obj), int(obj.memory_usage(index=False, deep=False).sum())
+    if isinstance(obj, pa.Table):
+        return obj.num_rows, obj.nbytes
+    if isinstance(obj, dict):
+        rows = nbytes = 0
+        for v in obj.values():
+            r, b = _count(v)
+            rows, nbytes = rows + r, nbytes + b
+        return rows, nbytes
+    return 0, 0
+
+
+def track_input(rows: int, nbytes: int = 0) -> None:
+    """Attribute input rows / bytes to every open step."""
+    for rec in _stack:
+        rec["rows_in"] += int(rows)
+        rec["bytes_in"] += int(nbytes)
+
+
+def track_output(rows: int, nbytes: int = 0) -> None:
+    """Attribute output rows / bytes (e.g. parquet file size) to every open step."""
+    for rec in _stack:
+        rec["rows_out"] += int(rows)
+        rec["bytes_out"] += int(nbytes)
+
+
+def instrument(func):
+    """Decorator: run `func` as a sub-step named after it (in-memory rows / bytes)."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with step(func.__name__) as rec:
+            first_df = next((a for a in args if isinstance(a, (pd.DataFrame, pa.Table))), None)
+            if first_df is not None:
+                rows, nbytes = _count(first_df)
+                rec["rows_in"] += rows
+                rec["bytes_in"] += nbytes
+            out = func(*args, **kwargs)
+            rows, nbytes = _count(out)
+            rec["rows_out"] += rows
+            rec["bytes_out"] += nbytes
+            return out
+
+    return wrapper
+
+
+def take_records() -> list[dict]:
+    """Records collected in this process since the last call (worker -> parent)."""
+    out = list(_records)
+    _records.clear()
+    return out
+
+
+def skipped(name: str) -> dict:
+    return {
+        "step": name, "kind": "stage", "status": "skipped",
+        "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_delta_mb": 0.0,
+        "rows_in": 0, "rows_out": 0, "bytes_in": 0, "bytes_out": 0,
+    }
+
+
+# =========================
+# REPORT
+# =========================
+
+def new_run_id() -> str:
+    """Sortable by start time (previous_run compares ids); microseconds + pid so runs in the same second differ."""
+    return f"{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}"
+
+
+def write_report(records: list[dict], report_dir: str, run_id: str, meta: dict | None = None) -> pd.DataFrame:
+    """run_<run_id>.json for this run + append to history.pqt (comparable across runs)."""
+    os.makedirs(report_dir, exist_ok=True)
+
+    df = pd.DataFrame(records)
+    df.insert(0, "run_id", run_id)
+    df = df.reindex(columns=REPORT_COLS)
+
+    meta = {
+        "run_id": run_id,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        **(meta or {}),
+    }
+
+    with open(os.path.join(report_dir, f"run_{run_id}.json"), "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "steps": df.to_dict(orient="records")}, f, indent=2, default=str)
+
+    history_path = os.path.join(report_dir, "history.pqt")
+    hist = df.assign(base_rows=meta.get("base_rows"))
+    if os.path.exists(history_path):
+        hist = pd.concat([pd.read_parquet(history_path), hist], ignore_index=True)
+    hist.to_parquet(history_path, index=False)
+
+    return df
+
+
+def previous_run(report_dir: str, run_id: str) -> pd.DataFrame | None:
+    history_path = os.path.join(report_dir, "history.pqt")
+    if not os.path.exists(history_path):
+        return None
+    hist = pd.read_parquet(history_path)
+    older = hist[hist["run_id"] < run_id]
+    if older.empty:
+        return None
+    return older[older["run_id"] == older["run_id"].max()]
+
+
+def _by_step(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per step name (a helper called twice in a stage is summed)."""
+    num = ["wall_s", "cpu_s", "rows_in", "rows_out", "bytes_in", "bytes_out"]
+    agg = {c: "sum" for c in num}
+    agg["peak_rss_delta_mb"] = "max"
+    agg["status"] = "first"
+    return df.groupby("step", sort=False).agg(agg).reset_index()
+
+
+def print_summary(df: pd.DataFrame, prev: pd.DataFrame | None = None, top: int = 25) -> None:
+    view = _by_step(df[df["status"] != "skipped"]).sort_values("wall_s", ascending=False).head(top)
+    if prev is not None:
+        prev_wall = _by_step(prev[prev["status"] == "ok"]).set_index("step")["wall_s"]
+        view["vs_prev"] = [
+            f"{(w / prev_wall[s] - 1) * 100:+.0f}%" if s in prev_wall.index and prev_wall[s] > 0 else ""
+            for s, w in zip(view["step"], view["wall_s"])
+        ]
+
+    n_skipped = int((df["status"] == "skipped").sum())
+
+    print("\n" + "=" * 60)
+    print("[REPORT] slowest steps" + (f" ({n_skipped} stages skipped)" if n_skipped else ""))
+    print("=" * 60)
+    cols = ["step", "wall_s", "cpu_s", "peak_rss_delta_mb", "rows_in", "rows_out", "bytes_out"]
+    if "vs_prev" in view.columns:
+        cols.append("vs_prev")
+    with pd.option_context("display.width", 200, "display.max_colwidth", 60):
+        print(view[cols].to_string(index=False))
@@ -0,0 +1,188 @@
+"""
+segments.py
+
+User-month segmentation shared by page 4 (pipeline, English labels) and page 5
+(data_loader, Mongolian labels).
+
+    users = add_flags(users)                        # Reached_1000_Flag, Inactive
+    thr = segment_thresholds(users, by=["year"])    # every year in one grouped quantile
+    users["User_Segment"] = assign_segments(users, thr, by=["year"], lang="en")
+
+Thresholds (per group):
+
+    under (not reached 1000, not inactive):  txn_q25 / txn_q75, days_q25 / days_q75, points_q25 / points_q75
+    achievers (reached 1000):                achievers_txn_q25, achievers_points_q25
+    (a group without users in a population gets NaN)
+
+Segments (first match wins, same as the original .loc write order reversed):
+
+    Inactive               Transaction_Count <= 1
+    Achiever               Total_Points >= 1000
+    High_Effort            Transaction_Count >= achievers_txn_q25
+    Explorer               Transaction_Count <  txn_q75 and Active_Days <= days_q75
+    Consistent             Transaction_Count >= txn_q75 and Active_Days >  days_q75
+    Irregular_Participant  everyone else
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+ACHIEVER_POINTS = 1000
+
+SEGMENTS = ["Inactive", "Achiever", "High_Effort", "Explorer", "Consistent", "Irregular_Participant"]
+
+SEGMENT_LABELS = {
+    "en": {s: s for s in SEGMENTS},
+    "mn": {
+        "Inactive": "Идэвхгүй",
+        "Achiever": "Амжилттай",
+        "High_Effort": "Их_чармайлттай",
+        "Explorer": "Туршигч",
+        "Consistent": "Тогтвортой",
+        "Irregular_Participant": "Тогтмол_бус_оролцогч",
+    },
+}
+
+# threshold name -> (population, column, quantile)
+THRESHOLDS = {
+    "txn_q25": ("under", "Transaction_Count", 0.25),
+    "txn_q75": ("under", "Transaction_Count", 0.75),
+    "days_q25": ("under", "Active_Days", 0.25),
+    "days_q75": ("under", "Active_Days", 0.75),
+    "points_q25": ("under", "Total_Points", 0.25),
+    "points_q75": ("under", "Total_Points", 0.75),
+    "achievers_txn_q25": ("achievers", "Transaction_Count", 0.25),
+    "achievers_points_q25": ("achievers", "Total_Points", 0.25),
+}
+
+
+def add_flags(users: pd.DataFrame) -> pd.DataFrame:
+    users["Reached_1000_Flag"] = (users["Total_Points"] >= ACHIEVER_POINTS).astype("int8")
+    users["Inactive"] = (users["Transaction_Count"] <= 1).astype("int8")
+    return users
+
+
+def segment_thresholds(users: pd.DataFrame, by: list[str] | None = None) -> pd.DataFrame:
+    """One row per `by` group (by=None: one row for the whole frame), one column per THRESHOLDS entry."""
+    by = list(by or [])
+    keys = by or ["_all"]
+
+    population = np.where(
+        users["Reached_1000_Flag"].to_numpy() == 1,
+        "achievers",
+        np.where(users["Inactive"].to_numpy() == 0, "under", ""),
+    )
+    cols = sorted({col for _, col, _ in THRESHOLDS.values()})
+    quantiles = sorted({q for _, _, q in THRESHOLDS.values()})
+
+    frame = users[by + cols].assign(_pop=population)
+    if not by:
+        frame["_all"] = 0
+    frame = frame[frame["_pop"] != ""]
+
+    # every group x population x column x quantile in one grouped quantile
+    q = frame.groupby(keys + ["_pop"], observed=True)[cols].quantile(quantiles)
+    q.index = q.index.set_names(keys + ["_pop", "_q"])
+    q = q.unstack(["_pop", "_q"])
+
+    groups = users[by].drop_duplicates().sort_values(by) if by else pd.DataFrame({"_all": [0]})
+    out = groups.reset_index(drop=True)
+    idx = pd.MultiIndex.from_frame(out[keys]) if len(keys) > 1 else pd.Index(out[keys[0]])
+    for name, (pop, col, quant) in THRESHOLDS.items():
+        key = (col, pop, quant)
+        out[name] = q[key].reindex(idx).to_numpy(dtype=float) if key in q.columns else np.nan
+
+    return out.drop(columns=["_all"], errors="ignore")
+
+
+def assign_segments(
+    users: pd.DataFrame,
+    thresholds: pd.DataFrame | dict,
+    by: list[str] | None = None,
+    lang: str = "en",
+) -> pd.Categorical:
+    """User_Segment for every row; `thresholds` = segment_thresholds(users, by) or one dict."""
+    by = list(by or [])
+    used = ("txn_q75", "days_q75", "achievers_txn_q25")
+    if isinstance(thresholds, pd.DataFrame) and not by:
+        thresholds = thresholds.iloc[0].to_dict()
+
+    if isinstance(thresholds, dict):
+        row = {k: np.full(len(users), thresholds[k], dtype=float) for k in used}
+    else:
+        th = thresholds.set_index(by)
+        pos = th.index.get_indexer(pd.MultiIndex.from_frame(users[by]) if len(by) > 1 else users[by[0]])
+        row = {k: th[k].to_numpy(dtype=float)[pos] for k in used}
+
+    txn = users["Transaction_Count"].to_numpy()
+    days = users["Active_Days"].to_numpy()
+
+    codes = np.select(
+        [
+            users["Inactive"].to_numpy() == 1,
+            users["Reached_1000_Flag"].to_numpy() == 1,
+            txn >= row["achievers_txn_q25"],
+            (txn < row["txn_q75"]) & (days <= row["days_q75"]),
+            (txn >= row["txn_q75"]) & (days > row["days_q75"]),
+        ],
+        [0, 1, 2, 3, 4],
+        default=5,
+    ).astype("int8")
+
+    labels = [SEGMENT_LABELS[lang][s] for s in SEGMENTS]
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+# =========================
+# ACHIEVER PROFILE (page 5)
+# =========================
+
+PROFILE_EXCLUDED_CODES = ["10K_PURCH_INSUR"]
+
+
+def user_month_keys(df: pd.DataFrame, with_year: bool = True) -> np.ndarray:
+    """int64 key per row: (year * 12 + month - 1 | month) << 32 | CUST_ID."""
+    month = df["MONTH_NUM"].to_numpy().astype(np.int64)
+    if with_year:
+        month = df["year"].to_numpy().astype(np.int64) * 12 + month - 1  # date_cols.month_idx
+    return (month << 32) | df["CUST_ID"].to_numpy().astype(np.int64)
+
+
+def achiever_month_profile(df: pd.DataFrame, users: pd.DataFrame, with_year: bool = True) -> pd.DataFrame:
+    """
+    Share of each LOYAL_CODE in the month's points (x1000) for achiever user-months only.
+
+    df    : transactions (CUST_ID, MONTH_NUM, LOYAL_CODE, TXN_AMOUNT [, year])
+    users : user-month rows with Reached_1000_Flag
+
+    Transactions are filtered with a sorted key index of the achiever months
+    (searchsorted, no merge); code sums and the month total come from one
+    groupby + transform, so the cost follows achiever transactions only.
+    """
+    keys = (["year"] if with_year else []) + ["CUST_ID", "MONTH_NUM"]
+
+    achiever_keys = np.unique(user_month_keys(users[users["Reached_1000_Flag"] == 1], with_year))
+    row_keys = user_month_keys(df, with_year)
+    pos = np.searchsorted(achiever_keys, row_keys).clip(max=max(len(achiever_keys) - 1, 0))
+    is_achiever = achiever_keys[pos] == row_keys if len(achiever_keys) else np.zeros(len(df), dtype=bool)
+
+    df_ach = df.loc[is_achiever, keys + ["LOYAL_CODE", "TXN_AMOUNT"]]
+
+    profile = (
+        df_ach.groupby(keys + ["LOYAL_CODE"], observed=True, dropna=False)["TXN_AMOUNT"]
+        .sum()
+        .reset_index()
+    )
+    return normalize_profile(profile, keys)
+
+
+def normalize_profile(profile: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Code sums (keys + LOYAL_CODE incl. missing, TXN_AMOUNT) -> Normalized_Points of the kept codes."""
+    monthly_total = profile.groupby(keys, observed=True)["TXN_AMOUNT"].transform("sum")
+
+    keep = profile["LOYAL_CODE"].notna() & ~profile["LOYAL_CODE"].isin(PROFILE_EXCLUDED_CODES)
+    profile["Normalized_Points"] = profile["TXN_AMOUNT"] / monthly_total * 1000
+
+    return profile.loc[keep, keys + ["LOYAL_CODE", "Normalized_Points"]].reset_index(drop=True)
@@ -0,0 +1,313 @@
+"""
+stage_graph.py
+
+Tiny make-style scheduler for the precompute pipeline.
+
+A stage is a dict:
+
+    {
+        "deps":    ["facts", ...],          # stages whose outputs this stage reads
+        "inputs":  ["loyalty_lookup_2.csv"],  # external files (raw parquet, lookup csv), optional
+        "version": 1,                       # bump when the stage logic changes
+        "outputs": ["pre_computed_data/page4/users_agg_df.pqt", ...],
+        "run":     callable,                # top-level function (must be picklable)
+    }
+
+- `select_stages` resolves CLI targets (stage names or output file names) to the stages
+  to run: the targets themselves + any dependency whose outputs do not exist yet
+  (with a manifest: every upstream stage, the cache skips the fresh ones).
+- `run_stages` runs them in dependency order; independent stages run in parallel
+  on a process pool (workers=1 -> plain serial loop in this process).
+
+Caching (manifest_path given):
+
+    fingerprint(stage) = hash(version, fingerprint of each input file,
+                              output checksums of each dep stage)
+
+A stage whose fingerprint matches the manifest and whose outputs still have the
+recorded checksums is skipped. Because deps enter through their OUTPUT checksums,
+a rebuilt upstream stage that produces identical files does not invalidate anything
+downstream.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pyarrow.parquet as pq
+
+from run_report import skipped, step, take_records
+
+# files above this size are fingerprinted from metadata instead of hashing every byte
+HASH_BYTES_LIMIT = 256 * 1024 * 1024
+
+
+def outputs_exist(stage: dict) -> bool:
+    return all(os.path.exists(p) for p in stage["outputs"])
+
+
+# =========================
+# FINGERPRINTS
+# =========================
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _sha256_json(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def parquet_stats_fingerprint(path: str) -> str:
+    """Footer only: schema, row counts, sizes and min/max/null stats of every row group."""
+    pf = pq.ParquetFile(path)
+    meta = pf.metadata.to_dict()
+    meta.pop("created_by", None)
+    return "stats:" + _sha256_json(
+        {"size": os.path.getsize(path), "schema": str(pf.schema_arrow), "meta": meta}
+    )
+
+
+def fingerprint_path(path: str) -> str:
+    """
+    Content checksum of a file or folder (partitioned dataset).
+    Small files: sha256 of the bytes. Big parquet: footer statistics.
+    Other big files: size + mtime.
+    """
+    if os.path.isdir(path):
+        parts = {}
+        for root, _, files in os.walk(path):
+            for name in files:
+                full = os.path.join(root, name)
+                parts[os.path.relpath(full, path)] = fingerprint_path(full)
+        return "dir:" + _sha256_json(parts)
+
+    if not os.path.exists(path):
+        return "missing"
+
+    size = os.path.getsize(path)
+    if size <= HASH_BYTES_LIMIT:
+        return "sha256:" + _sha256_file(path)
+    if path.endswith((".parquet", ".pqt")):
+        return parquet_stats_fingerprint(path)
+    return f"size-mtime:{size}:{os.stat(path).st_mtime_ns}"
+
+
+def stage_fingerprint(stage: dict, manifest: dict, input_cache: dict | None = None) -> str:
+    input_cache = {} if input_cache is None else input_cache
+    inputs = {}
+    for path in stage.get("inputs", []):
+        if path not in input_cache:
+            input_cache[path] = fingerprint_path(path)
+        inputs[path] = input_cache[path]
+
+    return _sha256_json(
+        {
+            "version": stage.get("version", 0),
+            "inputs": inputs,
+            "deps": {d: manifest.get(d, {}).get("outputs") for d in stage["deps"]},
+        }
+    )
+
+
+def is_fresh(stage: dict, fingerprint: str, entry: dict | None) -> bool:
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return False
+    recorded = entry.get("outputs", {})
+    return all(
+        os.path.exists(p) and recorded.get(p) == fingerprint_path(p)
+        for p in stage["outputs"]
+    )
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("stages", {})
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"stages": manifest}, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def record_stage(name: str, stage: dict, fingerprint: str, manifest: dict) -> None:
+    manifest[name] = {
+        "fingerprint": fingerprint,
+        "version": stage.get("version", 0),
+        "inputs": {p: fingerprint_path(p) for p in stage.get("inputs", [])},
+        "outputs": {p: fingerprint_path(p) for p in stage["outputs"]},
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def record_stages(stages: dict[str, dict], manifest_path: str) -> None:
+    """Mark the current outputs of every stage as up to date (after an out-of-graph update)."""
+    manifest = {}
+    for name in topological_order(stages):
+        if outputs_exist(stages[name]):
+            record_stage(name, stages[name], stage_fingerprint(stages[name], manifest), manifest)
+    save_manifest(manifest_path, manifest)
+
+
+def topological_order(stages: dict[str, dict]) -> list[str]:
+    order, state = [], {}
+
+    def visit(name: str, path: tuple = ()) -> None:
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Stage cycle: {' -> '.join(path + (name,))}")
+        if name not in stages:
+            raise KeyError(f"Unknown stage dependency: {name}")
+        state[name] = "visiting"
+        for dep in stages[name]["deps"]:
+            visit(dep, path + (name,))
+        state[name] = "done"
+        order.append(name)
+
+    for name in stages:
+        visit(name)
+    return order
+
+
+def resolve_target(stages: dict[str, dict], target: str) -> str:
+    """Stage name, or the (base)name of one of its output files."""
+    if target in stages:
+        return target
+    for name, stage in stages.items():
+        for out in stage["outputs"]:
+            if target in (out, os.path.basename(out), os.path.splitext(os.path.basename(out))[0]):
+                return name
+    raise KeyError(f"Unknown target: {target} (stages: {', '.join(stages)})")
+
+
+def select_stages(
+    stages: dict[str, dict],
+    targets: list[str] | None = None,
+    all_deps: bool = False,
+) -> list[str]:
+    """Stages to run, in topological order (all_deps=True: whole upstream, for the cache to check)."""
+    order = topological_order(stages)
+    if not targets:
+        return order
+
+    wanted = {resolve_target(stages, t) for t in targets}
+
+    selected = set()
+
+    def add(name: str) -> None:
+        if name in selected:
+            return
+        selected.add(name)
+        for dep in stages[name]["deps"]:
+            if not all_deps and dep not in wanted and outputs_exist(stages[dep]):
+                continue  # already built -> reuse
+            add(dep)
+
+    for name in wanted:
+        add(name)
+
+    return [n for n in order if n in selected]
+
+
+def _run_one(name: str, func) -> tuple[str, float, list[dict]]:
+    """Runs in the worker: the stage + its instrumentation records (see run_report)."""
+    t0 = time.perf_counter()
+    with step(name, kind="stage"):
+        func()
+    return name, time.perf_counter() - t0, take_records()
+
+
+def run_stages(
+    stages: dict[str, dict],
+    selected: list[str],
+    workers: int | None = None,
+    manifest_path: str | None = None,
+    force: bool = False,
+) -> list[dict]:
+    """
+    Run `selected` respecting deps; independent stages in parallel.
+    With `manifest_path`, stages whose fingerprint is unchanged are skipped
+    (force=True rebuilds them anyway) and the manifest is updated after every stage.
+    Returns the run_report records of all stages / sub-steps.
+    """
+    workers = workers or min(len(selected), os.cpu_count() or 1)
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    input_cache = {}
+    fingerprints = {}
+    records = []
+
+    def cached(name: str) -> bool:
+        if not manifest_path:
+            return False
+        fingerprints[name] = stage_fingerprint(stages[name], manifest, input_cache)
+        if not force and is_fresh(stages[name], fingerprints[name], manifest.get(name)):
+            print(f"[DAG] skip {name} (unchanged)")
+            records.append(skipped(name))
+            return True
+        return False
+
+    def finished(name: str, sec: float) -> None:
+        print(f"[DAG] done {name} ({sec:.1f}s)")
+        if manifest_path:
+            record_stage(name, stages[name], fingerprints[name], manifest)
+            save_manifest(manifest_path, manifest)
+
+    if workers <= 1:
+        for name in selected:
+            if cached(name):
+                continue
+            print(f"\n[DAG] run {name}")
+            _, sec, recs = _run_one(name, stages[name]["run"])
+            records.extend(recs)
+            finished(name, sec)
+        return records
+
+    pending = list(selected)
+    done = set()
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            progressed = True
+            while progressed:  # a skipped stage can unblock others right away
+                progressed = False
+                ready = [
+                    n for n in pending
+                    if all(d in done or d not in selected for d in stages[n]["deps"])
+                ]
+                for name in ready:
+                    pending.remove(name)
+                    if cached(name):
+                        done.add(name)
+                        progressed = True
+                        continue
+                    print(f"[DAG] submit {name}")
+                    running[pool.submit(_run_one, name, stages[name]["run"])] = name
+
+            if not running:
+                if pending:
+                    raise RuntimeError(f"Stages cannot be scheduled: {pending}")
+                break
+
+            finished_futs, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished_futs:
+                name = running.pop(fut)
+                _, sec, recs = fut.result()  # re-raises the stage error
+                records.extend(recs)
+                done.add(name)
+                finished(name, sec)
+
+    return records
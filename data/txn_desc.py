@@ -0,0 +1,131 @@
+"""
+txn_desc.py
+
+TXN_DESC normalization + keyword classification.
+
+Descriptions repeat heavily (a few thousand distinct strings for millions of
+rows), so every string operation runs on the DISTINCT values only:
+
+    factorize_desc      raw column -> categorical (one hash pass over the rows)
+    desc_is_test        "Тест" rows (the pipeline drops them)
+    normalize_txn_desc  clean text + LOYAL_CODE overrides, broadcast back by code
+    classify_desc       the same per distinct value, rows left as codes (arrow backend)
+
+Rules (same as the original per-row chain):
+
+    text     : strip, "Крипто Вик" / "Кривто Вик" -> "Crypto Week", drop ".", lower
+    override : "crypto week"          -> LOYAL_CODE = ARD_LOTTO
+               lotto | 6/42 | лотто   -> LOYAL_CODE = 10K_GET_LOTTO (unless crypto week)
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+TEST_DESC = "Тест"
+
+DESC_REPLACEMENTS = [
+    ("Крипто Вик", "Crypto Week"),
+    ("Кривто Вик", "Crypto Week"),
+    (".", ""),
+]
+
+CRYPTO_WEEK_PATTERN = "crypto week"
+CRYPTO_WEEK_CODE = "ARD_LOTTO"
+
+LOTTO_PATTERN = r"lotto|6/42|лотто"
+LOTTO_CODE = "10K_GET_LOTTO"
+
+# everything above, for the pipeline cache (code_grouped stage version)
+TXN_DESC_RULES = {
+    "test": TEST_DESC,
+    "replace": DESC_REPLACEMENTS,
+    "crypto_week": [CRYPTO_WEEK_PATTERN, CRYPTO_WEEK_CODE],
+    "lotto": [LOTTO_PATTERN, LOTTO_CODE],
+}
+
+
+# =========================
+# DISTINCT VALUES
+# =========================
+
+def factorize_desc(desc: pd.Series) -> pd.Series:
+    """Raw TXN_DESC -> categorical (first-seen order, NaN kept as missing)."""
+    if isinstance(desc.dtype, pd.CategoricalDtype):
+        return desc
+    codes, uniques = pd.factorize(desc, use_na_sentinel=True)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=uniques),
+        index=desc.index,
+        name=desc.name,
+    )
+
+
+def _categories_text(desc: pd.Series) -> tuple[np.ndarray, pd.Series]:
+    """
+    Row codes into the distinct values + the distinct values as stripped strings.
+    Missing rows point at an extra "" entry appended at the end (= fillna("")).
+    """
+    cats = desc.cat.categories
+    codes = desc.cat.codes.to_numpy().astype(np.intp)
+    codes[codes < 0] = len(cats)
+
+    text = pd.Series(np.append(np.asarray(cats, dtype=object), ""), dtype=object)
+    return codes, text.astype(str).str.strip()
+
+
+def desc_is_test(desc: pd.Series) -> np.ndarray:
+    """Row mask of "Тест" descriptions (desc: output of factorize_desc)."""
+    codes, text = _categories_text(desc)
+    return (text == TEST_DESC).to_numpy()[codes]
+
+
+def clean_desc_unique(text: pd.Series) -> tuple[pd.Series, np.ndarray]:
+    """Normalized text + LOYAL_CODE override (None = keep) for stripped distinct values."""
+    for old, new in DESC_REPLACEMENTS:
+        text = text.str.replace(old, new, regex=False)
+    text = text.str.lower()
+
+    crypto_week = text.str.contains(CRYPTO_WEEK_PATTERN, case=False, na=False).to_numpy()
+    lotto = text.str.contains(LOTTO_PATTERN, case=False, na=False).to_numpy()
+
+    override = np.full(len(text), None, dtype=object)
+    override[lotto & ~crypto_week] = LOTTO_CODE
+    override[crypto_week] = CRYPTO_WEEK_CODE
+    return text, override
+
+
+# =========================
+# APPLY
+# =========================
+
+def classify_desc(desc: pd.Series) -> tuple[np.ndarray, pd.Series, np.ndarray]:
+    """
+    Row codes + clean text / LOYAL_CODE override per distinct description
+    (missing rows point at the extra "" entry at the end). For callers that keep
+    the rows encoded (arrow backend) instead of per-row strings.
+    """
+    codes, text = _categories_text(factorize_desc(desc))
+    clean, override = clean_desc_unique(text)
+    return codes, clean, override
+
+
+def normalize_txn_desc(desc: pd.Series, loyal_code: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Cleaned TXN_DESC (object strings) + LOYAL_CODE with the keyword overrides.
+
+    The rules run once per distinct description; rows get their text through
+    the category codes and the overrides through indexed assignment.
+    """
+    codes, clean, override = classify_desc(desc)
+
+    out_desc = pd.Series(clean.to_numpy()[codes], index=desc.index, name=desc.name)
+
+    rows = np.flatnonzero(pd.notna(override)[codes])
+    if len(rows) == 0:
+        return out_desc, loyal_code
+
+    out_code = loyal_code.to_numpy(dtype=object, copy=True)
+    out_code[rows] = override[codes[rows]]
+    return out_desc, pd.Series(out_code, index=loyal_code.index, name=loyal_code.name)
@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from data.data_loader import load_data, get_lookup
+from data.data_loader import load_data, get_lookup, count_customers
 import time
 
-df = load_data()
+df = load_data(columns=("TXN_DATE", "CUST_ID", "TXN_AMOUNT", "LOYAL_CODE"))
 
 st.title('АРДЫН ЭРХ ОНООНЫ ДАТАСЕТ ТОВЧ ТАЙЛАН')
 st.caption(f'Descriptive Analysis Report ({str(df.TXN_DATE.min()).split()[0]} - {str(df.TXN_DATE.max()).split()[0]})')
@@ -57,7 +57,7 @@ with st.expander('Датасетийн ерөнхий мэдээлэл', expande
 
     with analysis_col2:
         st.info("**CUST_CODE & DATE**")
-        st.write(f"* **Нийт өвөрмөц хэрэглэгч:** {df.CUST_CODE.nunique():,} хэрэглэгч")
+        st.write(f"* **Нийт өвөрмөц хэрэглэгч:** {count_customers(df.CUST_ID):,} хэрэглэгч")
         st.write(f"* **Хугацаа:** 2024.01.01 – 2025.12.31")
     
 
@@ -5,37 +5,33 @@ import plotly.express as px
 
 # Import your loaders
 from data.data_loader import (
-    load_data, get_lookup,
+    get_lookup, distinct_users, output_years, MISC_COUNTS_KEY,
     load_precomputed_page_misc_counts,
     load_precomputed_page_misc_loyal_avg,
     load_precomputed_page_misc_reach_frequency,
 )
+from data.date_cols import with_month_label
 
-# 1. CACHED DATA LOADING (Moves data to memory once, prevents re-reading disk)
-@st.cache_data(show_spinner="Өгөгдөл ачаалж байна...")
-def get_all_data():
-    df, lookup = load_data(), get_lookup()
-    counts = load_precomputed_page_misc_counts()
-    loyal_avg = load_precomputed_page_misc_loyal_avg()
-    reach = load_precomputed_page_misc_reach_frequency()
-    return df, lookup, counts, loyal_avg, reach
-
-# Initialize Data
-df, loyal_code_to_desc, counts_all, loyal_avg_all, reach_freq_all = get_all_data()
+loyal_code_to_desc = get_lookup()
 
 # --- Sidebar ---
-available_years = sorted(counts_all["year"].dropna().astype(int).unique())
+available_years = output_years(MISC_COUNTS_KEY)
 selected_year = st.sidebar.selectbox("Жил сонгох", available_years, index=len(available_years) - 1)
 
+# 1. DATA LOADING: only the selected year is read (loaders cache per year / columns)
+with st.spinner("Өгөгдөл ачаалж байна..."):
+    counts_year = load_precomputed_page_misc_counts(selected_year)
+    loyal_avg_year = load_precomputed_page_misc_loyal_avg(selected_year)
+    reach_freq_year = load_precomputed_page_misc_reach_frequency(selected_year)
+
 # --- Tabs ---
 tab1, tab2 = st.tabs(['Хэрэглэгчдийн Онооны Тархалт', '1000 Хүрсэн Хэрэглэгчдийн Онооны Тархалт'])
 
 bucket_order = ['0-49','50-99','100-199','200-299','300-399','400-499','500-599','600-699','700-799','800-899','900-999','1000+']
 
 with tab1:
-    # Filter only what we need for this year to save RAM
-    counts = counts_all[counts_all["year"] == selected_year].copy()
-    loyal_avg = loyal_avg_all[loyal_avg_all["year"] == selected_year].copy()
+    counts = with_month_label(counts_year)
+    loyal_avg = loyal_avg_year
 
     # --- Plot 1: Points Distribution ---
     fig1 = px.bar(
@@ -85,9 +81,8 @@ with tab1:
         target_code = "10K_TRANSACTION"
         target_row = loyal_avg[loyal_avg["LOYAL_CODE"] == target_code]
         
-        # We avoid running .nunique() on the full DF if possible. 
-        # If you MUST use it, filter df specifically for the code first.
-        target_users = df[df["LOYAL_CODE"] == target_code]["CUST_CODE"].nunique() if "LOYAL_CODE" in df.columns else 0
+        # Headline number: exact count over all years (CUST_ID / LOYAL_CODE columns only), not the sketch estimate
+        target_users = distinct_users(loyal_codes=[target_code], exact=True)
 
         st.markdown(f"""
         #### Гүйлгээний шинжилгээ ({selected_year})
@@ -96,7 +91,7 @@ with tab1:
         """)
 
 with tab2:
-    reach_frequency = reach_freq_all[reach_freq_all["year"] == selected_year].copy()
+    reach_frequency = reach_freq_year
 
     fig3 = px.bar(
         reach_frequency,
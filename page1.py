@@ -5,11 +5,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from data.data_loader import load_precomputed_page1
+from data.point_hist import BIN_WIDTH, POINT_LIMIT, cutoff_counts
+from data.date_cols import month_label_table, month_year, with_month_label
 st.title("ХЭРЭГЛЭГЧДИЙН ОНООНЫ ТАРХАЦ")
 
 color_2025 = "#3498DB"
 
-user_level_stat_monthly, monthly_reward_stat, segment_counts_all = load_precomputed_page1()
+user_level_stat_monthly, monthly_reward_stat, point_hist = load_precomputed_page1(
+    columns={"user_level_stat_monthly": ["CUST_ID", "month_num"]}
+)
+monthly_reward_stat = with_month_label(monthly_reward_stat)  # 1 row per month
 
 tab1, tab2, tab3 = st.tabs(
     [
@@ -86,14 +91,29 @@ with tab3:
         )
 
     with st.expander(label="Хүснэгт харах:", expanded=False):
-        st.dataframe(monthly_reward_stat, hide_index=True)
+        st.dataframe(month_label_table(monthly_reward_stat), hide_index=True)
 
 
 # ---------------- TAB 2 ----------------
 with tab2:
-    cutoffs = [400, 500, 600, 700, 800, 900]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        low, high = st.slider(
+            "Онооны босго",
+            min_value=0,
+            max_value=POINT_LIMIT - BIN_WIDTH,
+            value=(400, 900),
+            step=BIN_WIDTH,
+        )
+    with col2:
+        cutoff_step = st.select_slider("Алхам", options=[10, 20, 50, 100, 200], value=100)
+
+    cutoffs = list(range(low, high + 1, cutoff_step))
+    if cutoffs[-1] != high:
+        cutoffs.append(high)
 
-    
+    # users with cutoff <= points < 1000, per month (reverse cumsum of the point histogram)
+    segment_counts_all = with_month_label(cutoff_counts(point_hist, cutoffs))
 
     fig = px.line(
         segment_counts_all,
@@ -111,7 +131,7 @@ with tab2:
 
     with st.expander("Тайлбар", expanded=True):
         st.subheader("2025 ОНЫ ХЭРЭГЛЭГЧДИЙН ОНООНЫ CUT-OFF СЕГМЕНТИЙН ШИНЖИЛГЭЭ")
-        st.caption("Онооны босго (cumulative): 400+ | 500+ | 600+ | 700+ | 800+ | 900+")
+        st.caption("Онооны босго (cumulative): " + " | ".join(f"{c}+" for c in cutoffs))
         st.divider()
         st.markdown(
             """
@@ -122,12 +142,13 @@ with tab2:
             """
         )
     with st.expander(expanded=False, label="Хүснэгт харах:"):
-        st.dataframe(segment_counts_all)    
+        st.dataframe(month_label_table(segment_counts_all))    
 
 # ---------------- TAB 1 ----------------
 with tab1:
-    df_2024 = monthly_reward_stat[monthly_reward_stat["year_month"].str.startswith("2024")]
-    df_2025 = monthly_reward_stat[monthly_reward_stat["year_month"].str.startswith("2025")]
+    reward_year = month_year(monthly_reward_stat["MONTH_IDX"])
+    df_2024 = monthly_reward_stat[reward_year == 2024]
+    df_2025 = monthly_reward_stat[reward_year == 2025]
 
     color_2024 = "#5D6D7E"
     color_2025 = "#3498DB"
@@ -194,12 +215,12 @@ with tab1:
         st.subheader("Ерөнхий тойм")
         st.markdown(
             f"""
-            - **2024-2025** онуудад нийт **{user_level_stat_monthly["CUST_CODE"].nunique():,}** хэрэглэгч урамшууллын хөтөлбөрт хамрагдсан байна.
+            - **2024-2025** онуудад нийт **{user_level_stat_monthly["CUST_ID"].nunique():,}** хэрэглэгч урамшууллын хөтөлбөрт хамрагдсан байна.
             - 2024 онд: **69,764** хэрэглэгч
             - 2025 онд: **56,267** хэрэглэгч. (29,995 хэрэглэгчид бүх жилд ороролцсон)
-            - Сард дунджаар **{(user_level_stat_monthly.groupby("month_num", observed=True)["CUST_CODE"].nunique().mean()):,.0f}** хэрэглэгч урамшуулалд оролцсон байна.
+            - Сард дунджаар **{(user_level_stat_monthly.groupby("month_num", observed=True)["CUST_ID"].nunique().mean()):,.0f}** хэрэглэгч урамшуулалд оролцсон байна.
             """
         )
 
     with st.expander(expanded=False, label="Хүснэгт харах:"):
-        st.dataframe(monthly_reward_stat, hide_index=True)
+        st.dataframe(month_label_table(monthly_reward_stat), hide_index=True)
@@ -7,14 +7,16 @@ import numpy as np
 from data.data_loader import (
     get_lookup,
     load_precomputed_page2,
+    load_page2_transaction_summary_with_pad,
     load_page2_codegroup_map,
     load_page2_movers_monthly,
     get_most_growing_loyal_code_from_monthly,
 )
+from data.date_cols import month_label, month_label_table, with_month_label
 
 loyal_code_to_desc = get_lookup()
 
-grouped_reward, transaction_summary, transaction_summary_with_pad = load_precomputed_page2()
+grouped_reward, transaction_summary = load_precomputed_page2()
 codegroup_map = load_page2_codegroup_map()
 movers_monthly = load_page2_movers_monthly()
 
@@ -38,7 +40,7 @@ tab1, tab2, tab3, tab4 = st.tabs(["METHODOLOGY", "ГҮЙЛГЭЭНИЙ ОНОО
 def build_animation_fig(transaction_summary):
 
     fig = px.scatter(
-        transaction_summary,
+        with_month_label(transaction_summary),
         x='Total_Users',
         y='Total_Amount',
         size='Transaction_Freq',
@@ -133,6 +135,8 @@ with tab1:
     
 with tab2:
 
+    transaction_summary_with_pad = load_page2_transaction_summary_with_pad()
+
     x_limit = np.log10(transaction_summary_with_pad["Total_Users"].max()) + 0.5
     y_limit = np.log10(transaction_summary_with_pad["Total_Amount"].max()) + 0.7
     max_freq = transaction_summary_with_pad["Transaction_Freq"].max()
@@ -271,7 +275,8 @@ with tab2:
         movers, movers_df = get_most_growing_loyal_code_from_monthly(movers_monthly, selected_year)
 
         current_movers_list = movers.tolist()
-        movers_df = ( transaction_summary[( (transaction_summary["LOYAL_CODE"].isin(current_movers_list)) & (transaction_summary['year'] == selected_year) )] .sort_values(["DESC", "year_month"]) )
+        movers_df = ( transaction_summary[( (transaction_summary["LOYAL_CODE"].isin(current_movers_list)) & (transaction_summary['year'] == selected_year) )] .sort_values(["DESC", "MONTH_IDX"]) )
+        movers_df = with_month_label(movers_df)
  
         fig = px.scatter(
             movers_df,
@@ -370,13 +375,13 @@ with tab2:
                 )
 
     with st.expander(expanded=False, label = 'Хүснэгт харах:'):
-        st.dataframe(transaction_summary,width='stretch',hide_index=True)
+        st.dataframe(month_label_table(transaction_summary),width='stretch',hide_index=True)
 
 
 with tab3:
   
-    line_chart_df = grouped_reward[['CODE_GROUP', 'year_month', 'TOTAL_AMOUNT']]
-    line_chart_df = line_chart_df.sort_values('year_month')
+    line_chart_df = grouped_reward[['CODE_GROUP', 'MONTH_IDX', 'TOTAL_AMOUNT']]
+    line_chart_df = with_month_label(line_chart_df.sort_values('MONTH_IDX'))
 
     line_chart_fig = px.line(
             line_chart_df, 
@@ -418,18 +423,19 @@ with tab3:
         """)
         
     with st.expander('Сар тус бүрээр харах:', expanded=False):
-        available_months = sorted(grouped_reward['year_month'].unique())
+        available_months = sorted(grouped_reward['MONTH_IDX'].unique())
         selected_month = st.selectbox(
             'Choose a month to analyze',
             options=available_months,
+            format_func=month_label,
         )
-        monthly_grouped_reward = grouped_reward[grouped_reward['year_month'] == selected_month]
+        monthly_grouped_reward = grouped_reward[grouped_reward['MONTH_IDX'] == selected_month]
 
         fig = donut_plot(
             monthly_grouped_reward, 
             'CODE_GROUP', 
             'TOTAL_AMOUNT',
-            f'Percentage of Total Points by Transaction Group in {selected_month}'
+            f'Percentage of Total Points by Transaction Group in {month_label(selected_month)}'
         )
 
         st.plotly_chart(fig,width='stretch')
@@ -437,7 +443,7 @@ with tab3:
 
     
     with st.expander("Хүснэгт харах:", expanded=False):
-        st.dataframe(monthly_grouped_reward,width='stretch',hide_index=True)
+        st.dataframe(month_label_table(monthly_grouped_reward),width='stretch',hide_index=True)
 
 
 with tab4:
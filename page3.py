@@ -1,19 +1,20 @@
 import streamlit as st
-from data.data_loader import load_data,compute_new_2025_users_monthly
+from data.data_loader import load_data,compute_new_2025_users_monthly, count_customers
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 from plotly.subplots import make_subplots
 
 
-@st.cache_data(show_spinner=False)
-def load_base():
-    return load_data()
-
-df_full = load_base()
-new_2025_users_monthly = compute_new_2025_users_monthly(df_full)
+# first year per customer needs every year; the charts only 2025 (both filtered in the parquet scan)
+new_2025_users_monthly = compute_new_2025_users_monthly(
+    load_data(columns=("CUST_ID", "year", "MONTH_NUM", "TXN_AMOUNT"))
+)
 
-df = df_full[(df_full.TXN_DATE >= "2025-01-01") & (df_full.TXN_DATE <= "2025-12-31")]
+df = load_data(
+    columns=("MONTH_NUM", "TXN_AMOUNT", "LOYAL_CODE", "CODE_GROUP", "JRNO", "CUST_ID"),
+    date_range=("2025-01-01", "2025-12-31"),
+)
 
 
 st.header('ОНЦЛОХ САРЫН ШИНЖИЛГЭЭ 2025 ОН', anchor='center')
@@ -347,7 +348,7 @@ with tab2:
         code_group_acc_insur_df = df[df['CODE_GROUP'].isin(['Insurance','Investments & Securities','Account Opening'])].groupby(['MONTH_NUM', 'CODE_GROUP'],observed=True).agg({
             'JRNO': 'count',
             'TXN_AMOUNT': 'sum',
-            'CUST_CODE': 'nunique'
+            'CUST_ID': count_customers
         }).reset_index()
 
         monthly_total_points_df = df.groupby('MONTH_NUM',observed=True)['TXN_AMOUNT'].sum().reset_index(name='TOTAL_POINTS')
@@ -1,23 +1,20 @@
 import streamlit as st
-from data.data_loader import load_data, get_lookup, load_precomputed_page4
+from data.data_loader import load_data, get_lookup, load_precomputed_page4, output_years, PAGE4_USERS_KEY
+from data.date_cols import with_month_label
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 from plotly.subplots import make_subplots
 
-users_all, thresholds_all, seg_monthly_all, loyal_summary_all = load_precomputed_page4()
-
-available_years = sorted(users_all["year"].unique())
+available_years = output_years(PAGE4_USERS_KEY)
 
 selected_year = st.sidebar.selectbox("Жил сонгох", available_years)
 
-users_agg_df = users_all[users_all["year"] == selected_year].copy()
-thresholds = thresholds_all[thresholds_all["year"] == selected_year].iloc[0].to_dict()
+# only the selected year's rows are read
+users_agg_df, thresholds_df, user_segment_monthly_df, segment_loyal_summary = load_precomputed_page4(selected_year)
+thresholds = thresholds_df.iloc[0].to_dict()
 thresholds.pop("year", None)
 
-user_segment_monthly_df = seg_monthly_all[seg_monthly_all["year"] == selected_year].copy()
-segment_loyal_summary = loyal_summary_all[loyal_summary_all["year"] == selected_year].copy()
-
 
 st.sidebar.caption(f"Одоогийн сонголт: {selected_year}")
 
@@ -97,7 +94,7 @@ with tab2:
     user_reached_1000_agg = users_agg_df[users_agg_df.Reached_1000_Flag == 1]
     c1, c2, c3, c4 = st.columns(4)
 
-    c1.metric("Хэрэглэгч (≥1000 оноо)", f"{user_reached_1000_agg['CUST_CODE'].nunique():,}")
+    c1.metric("Хэрэглэгч (≥1000 оноо)", f"{user_reached_1000_agg['CUST_ID'].nunique():,}")
     c2.metric("Дундаж гүйлгээ", f"{user_reached_1000_agg['Transaction_Count'].median():.0f}")
     c3.metric("Дундаж идэвхтэй хоног", f"{user_reached_1000_agg['Active_Days'].median():.0f}")
     c4.metric("Дундаж урамшуулын төрлүүд", f"{user_reached_1000_agg['Unique_Loyal_Codes'].median():.0f}")
@@ -343,6 +340,7 @@ with tab3:
     #st.divider()
     # Count users per segment
     segment_counts = users_agg_df['User_Segment'].value_counts().reset_index()
+    segment_counts = segment_counts[segment_counts['count'] > 0]
     segment_counts.columns = ['Segment', 'User_Count']
 
     fig = px.treemap(
@@ -364,7 +362,7 @@ with tab4:
 
     with st.expander("Monthly User Distribution by Segment", expanded=False):
         fig = px.line(
-            user_segment_monthly_df,
+            with_month_label(user_segment_monthly_df),
             x="year_month",
             y="count",
             color="User_Segment",
@@ -390,9 +388,10 @@ with tab4:
     # ---- Monthly total points by segment
     with st.expander("Monthly User Point Distribution by Segment", expanded=False):
         user_segment_points_df = (
-            users_agg_df.groupby(["User_Segment", "year_month"],observed=True)["Total_Points"]
+            users_agg_df.groupby(["User_Segment", "MONTH_IDX"],observed=True)["Total_Points"]
             .sum()
             .reset_index()
+            .pipe(with_month_label)
         )
 
         fig = px.line(
@@ -422,9 +421,10 @@ with tab4:
     # ---- Monthly average points per user
     with st.expander("Monthly Average User Point Distribution by Segment", expanded=False):
         avg_points_df = (
-            users_agg_df.groupby(["User_Segment", "year_month"],observed = True)
-            .agg(Total_Points=("Total_Points", "sum"), Users=("CUST_CODE", "nunique"))
+            users_agg_df.groupby(["User_Segment", "MONTH_IDX"],observed = True)
+            .agg(Total_Points=("Total_Points", "sum"), Users=("CUST_ID", "nunique"))
             .reset_index()
+            .pipe(with_month_label)
         )
 
         avg_points_df["avg_point_per_user"] = (avg_points_df["Total_Points"] / avg_points_df["Users"]).round(2)
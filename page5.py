@@ -5,6 +5,8 @@ import pandas as pd
 
 from data.data_loader import (
     get_lookup,
+    output_years,
+    PAGE5_USERS_AGG_KEY,
     load_precomputed_page5_users_agg,
     load_precomputed_page5_thresholds,
     load_precomputed_page5_reach_frequency,
@@ -23,19 +25,10 @@ def load_lookup():
 
 loyal_code_to_desc = load_lookup()
 
-users_agg_all = load_precomputed_page5_users_agg()
-thresholds_all = load_precomputed_page5_thresholds()
-reach_freq_all = load_precomputed_page5_reach_frequency()
-monthly_points_all = load_precomputed_page5_monthly_points()
-
-# This file is big, but still MUCH safer than computing live.
-# Keep cached by Streamlit.
-user_month_profile_all = load_precomputed_page5_user_month_profile()
-
 # -------------------------
 # Year selector
 # -------------------------
-available_years = sorted(users_agg_all["year"].dropna().astype(int).unique())
+available_years = output_years(PAGE5_USERS_AGG_KEY)
 
 selected_year = st.sidebar.selectbox(
     "Жил сонгох",
@@ -45,14 +38,18 @@ selected_year = st.sidebar.selectbox(
 
 st.sidebar.caption(f"Одоогийн сонголт: {selected_year}")
 
-# Filter to year
-users_agg_df = users_agg_all[users_agg_all["year"] == selected_year].copy()
-reach_frequency = reach_freq_all[reach_freq_all["year"] == selected_year].copy()
-monthly_customer_points = monthly_points_all[monthly_points_all["year"] == selected_year].copy()
-user_month_profile = user_month_profile_all[user_month_profile_all["year"] == selected_year].copy()
+# Load the selected year only (one row group per file, cached per year)
+users_agg_df = load_precomputed_page5_users_agg(selected_year)
+reach_frequency = load_precomputed_page5_reach_frequency(selected_year)
+monthly_customer_points = load_precomputed_page5_monthly_points(selected_year, columns=["Total_Points"])
+
+# The biggest file: only the columns the profile pivot uses
+user_month_profile = load_precomputed_page5_user_month_profile(
+    selected_year, columns=["CUST_ID", "MONTH_NUM", "LOYAL_CODE", "Normalized_Points"]
+)
 
 # Thresholds row (optional usage if you need)
-threshold_row = thresholds_all[thresholds_all["year"] == selected_year]
+threshold_row = load_precomputed_page5_thresholds(selected_year)
 thresholds = threshold_row.iloc[0].to_dict() if not threshold_row.empty else {}
 
 # -------------------------
@@ -75,7 +72,7 @@ with tab3:
         st.stop()
 
     profile_wide = user_month_profile.pivot_table(
-        index=["CUST_CODE", "MONTH_NUM"],
+        index=["CUST_ID", "MONTH_NUM"],
         columns="LOYAL_CODE",
         values="Normalized_Points",
         fill_value=0,
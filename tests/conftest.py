@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+REPO = Path(__file__).resolve().parents[1]
+
+# pipeline modules import each other as siblings (run from data/), same as benchmarks/;
+# the app modules import them as data.xxx (run from the repo root)
+sys.path.insert(0, str(REPO / "data"))
+sys.path.insert(0, str(REPO / "benchmarks"))
+sys.path.insert(0, str(REPO))
+
+import data_pre_compute  # noqa: E402
+from gen_transactions import generate  # noqa: E402
+
+RAW_ROWS = 20_000
+
+
+@pytest.fixture(scope="session")
+def raw_path(tmp_path_factory) -> Path:
+    """Small synthetic raw parquet (gen_transactions.py), shared by the pipeline tests - do not modify."""
+    path = tmp_path_factory.mktemp("raw") / "raw.pqt"
+    generate(RAW_ROWS, str(path), seed=0)
+    return path
+
+
+@pytest.fixture
+def raw_frame(raw_path) -> pd.DataFrame:
+    """The synthetic raw rows, a fresh copy per test (edit, then write with `write_raw`)."""
+    return pd.read_parquet(raw_path)
+
+
+@pytest.fixture
+def write_raw(tmp_path):
+    def write(df: pd.DataFrame, name: str = "raw.pqt") -> Path:
+        path = tmp_path / name
+        df.to_parquet(path, index=False)
+        return path
+
+    return write
+
+
+@pytest.fixture
+def run_pipeline(monkeypatch):
+    """
+    run_pipeline(workdir, raw, **kwargs): data_pre_compute.run_pipeline with `workdir` as the data/ folder
+    (the pipeline writes relative to the cwd); incremental=True -> run_pipeline_incremental.
+    """
+    def run(workdir: Path, raw: Path, incremental: bool = False, **kwargs) -> Path:
+        workdir.mkdir(parents=True, exist_ok=True)
+        monkeypatch.chdir(workdir)
+        if incremental:
+            data_pre_compute.run_pipeline_incremental(str(raw))
+        else:
+            data_pre_compute.run_pipeline(input_path=str(raw), workers=kwargs.pop("workers", 1), **kwargs)
+        return workdir
+
+    return run
+
+
+@pytest.fixture
+def app_root(tmp_path, raw_path, run_pipeline, monkeypatch) -> Path:
+    """
+    A repo-like root for the app loaders (data.data_loader reads data/... relative to the cwd):
+    the pipeline run on the synthetic raw file into <root>/data, cwd = <root>, Streamlit caches cleared.
+    """
+    root = tmp_path / "app"
+    run_pipeline(root / "data", raw_path)
+    monkeypatch.chdir(root)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield root
+    st.cache_data.clear()
+    st.cache_resource.clear()
@@ -0,0 +1,87 @@
+"""Achiever month profile (segments.achiever_month_profile) vs the 3-key merge + two groupbys it replaced."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from segments import PROFILE_EXCLUDED_CODES, achiever_month_profile, add_flags
+
+CODES = ["10K_TRANSACTION", "10K_CHARGE_CUPCAKE", "10K_GET_LOTTO", PROFILE_EXCLUDED_CODES[0], None]
+
+
+def original_profile(df: pd.DataFrame, users: pd.DataFrame, with_year: bool) -> pd.DataFrame:
+    """page5_user_month_profile_achievers (with_year) / get_page5_loyal_normalized_profile as they were."""
+    keys = (["year"] if with_year else []) + ["CUST_ID", "MONTH_NUM"]
+    achiever_months = users.loc[users["Reached_1000_Flag"] == 1, keys]
+    df_ach = df.merge(achiever_months, on=keys, how="inner")
+
+    monthly_totals = df_ach.groupby(keys, observed=True)["TXN_AMOUNT"].sum().reset_index(name="True_Monthly_Total")
+    loyal_code_agg = df_ach.groupby(keys + ["LOYAL_CODE"], observed=True)["TXN_AMOUNT"].sum().reset_index()
+    final_df = loyal_code_agg.merge(monthly_totals, on=keys, how="left")
+
+    final_df = final_df[final_df["LOYAL_CODE"].notna()]
+    final_df = final_df[final_df["LOYAL_CODE"] != "10K_PURCH_INSUR"]
+    final_df["Normalized_Points"] = (final_df["TXN_AMOUNT"] / final_df["True_Monthly_Total"]) * 1000
+    return final_df.groupby(keys + ["LOYAL_CODE"], observed=True)["Normalized_Points"].sum().reset_index()
+
+
+def transactions(n: int = 6_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = np.r_[np.arange(30), 2**31 - 1]
+    activity = 1.0 / np.arange(1, len(ids) + 1)  # a few heavy customers, many light ones
+    return pd.DataFrame({
+        "year": rng.choice([2024, 2025], n),
+        "MONTH_NUM": rng.integers(1, 13, n),
+        "CUST_ID": rng.choice(ids, n, p=activity / activity.sum()).astype("int32"),
+        "LOYAL_CODE": pd.Series(rng.choice(np.array(CODES, dtype=object), n), dtype=object),
+        "TXN_AMOUNT": rng.integers(1, 120, n),
+    })
+
+
+def user_months(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    users = df.groupby(keys, observed=True).agg(Total_Points=("TXN_AMOUNT", "sum")).reset_index()
+    users["Transaction_Count"] = 1
+    return add_flags(users)
+
+
+def canonical(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    return df.sort_values(keys + ["LOYAL_CODE"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("with_year", [True, False], ids=["pipeline", "loader"])
+def test_profile_matches_merge_version(with_year):
+    df = transactions()
+    if not with_year:
+        df = df[df["year"] == 2025].drop(columns="year").reset_index(drop=True)
+    keys = (["year"] if with_year else []) + ["CUST_ID", "MONTH_NUM"]
+    users = user_months(df, keys)
+    assert 0 < users["Reached_1000_Flag"].sum() < len(users)
+
+    got = achiever_month_profile(df, users, with_year=with_year)
+    expected = original_profile(df, users, with_year)
+
+    assert list(got.columns) == keys + ["LOYAL_CODE", "Normalized_Points"]
+    assert not got["LOYAL_CODE"].isin(PROFILE_EXCLUDED_CODES).any() and got["LOYAL_CODE"].notna().all()
+    pd.testing.assert_frame_equal(canonical(got, keys), canonical(expected, keys), check_dtype=False)
+
+
+def test_same_month_other_year_is_not_an_achiever_month():
+    df = pd.DataFrame({
+        "year": [2024, 2025, 2025],
+        "MONTH_NUM": [3, 3, 3],
+        "CUST_ID": np.array([5, 5, 5], dtype="int32"),
+        "LOYAL_CODE": ["10K_TRANSACTION", "10K_TRANSACTION", "10K_GET_LOTTO"],
+        "TXN_AMOUNT": [1500, 200, 100],
+    })
+    users = user_months(df, ["year", "CUST_ID", "MONTH_NUM"])
+
+    got = achiever_month_profile(df, users)
+    assert got[["year", "LOYAL_CODE", "Normalized_Points"]].values.tolist() == [[2024, "10K_TRANSACTION", 1000.0]]
+
+
+def test_no_achievers():
+    df = transactions(200)
+    users = user_months(df, ["year", "CUST_ID", "MONTH_NUM"]).assign(Reached_1000_Flag=0)
+    assert achiever_month_profile(df, users).empty
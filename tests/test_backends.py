@@ -0,0 +1,65 @@
+"""
+pandas vs arrow backend (data_pre_compute.py --backend): the same raw file must give identical
+outputs, master dataset, customer ids and base snapshot (benchmarks/diff_backends.py adds timings).
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import data_pre_compute as d
+from master_store import open_master, read_customer_ids
+
+
+def output_paths(workdir) -> list[str]:
+    return sorted(
+        os.path.relpath(p, workdir)
+        for p in glob.glob(str(workdir / d.OUT_DIR / "**" / "*.pqt"), recursive=True)
+        if "run_reports" not in p
+    )
+
+
+def plain(table: pa.Table) -> pa.Table:
+    return table.replace_schema_metadata(None)
+
+
+@pytest.fixture
+def raw_with_nulls(raw_frame, write_raw):
+    """Null CUST_CODE / LOYAL_CODE / TXN_DESC rows on top of the generator's edge cases."""
+    rng = np.random.default_rng(2)
+    for col in ("CUST_CODE", "LOYAL_CODE", "TXN_DESC"):
+        raw_frame.loc[rng.choice(len(raw_frame), 100, replace=False), col] = None
+    return write_raw(raw_frame)
+
+
+@pytest.mark.parametrize("mode", [{}, {"stream": True, "batch_rows": 6_000}], ids=["full", "stream"])
+def test_backends_write_identical_outputs(mode, tmp_path, raw_with_nulls, run_pipeline):
+    runs = {
+        backend: run_pipeline(tmp_path / backend, raw_with_nulls, backend=backend, use_cache=False, **mode)
+        for backend in d.BACKENDS
+    }
+    pandas_dir, arrow_dir = runs["pandas"], runs["arrow"]
+
+    paths = output_paths(pandas_dir)
+    assert paths == output_paths(arrow_dir)
+    for path in paths:
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(pandas_dir / path), pd.read_parquet(arrow_dir / path), check_exact=True, obj=path
+        )
+
+    master = [plain(open_master(str(run / d.CODE_GROUPED_OUTPUT)).to_table()) for run in (pandas_dir, arrow_dir)]
+    assert master[0].num_rows > 0
+    assert master[0].equals(master[1])
+    pd.testing.assert_frame_equal(
+        read_customer_ids(str(pandas_dir / d.CODE_GROUPED_OUTPUT)),
+        read_customer_ids(str(arrow_dir / d.CODE_GROUPED_OUTPUT)),
+    )
+
+    base = [plain(pa.ipc.open_file(pa.memory_map(str(run / d.BASE_ARROW), "r")).read_all()) for run in (pandas_dir, arrow_dir)]
+    assert base[0].equals(base[1])
@@ -0,0 +1,100 @@
+"""CODE_GROUP rules (code_groups.py): vectorized assign_code_group / map_code_groups_unique vs map_code_group and the original if-chain."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from code_groups import GEO_CODES, assign_code_group, map_code_group, map_code_groups_unique
+
+
+def original_code_group(code) -> str:
+    """The per-row if-chain the declarative rules replaced."""
+    if pd.isna(code):
+        return "Financial Transactions"
+    code = str(code).strip().upper()
+    if code in {"10K_TRANSACTION", "10K_CHARGE_CUPCAKE", "10K_CHARGE_CUPCAKE_1", "10K_TULBUR_TSES", "10K_TRANSACTION_CARD"}:
+        return "Core Transactions"
+    if code in GEO_CODES:
+        return "Campaigns & Events"
+    if (
+        code.startswith("10K_OPEN")
+        or code in {"ARD_SEC", "ARD_SEC1", "ARD_SEC100", "10K_KIDS61"}
+        or code.endswith("UTSD")
+        or "TETDANS" in code
+    ):
+        return "Account Opening"
+    if any(s in code for s in ("TRANSACTION", "CHARGE", "CCA", "AFFILIATE")) or code in {"LOYALTY_LIMIT", "ACO", "ZEEL_TULULT"}:
+        return "Financial Transactions"
+    if "INSUR" in code or "DAATGAL" in code:
+        return "Insurance"
+    if code.startswith(("MARAL", "MARAN")) or any(s in code for s in ("KRYPTOS", "PNP", "LOTTO")) or code == "10K_GAME":
+        return "Merchant & Lifestyle"
+    if any(s in code for s in ("SOCIAL", "FACEBOOK", "SELFIE", "MEDEE", "TUUH")):
+        return "Campaigns & Events"
+    if code.startswith(("10K_BUY", "ARD_")) or any(s in code for s in ("1072", "HOS", "HOUS")):
+        return "Investments & Securities"
+    if code.startswith((
+        "INVESTORWEEK", "TVMEN", "SMART", "HURUNGU", "PENSION_SURGALT",
+        "CREDIT_SURGALT", "CREDIT_ZEEL", "ARDCOIN", "CREDIT_AIRDROP",
+    )):
+        return "Campaigns & Events"
+    if code.startswith("INF") and len(code) >= 7 and code[3:7].isdigit():
+        return "Campaigns & Events"
+    return "Other"
+
+
+EDGE_CODES = [
+    None,
+    np.nan,
+    "",
+    "   ",
+    "None",
+    "10K_TRANSACTION",
+    "10k_transaction",         # lowercase
+    "  ard_sec1 ",             # whitespace + lowercase
+    "ARD_SEC1X",               # not an exact ARD_SEC* code -> ARD_ prefix
+    "ARD_LOTTO",               # LOTTO (merchant) wins over the ARD_ prefix
+    "darkhan",
+    "10K_OPEN_ACCOUNT",
+    "SAVINGS_UTSD",
+    "X_TETDANS_Y",
+    "ZEEL_TULULT",
+    "CAR_DAATGAL",
+    "10K_PURCH_INSUR",
+    "MARAN_SHOP",
+    "10K_GAME",
+    "10K_GAME_2",
+    "FACEBOOK_SHARE",
+    "10K_BUY_BOND",
+    "HOSPITAL",
+    "CREDIT_ZEEL_2025",
+    "INF2025_RDX_50",          # INF + 4 digits
+    "inf2025",                 # lowercase
+    "INF20X5_RDX",             # INF + non-digits
+    "INF202",                  # too short
+    "INFO_2025",
+    "XINF2025",                # INF not at the start
+    "LUNAR_RDXQR",
+    12345,                     # non-string code
+]
+
+
+def test_code_group_vectorized_matches_scalar():
+    codes = pd.Series(EDGE_CODES, dtype=object)
+    scalar = [map_code_group(c) for c in EDGE_CODES]
+
+    assert list(map_code_groups_unique(codes)) == scalar
+    assert list(assign_code_group(codes).astype(object)) == scalar
+
+
+def test_code_group_rules_match_original_chain():
+    assert [map_code_group(c) for c in EDGE_CODES] == [original_code_group(c) for c in EDGE_CODES]
+
+
+def test_code_group_repeated_rows_and_empty():
+    codes = pd.Series(["inf2025", None, "10K_GAME", "inf2025", None] * 3, dtype=object)
+    assert list(assign_code_group(codes).astype(object)) == [original_code_group(c) for c in codes]
+
+    empty = assign_code_group(pd.Series([], dtype=object))
+    assert len(empty) == 0
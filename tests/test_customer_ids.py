@@ -0,0 +1,88 @@
+"""
+CUST_CODE -> CUST_ID (master_store.py): stable ids, NULL_CUST_ID for null codes, and what the
+outputs do with those rows (amount totals keep them, per-user aggregates / user counts do not).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import data_pre_compute as d
+from master_store import (
+    NULL_CUST_ID,
+    assign_customer_ids,
+    count_customers,
+    known_customers,
+    null_customer_mask,
+    read_customer_ids,
+    read_master,
+)
+
+
+def test_ids_are_stable_and_null_codes_get_null_cust_id(tmp_path):
+    first = assign_customer_ids(str(tmp_path), pd.Series(["B", None, "A", "B", np.nan], dtype=object))
+    assert first.tolist() == [1, NULL_CUST_ID, 0, 1, NULL_CUST_ID]
+
+    second = assign_customer_ids(str(tmp_path), pd.Series(["C", "A", None, "B"], dtype=object))
+    assert second.tolist() == [2, 0, NULL_CUST_ID, 1]
+
+    ids = read_customer_ids(str(tmp_path))
+    assert ids["CUST_CODE"].tolist() == ["A", "B", "C"]
+    assert ids["CUST_ID"].tolist() == [0, 1, 2]
+
+
+def test_only_null_codes(tmp_path):
+    ids = assign_customer_ids(str(tmp_path), pd.Series([None, None], dtype=object))
+    assert ids.tolist() == [NULL_CUST_ID, NULL_CUST_ID]
+    assert read_customer_ids(str(tmp_path)).empty
+
+
+@pytest.mark.parametrize("as_table", [False, True])
+def test_known_customers(as_table):
+    df = pd.DataFrame({"CUST_ID": np.array([0, NULL_CUST_ID, 1, NULL_CUST_ID], dtype="int32"), "X": [1, 2, 3, 4]})
+    data = pa.Table.from_pandas(df, preserve_index=False) if as_table else df
+
+    assert null_customer_mask(data).tolist() == [False, True, False, True]
+    known = known_customers(data)
+    assert (known["X"].to_pylist() if as_table else known["X"].tolist()) == [1, 3]
+    assert count_customers(df["CUST_ID"]) == 2
+
+
+@pytest.mark.parametrize("backend", d.BACKENDS)
+def test_outputs_with_null_customers(backend, tmp_path, raw_frame, write_raw, run_pipeline):
+    rng = np.random.default_rng(1)
+    raw_frame.loc[rng.choice(len(raw_frame), 300, replace=False), "CUST_CODE"] = None
+    workdir = run_pipeline(tmp_path / "data", write_raw(raw_frame), backend=backend)
+
+    def out(path: str) -> pd.DataFrame:
+        return pd.read_parquet(workdir / path)
+
+    master = read_master(str(workdir / d.CODE_GROUPED_OUTPUT), columns=["CUST_ID", "TXN_AMOUNT", "LOYAL_CODE", "MONTH_IDX"])
+    nulls = master["CUST_ID"] == NULL_CUST_ID
+    assert nulls.sum() > 0
+    total = master["TXN_AMOUNT"].sum()
+
+    # amount totals: every row, with or without a customer
+    assert out(d.OUT_MONTHLY_SUMMARY)["total_points"].sum() == pytest.approx(total)
+    assert out(d.OUT_GROUPED_REWARD)["TOTAL_AMOUNT"].sum() == pytest.approx(total)
+    assert out(d.OUT_TS_NO_PAD)["Total_Amount"].sum() == pytest.approx(total)
+    assert out(d.OUT_LOYAL_AVG)["TXN_AMOUNT"].sum() == pytest.approx(total)
+    assert out(d.OUT_MOVERS_BASE)["TXN_AMOUNT"].sum() == pytest.approx(
+        master.loc[master["LOYAL_CODE"] != "None", "TXN_AMOUNT"].sum()
+    )
+
+    # user counts: known customers only
+    known = master[~nulls]
+    ts = out(d.OUT_TS_NO_PAD).set_index(["LOYAL_CODE", "MONTH_IDX"])["Total_Users"].sort_index()
+    expected = master.groupby(["LOYAL_CODE", "MONTH_IDX"])["CUST_ID"].agg(count_customers).sort_index()
+    assert ts.tolist() == expected.tolist()
+    assert out(d.OUT_MONTHLY_SUMMARY)["total_users"].sum() == len(known[["CUST_ID", "MONTH_IDX"]].drop_duplicates())
+
+    # per-user outputs: no NULL_CUST_ID row, user points == points of the known customers
+    for path in (d.OUT_USER_MONTHLY, d.OUT_PAGE4_USERS, d.OUT_PAGE5_USERS_AGG, d.OUT_PAGE5_MONTHLY_POINTS, d.OUT_PAGE5_USER_MONTH_PROFILE):
+        assert (out(path)["CUST_ID"] != NULL_CUST_ID).all(), path
+    assert out(d.OUT_USER_MONTHLY)["user_total_point"].sum() == pytest.approx(known["TXN_AMOUNT"].sum())
+    assert out(d.OUT_PAGE4_SEG_LOYAL)["TXN_AMOUNT"].sum() == pytest.approx(known["TXN_AMOUNT"].sum())
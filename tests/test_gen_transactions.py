@@ -0,0 +1,54 @@
+"""Synthetic raw transactions (benchmarks/gen_transactions.py): determinism, schema, chunking, skew."""
+
+from __future__ import annotations
+
+import filecmp
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import gen_transactions as gen
+from conftest import RAW_ROWS
+
+
+@pytest.mark.parametrize("text, rows", [("1M", 1_000_000), ("250k", 250_000), ("1.5M", 1_500_000), ("1_500", 1_500), ("2B", 2_000_000_000)])
+def test_parse_rows(text, rows):
+    assert gen.parse_rows(text) == rows
+
+
+def test_same_seed_same_bytes(tmp_path, raw_path):
+    again = gen.generate(RAW_ROWS, str(tmp_path / "again.pqt"), seed=0)
+    other = gen.generate(RAW_ROWS, str(tmp_path / "other.pqt"), seed=1)
+    assert filecmp.cmp(raw_path, again, shallow=False)
+    assert not pd.read_parquet(other).equals(pd.read_parquet(raw_path))
+
+
+def test_schema_and_values(raw_frame):
+    assert list(raw_frame.columns) == ["TXN_DATE", "TXN_CODE", "TXN_DESC", "TXN_AMOUNT", "CUST_CODE", "LOYAL_CODE", "JRNO"]
+    assert len(raw_frame) == RAW_ROWS
+
+    dates = pd.to_datetime(raw_frame["TXN_DATE"], format="%d-%b-%y")
+    assert dates.min() >= pd.Timestamp(gen.DATE_START) and dates.max() <= pd.Timestamp(gen.DATE_END)
+    assert raw_frame["JRNO"].is_unique
+    assert raw_frame["CUST_CODE"].str.startswith("CIF-").all()
+
+    shares = raw_frame["LOYAL_CODE"].value_counts(normalize=True, dropna=False)
+    assert shares["10K_TRANSACTION"] == pytest.approx(gen.CODE_SHARES["10K_TRANSACTION"], abs=0.03)
+    assert shares["10K_CHARGE_CUPCAKE"] == pytest.approx(gen.CODE_SHARES["10K_CHARGE_CUPCAKE"], abs=0.03)
+    assert raw_frame["LOYAL_CODE"].isna().any()
+
+    txn = raw_frame[raw_frame["LOYAL_CODE"] == "10K_TRANSACTION"]
+    base = txn["TXN_AMOUNT"].where(dates[txn.index].dt.year == 2024, txn["TXN_AMOUNT"] * 2)
+    assert set(base) <= {10.0, 20.0}  # 10 points in 2024, 5 in 2025 (x2 promos)
+
+
+def test_chunks_are_row_groups_and_do_not_change_the_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(gen, "CHUNK_ROWS", 3_000)
+    chunked = gen.generate(7_000, str(tmp_path / "chunked.pqt"), seed=0)
+    assert pq.ParquetFile(chunked).num_row_groups == 3
+
+    df = pd.read_parquet(chunked)
+    assert df["JRNO"].tolist() == list(range(7_000))
+    # chunk 0 uses the same generator stream whatever the total size
+    pd.testing.assert_frame_equal(df.head(3_000), pd.read_parquet(gen.generate(3_000, str(tmp_path / "one.pqt"), seed=0)))
@@ -0,0 +1,51 @@
+"""Distinct-user sketches (hll.py): registers vs a scalar build, estimates vs exact distinct counts, merges."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from hll import HASH_BITS, M, P, build_sketches, estimate, from_bytes, hash_ids, merge, to_bytes
+
+
+def scalar_registers(ids) -> np.ndarray:
+    """One sketch, register by register with python ints."""
+    regs = np.zeros(M, dtype=np.uint8)
+    rest_bits = HASH_BITS - P
+    for h in hash_ids(np.asarray(ids, dtype=np.int64)).tolist():
+        idx, rest = h >> rest_bits, h & ((1 << rest_bits) - 1)
+        regs[idx] = max(regs[idx], rest_bits - rest.bit_length() + 1)
+    return regs
+
+
+def test_sketch_registers_match_scalar():
+    ids = np.array([0, 1, 2, 2, 7, 123_456, 2**31 - 1, 5, 5, 5], dtype=np.int64)
+    groups = np.array([0, 0, 1, 1, 1, 0, 1, 0, 0, 0])
+    regs = build_sketches(groups, 3, ids)
+
+    assert (regs[0] == scalar_registers(ids[groups == 0])).all()
+    assert (regs[1] == scalar_registers(ids[groups == 1])).all()
+    assert not regs[2].any()  # group without rows
+
+
+@pytest.mark.parametrize("n", [0, 1, 10, 500, 5_000, 100_000])
+def test_estimate_close_to_exact(n):
+    ids = np.arange(n, dtype=np.int64) * 7 + 3
+    sketch = build_sketches(np.zeros(n, dtype=np.intp), 1, ids)[0]
+    # 4 standard errors (1.04 / sqrt(M)), small counts (linear counting) within 1
+    assert abs(estimate(sketch) - n) <= max(4 * 1.04 / np.sqrt(M) * n, 1.0)
+
+
+def test_merge_equals_sketch_of_union():
+    rng = np.random.default_rng(1)
+    ids = rng.integers(0, 20_000, 60_000)
+    groups = rng.integers(0, 4, len(ids))
+    regs = build_sketches(groups, 4, ids)
+
+    union = build_sketches(np.zeros(len(ids), dtype=np.intp), 1, ids)[0]
+    assert (merge(regs) == union).all()
+    assert (merge(regs[:0]) == 0).all()
+    assert (from_bytes(to_bytes(regs)) == regs).all()
+
+    exact = len(np.unique(ids[groups < 2]))
+    assert abs(estimate(merge(regs[:2])) - exact) <= 4 * 1.04 / np.sqrt(M) * exact
@@ -0,0 +1,94 @@
+"""Arrow IPC store (ipc_store.py): tagged single-batch files, zero-copy mapped frames, the app reading them."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import data.data_loader as dl
+import data_pre_compute as d
+from data_manifest import read_manifest, sha256_file
+from ipc_store import fixed_binary_view, ipc_source, map_table, to_frame, write_ipc
+
+
+def sample_table(n: int = 1_000) -> pa.Table:
+    rng = np.random.default_rng(0)
+    return pa.concat_tables([
+        pa.table({
+            "MONTH_IDX": pa.array(rng.integers(24288, 24300, n // 2), pa.int32()),
+            "LOYAL_CODE": pa.array(rng.choice(["A", "B", "C"], n // 2)).dictionary_encode(),
+            "Total_Points": pa.array(rng.random(n // 2)),
+        })
+        for _ in range(2)
+    ])
+
+
+def test_write_map_round_trip(tmp_path):
+    table = sample_table()
+    assert table.column("MONTH_IDX").num_chunks == 2
+    path = str(tmp_path / "ipc" / "page1" / "x.arrow")
+
+    size = write_ipc(table, path, source="abc123")
+    assert size == (tmp_path / "ipc" / "page1" / "x.arrow").stat().st_size
+    assert not list((tmp_path / "ipc" / "page1").glob("*.tmp"))
+    assert ipc_source(path) == "abc123"
+    assert ipc_source(str(tmp_path / "missing.arrow")) is None
+
+    mapped = map_table(path)
+    assert mapped.column("MONTH_IDX").num_chunks == 1  # one record batch
+    pd.testing.assert_frame_equal(mapped.to_pandas(), table.to_pandas())
+
+
+def test_mapped_frame_is_zero_copy_and_read_only(tmp_path):
+    path = str(tmp_path / "x.arrow")
+    write_ipc(sample_table(), path, source="s")
+    mapped = map_table(path)
+    df = to_frame(mapped)
+
+    buffer = mapped.column("MONTH_IDX").chunk(0).buffers()[1]
+    assert np.shares_memory(df["MONTH_IDX"].to_numpy(), np.frombuffer(buffer, dtype=np.int32))
+    assert isinstance(df["LOYAL_CODE"].dtype, pd.CategoricalDtype)
+    with pytest.raises(ValueError):
+        df["Total_Points"].to_numpy()[0] = 1.0
+
+
+def test_fixed_binary_view():
+    values = [bytes([i] * 4) for i in range(5)]
+    column = pa.chunked_array([pa.array(values, pa.binary())])
+    view = fixed_binary_view(column, 4)
+    assert view.shape == (5, 4) and view[:, 0].tolist() == [0, 1, 2, 3, 4]
+    assert fixed_binary_view(pa.array(values, pa.binary()).slice(2), 4)[:, 0].tolist() == [2, 3, 4]
+
+    assert fixed_binary_view(pa.array([b"ab", b"abc"], pa.binary()), 2) is None  # widths differ
+    assert fixed_binary_view(pa.array([b"ab", None], pa.binary()), 2) is None
+    assert fixed_binary_view(pa.array(["ab"]), 2) is None  # not binary
+    assert fixed_binary_view(pa.chunked_array([values[:2], values[2:]], pa.binary()), 4) is None
+
+
+def test_app_reads_the_same_frames_from_the_ipc_copies(app_root, monkeypatch):
+    manifest = dl.get_manifest()
+    assert manifest["master"]["ipc"] == "ipc/master.arrow"
+    assert all("ipc" in manifest["outputs"][key] for key in dl.APP_OUTPUTS)
+
+    mapped = {key: dl.read_output(key) for key in dl.APP_OUTPUTS}
+    mapped_2025 = {key: dl.read_output(key, year=2025) for key in dl.APP_OUTPUTS}
+    master = dl.load_data()
+
+    monkeypatch.setattr(dl, "ipc_file", lambda key=None: None)
+    for key in dl.APP_OUTPUTS:
+        pd.testing.assert_frame_equal(mapped[key], dl.read_output(key), obj=key)
+        pd.testing.assert_frame_equal(mapped_2025[key], dl.read_output(key, year=2025), obj=key)
+    pd.testing.assert_frame_equal(master, dl.load_data())
+
+
+def test_stale_copy_is_not_listed(tmp_path, raw_path, run_pipeline):
+    workdir = run_pipeline(tmp_path / "data", raw_path)
+    key = "page4/thresholds.pqt"
+    path = workdir / d.OUT_DIR / key
+    assert ipc_source(str(workdir / d.OUT_DIR / "ipc" / "page4" / "thresholds.arrow")) == sha256_file(str(path))
+
+    pd.read_parquet(path).head(1).to_parquet(path, index=False)  # changed after the store was built
+    run_pipeline(workdir, raw_path, targets=["page2"])  # cached stages, the manifest is rewritten
+    assert "ipc" not in read_manifest(str(workdir / d.OUT_DIR))["outputs"][key]
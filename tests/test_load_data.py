@@ -0,0 +1,59 @@
+"""load_data (data_loader.py): column / year / date-range selection pushed into the read, parquet and IPC master."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import data.data_loader as dl
+from master_store import read_master
+
+
+def canonical(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.fixture(params=["ipc", "parquet"])
+def master_source(request, app_root, monkeypatch):
+    if request.param == "ipc":
+        assert dl.ipc_file() is not None
+    else:
+        monkeypatch.setattr(dl, "ipc_file", lambda key=None: None)
+    return request.param
+
+
+def test_default_columns_and_dtypes(master_source):
+    df = dl.load_data()
+    assert list(df.columns) == dl.MASTER_COLS
+    assert df["MONTH_IDX"].is_monotonic_increasing
+    assert df["CUST_ID"].dtype == "int32" and df["MONTH_NUM"].dtype == "int16" and df["TXN_AMOUNT"].dtype == "int32"
+    assert isinstance(df["LOYAL_CODE"].dtype, pd.CategoricalDtype)
+    assert len(df) == len(read_master(str(dl.DATA_PATH), columns=["TXN_DATE"], require=["TXN_DATE"]))
+
+
+@pytest.mark.parametrize(
+    "selection",
+    [
+        {"columns": ("CUST_ID", "year", "MONTH_NUM", "TXN_AMOUNT"), "years": (2025,)},
+        {"columns": ("LOYAL_CODE", "CUST_ID", "year"), "years": (2025, 2024)},
+        {"columns": ("TXN_DATE", "TXN_AMOUNT", "LOYAL_CODE"), "date_range": ("2024-11-15", "2025-02-10")},
+    ],
+    ids=["one-year", "two-years", "date-range"],
+)
+def test_selection_matches_a_filtered_full_read(master_source, selection):
+    columns = list(selection["columns"])
+    got = dl.load_data(**selection)
+    assert list(got.columns) == columns
+
+    full = read_master(str(dl.DATA_PATH), columns=sorted({*columns, "TXN_DATE", "year"}), require=["TXN_DATE"])
+    keep = pd.Series(True, index=full.index)
+    if "years" in selection:
+        keep &= full["year"].isin(selection["years"])
+    if "date_range" in selection:
+        first, last = selection["date_range"]
+        keep &= full["TXN_DATE"].between(pd.Timestamp(first), pd.Timestamp(last))
+    expected = full.loc[keep, columns]
+
+    assert len(got) > 0
+    pd.testing.assert_frame_equal(canonical(got), canonical(expected), check_dtype=False)
@@ -0,0 +1,84 @@
+"""Output manifest (data_manifest.py) and what the app reads from it (data_loader: checks, years, data version)."""
+
+from __future__ import annotations
+
+import json
+import os
+
+import pandas as pd
+
+import data.data_loader as dl
+import data_pre_compute as d
+from data_manifest import MANIFEST_FILE, build_manifest, check_outputs, read_manifest, sha256_file, write_manifest
+
+
+def write(df: pd.DataFrame, path) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, index=False)
+    return str(path)
+
+
+def test_entries_years_and_version(tmp_path):
+    by_year = write(pd.DataFrame({"year": [2025, 2024, 2025], "x": [1, 2, 3]}), tmp_path / "page/a.pqt")
+    by_month = write(pd.DataFrame({"MONTH_IDX": [2024 * 12 + 11, 2025 * 12]}), tmp_path / "page/b.pqt")
+    legacy = write(pd.DataFrame({"year_month": ["2023-05", None]}), tmp_path / "c.pqt")
+    no_year = write(pd.DataFrame({"CODE": ["A"]}), tmp_path / "d.pqt")
+
+    manifest = write_manifest(str(tmp_path), [by_year, by_month, legacy, no_year, str(tmp_path / "missing.pqt")])
+    assert read_manifest(str(tmp_path)) == manifest
+
+    outputs = manifest["outputs"]
+    assert sorted(outputs) == ["c.pqt", "d.pqt", "page/a.pqt", "page/b.pqt"]
+    assert outputs["page/a.pqt"]["years"] == [2024, 2025]
+    assert outputs["page/b.pqt"]["years"] == [2024, 2025]
+    assert outputs["c.pqt"]["years"] == [2023]
+    assert outputs["d.pqt"]["years"] is None
+    assert outputs["page/a.pqt"]["rows"] == 3 and outputs["page/a.pqt"]["schema"] == {"year": "int64", "x": "int64"}
+    assert outputs["page/a.pqt"]["sha256"] == sha256_file(by_year)
+
+    # the version follows the content, not the build time
+    assert build_manifest(str(tmp_path), [by_year, by_month])["data_version"] == build_manifest(str(tmp_path), [by_month, by_year])["data_version"]
+    before = manifest["data_version"]
+    write(pd.DataFrame({"year": [2026], "x": [1]}), tmp_path / "page/a.pqt")
+    assert write_manifest(str(tmp_path), [by_year, by_month, legacy, no_year])["data_version"] != before
+
+
+def test_ipc_entry_only_for_the_file_it_was_built_from(tmp_path):
+    path = write(pd.DataFrame({"year": [2025]}), tmp_path / "a.pqt")
+    current = build_manifest(str(tmp_path), [path], ipc={path: ("ipc/a.arrow", sha256_file(path))})
+    stale = build_manifest(str(tmp_path), [path], ipc={path: ("ipc/a.arrow", "0" * 64)})
+    assert current["outputs"]["a.pqt"]["ipc"] == "ipc/a.arrow"
+    assert "ipc" not in stale["outputs"]["a.pqt"]
+    assert current["data_version"] != stale["data_version"]
+
+
+def test_unknown_format_and_check_outputs(tmp_path):
+    assert read_manifest(str(tmp_path)) is None
+    path = write(pd.DataFrame({"year": pd.Series([], dtype="int64"), "x": pd.Series([], dtype="int64")}), tmp_path / "a.pqt")
+    manifest = write_manifest(str(tmp_path), [path])
+
+    assert check_outputs(manifest, {"a.pqt": ["year"], "b.pqt": ["year"]}) == [
+        "a.pqt: no rows", "b.pqt: missing",
+    ]
+    assert check_outputs(manifest, {"a.pqt": ["x", "y"]}) == ["a.pqt: missing columns ['y']", "a.pqt: no rows"]
+
+    (tmp_path / MANIFEST_FILE).write_text(json.dumps({**manifest, "format": 99}))
+    assert read_manifest(str(tmp_path)) is None
+
+
+def test_app_reads_the_pipeline_manifest(app_root):
+    manifest = dl.get_manifest()
+    assert manifest is not None
+    assert dl.check_app_outputs() == []
+    assert dl.get_available_years() == manifest["master"]["years"] == [2024, 2025]
+    assert all(dl.has_output(key) for key in dl.APP_OUTPUTS)
+    assert len(dl.data_version()) == 16
+
+    # a dropped column shows up as a problem, from the manifest alone
+    entry = manifest["outputs"]["page4/thresholds.pqt"]
+    del entry["schema"]["txn_q25"]
+    path = app_root / "data" / d.OUT_DIR / MANIFEST_FILE
+    mtime = path.stat().st_mtime_ns
+    path.write_text(json.dumps(manifest))
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))  # re-read on a new mtime, whatever the clock resolution
+    assert dl.check_app_outputs() == ["page4/thresholds.pqt: missing columns ['txn_q25']"]
@@ -0,0 +1,115 @@
+"""Partitioned master dataset (master_store.py): layout, partition replace / drop, pushed-down reads."""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from master_store import (
+    CUSTOMER_IDS_FILE,
+    assign_customer_ids,
+    clear_master,
+    drop_months,
+    master_years,
+    partition_dir,
+    read_master,
+    write_master,
+)
+
+
+def transactions(months: list[str], rows_per_month: int = 40, seed: int = 0) -> pd.DataFrame:
+    """Rows over `months` ("YYYY-MM"), shuffled, with the stored date columns."""
+    rng = np.random.default_rng(seed)
+    dates = pd.DatetimeIndex(
+        [pd.Timestamp(m) + pd.Timedelta(days=int(d)) for m in months for d in rng.integers(0, 28, rows_per_month)]
+    )
+    df = pd.DataFrame({
+        "TXN_DATE": dates,
+        "CUST_ID": rng.integers(0, 25, len(dates)).astype("int32"),
+        "TXN_AMOUNT": rng.integers(1, 500, len(dates)),
+        "year": dates.year,
+        "MONTH_NUM": dates.month,
+    })
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+MONTHS = ["2024-08", "2024-09", "2024-10", "2024-11", "2025-01", "2025-02"]
+
+
+@pytest.fixture
+def master(tmp_path) -> tuple[str, pd.DataFrame]:
+    path = str(tmp_path / "master")
+    df = transactions(MONTHS)
+    write_master(df, path)
+    return path, df
+
+
+def test_layout_and_month_ordered_read(master):
+    path, df = master
+    assert os.path.isfile(os.path.join(partition_dir(path, 2024, 10), "part-0.parquet"))
+    assert master_years(path) == [2024, 2025]
+
+    got = read_master(path)
+    assert len(got) == len(df)
+    assert pd.api.types.is_datetime64_any_dtype(got["TXN_DATE"])
+    # MONTH_NUM=10 after MONTH_NUM=9, sorted by TXN_DATE, CUST_ID inside a month
+    assert got["TXN_DATE"].dt.strftime("%Y-%m").drop_duplicates().tolist() == MONTHS
+    assert got.equals(got.sort_values(["year", "MONTH_NUM", "TXN_DATE", "CUST_ID"], kind="stable").reset_index(drop=True))
+    assert got["TXN_AMOUNT"].sum() == df["TXN_AMOUNT"].sum()
+
+
+def test_pushed_down_filters(master):
+    path, df = master
+    assert set(read_master(path, years=[2025])["MONTH_NUM"]) == {1, 2}
+    assert read_master(path, year_months=["2024-10", "2025-02"])["TXN_DATE"].dt.strftime("%Y-%m").unique().tolist() == [
+        "2024-10", "2025-02"
+    ]
+
+    first, last = "2024-09-10", "2025-01-05"
+    got = read_master(path, columns=["TXN_AMOUNT"], date_range=(first, last))
+    expected = df[df["TXN_DATE"].between(pd.Timestamp(first), pd.Timestamp(last))]
+    assert list(got.columns) == ["TXN_AMOUNT"]
+    assert len(got) == len(expected) and got["TXN_AMOUNT"].sum() == expected["TXN_AMOUNT"].sum()
+    assert len(read_master(path, date_range=(None, "2024-08-31"))) == (df["MONTH_NUM"] == 8).sum()
+
+
+def test_replace_only_touches_the_written_months(master):
+    path, df = master
+    new = transactions(["2024-10", "2025-03"], rows_per_month=5, seed=1)
+    write_master(new, path)
+
+    got = read_master(path)
+    month = got["TXN_DATE"].dt.strftime("%Y-%m")
+    assert (month == "2024-10").sum() == 5  # replaced
+    assert (month == "2025-03").sum() == 5  # added
+    assert (month == "2024-09").sum() == 40  # kept
+
+    drop_months(path, ["2024-09", "2023-01"])  # a month that is not there is ignored
+    assert "2024-09" not in set(read_master(path)["TXN_DATE"].dt.strftime("%Y-%m"))
+
+
+def test_append_keeps_existing_files(master):
+    path, _ = master
+    write_master(transactions(["2024-08"], rows_per_month=3, seed=2), path, basename="part-b-{i}.parquet", replace=False)
+    assert len(read_master(path, year_months=["2024-08"])) == 43
+
+
+def test_clear_keeps_the_customer_dictionary(master):
+    path, _ = master
+    assign_customer_ids(path, pd.Series(["A", "B"], dtype=object))
+    clear_master(path)
+    assert os.listdir(path) == [CUSTOMER_IDS_FILE]
+    assert master_years(path) == []
+
+
+def test_missing_and_legacy_paths(tmp_path):
+    assert master_years(str(tmp_path / "nope")) == []
+
+    legacy = str(tmp_path / "legacy.pqt")
+    df = transactions(["2024-12", "2025-01"], rows_per_month=4)
+    df.to_parquet(legacy, index=False)
+    assert master_years(legacy) == [2024, 2025]
+    assert len(read_master(legacy, years=[2025])) == 4
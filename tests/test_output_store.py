@@ -0,0 +1,78 @@
+"""Output writer profile (output_store.write_output): same frame back, year-sorted row groups, encodings."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import output_store
+from output_store import write_output
+
+
+def summary(n: int = 600, seed: int = 0) -> pd.DataFrame:
+    """An unsorted page-style output: year / MONTH_IDX keys, labels, counts and sketch bytes."""
+    rng = np.random.default_rng(seed)
+    year = rng.choice([2024, 2025, 2026], n).astype("int16")
+    return pd.DataFrame({
+        "year": year,
+        "MONTH_IDX": (year.astype("int32") * 12 + rng.integers(0, 12, n)).astype("int32"),
+        "LOYAL_CODE": pd.Categorical(rng.choice(["10K_TRANSACTION", "10K_GET_LOTTO", "ARD_SEC"], n)),
+        "User_Segment": rng.choice(["Achiever", "Explorer", "Inactive"], n).astype(object),
+        "Total_Users": rng.integers(0, 50, n),
+        "SKETCH": [rng.bytes(64) for _ in range(n)],
+    })
+
+
+def test_round_trip_is_the_sorted_frame(tmp_path):
+    df = summary()
+    path = tmp_path / "out.pqt"
+    assert write_output(df, str(path)) == path.stat().st_size
+
+    got = pd.read_parquet(path)
+    expected = df.sort_values(["year", "MONTH_IDX"], kind="stable", ignore_index=True)
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_one_row_group_per_year_with_statistics(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.pqt")
+    write_output(summary(), path)
+
+    meta = pq.ParquetFile(path).metadata
+    year_col = meta.schema.to_arrow_schema().get_field_index("year")
+    stats = [meta.row_group(i).column(year_col).statistics for i in range(meta.num_row_groups)]
+    assert [(s.min, s.max) for s in stats] == [(2024, 2024), (2025, 2025), (2026, 2026)]
+
+    only_2025 = pq.read_table(path, filters=[("year", "==", 2025)])
+    assert set(only_2025["year"].to_pylist()) == {2025}
+
+    monkeypatch.setattr(output_store, "ROW_GROUP_ROWS", 50)
+    write_output(summary(), path)
+    assert pq.ParquetFile(path).metadata.num_row_groups > 3  # years split further, never mixed
+    meta = pq.ParquetFile(path).metadata
+    for i in range(meta.num_row_groups):
+        s = meta.row_group(i).column(year_col).statistics
+        assert s.min == s.max
+
+
+def test_encodings_and_compression(tmp_path):
+    path = str(tmp_path / "out.pqt")
+    write_output(summary(), path)
+
+    row_group = pq.ParquetFile(path).metadata.row_group(0)
+    columns = {row_group.column(i).path_in_schema: row_group.column(i) for i in range(row_group.num_columns)}
+    assert {c.compression for c in columns.values()} == {"ZSTD"}
+    for name in ("LOYAL_CODE", "User_Segment", "Total_Users"):
+        assert "RLE_DICTIONARY" in columns[name].encodings, name
+    assert "RLE_DICTIONARY" not in columns["SKETCH"].encodings
+
+
+def test_frames_without_time_keys_and_empty_frames(tmp_path):
+    lookup = pd.DataFrame({"LOYAL_CODE": ["B", "A"], "GROUP": ["x", "y"]}, index=[5, 3])
+    write_output(lookup, str(tmp_path / "lookup.pqt"))
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "lookup.pqt"), lookup.reset_index(drop=True))
+
+    empty = summary().iloc[:0]
+    write_output(empty, str(tmp_path / "empty.pqt"))
+    got = pd.read_parquet(tmp_path / "empty.pqt")
+    assert got.empty and list(got.columns) == list(empty.columns)
@@ -0,0 +1,64 @@
+"""Cutoff counts from the point histogram (point_hist.py) vs the per-cutoff filter loop they replaced."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from point_hist import BIN_WIDTH, cutoff_counts, point_histogram
+
+
+def original_cutoff_counts(users: pd.DataFrame, cutoffs: list[int]) -> pd.DataFrame:
+    """The page 1 loop: users with c <= points < 1000 per month, one filter + groupby per cutoff."""
+    under = users[users["user_total_point"] < 1000]
+    out = []
+    for c in cutoffs:
+        tmp = under[under["user_total_point"] >= c].groupby("MONTH_IDX").size().reset_index(name="Counts")
+        tmp["cutoff"] = f"{c}+"
+        out.append(tmp)
+    return pd.concat(out, ignore_index=True)
+
+
+def user_months() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    points = np.concatenate([
+        rng.gamma(2.0, 250.0, 5_000).round(1),
+        [0, 9.99, 10, 399.9, 400, 899.99, 900, 989.5, 990, 999.9, 1000, 1000.1, 5000, -20, -0.5],
+    ])
+    months = rng.integers(24288, 24300, len(points))
+    months[-15:] = 24300  # edge values in a month of their own
+    users = pd.DataFrame({"MONTH_IDX": months.astype("int32"), "user_total_point": points})
+    # a month where nobody is under 1000
+    return pd.concat([users, pd.DataFrame({"MONTH_IDX": [24301, 24301], "user_total_point": [1000.0, 2500.0]})])
+
+
+def test_cutoff_counts_match_per_cutoff_filter():
+    users = user_months()
+    cutoffs = [0, 10, 400, 500, 600, 700, 800, 900, 990]
+
+    got = cutoff_counts(point_histogram(users), cutoffs)
+    expected = original_cutoff_counts(users, cutoffs)
+
+    merged = got.assign(cutoff=got["cutoff"].astype(str)).merge(
+        expected, on=["MONTH_IDX", "cutoff"], how="outer", suffixes=("", "_expected")
+    )
+    # months without a user in range: 0 here, no row in the loop's output
+    assert (merged["Counts"] == merged["Counts_expected"].fillna(0)).all()
+    assert merged["Counts"].notna().all()
+    assert got["cutoff"].cat.categories.tolist() == [f"{c}+" for c in cutoffs]
+
+
+def test_histogram_counts_every_user_under_the_limit():
+    users = user_months()
+    hist = point_histogram(users)
+
+    in_range = (users["user_total_point"] >= 0) & (users["user_total_point"] < 1000)
+    assert hist["Users"].sum() == in_range.sum()
+    assert (hist.groupby("MONTH_IDX").size() == 1000 // BIN_WIDTH).all()  # dense bins, months in range or not
+    assert 24301 in set(hist["MONTH_IDX"]) and hist.loc[hist["MONTH_IDX"] == 24301, "Users"].sum() == 0
+
+
+def test_off_grid_cutoffs_round_down_to_the_bin():
+    hist = point_histogram(user_months())
+    got = cutoff_counts(hist, [405, 400])
+    assert got.loc[got["cutoff"] == "405+", "Counts"].tolist() == got.loc[got["cutoff"] == "400+", "Counts"].tolist()
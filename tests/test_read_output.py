@@ -0,0 +1,78 @@
+"""Year / column-selective output loaders (data_loader.read_output, load_precomputed_*), new and legacy files."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import data.data_loader as dl
+from conftest import REPO
+from date_cols import month_year
+
+
+def year_rows(df: pd.DataFrame, year: int) -> pd.DataFrame:
+    if "year" in df.columns:
+        return df[df["year"] == year]
+    if "MONTH_IDX" in df.columns:
+        return df[month_year(df["MONTH_IDX"]) == year]
+    return df
+
+
+@pytest.fixture(params=["ipc", "parquet"])
+def output_source(request, app_root, monkeypatch):
+    if request.param == "parquet":
+        monkeypatch.setattr(dl, "ipc_file", lambda key=None: None)
+    return request.param
+
+
+def test_year_and_columns_match_a_filtered_full_read(output_source):
+    for key in dl.APP_OUTPUTS:
+        full = dl.with_month_key(dl.with_cust_id(pd.read_parquet(dl.PRECOMPUTED_DIR / key)))
+        columns = list(reversed(dl.APP_OUTPUTS[key]))[:3]
+        for year in (2024, 2025):
+            got = dl.read_output(key, year, columns)
+            expected = year_rows(full, year)[columns].reset_index(drop=True)
+            pd.testing.assert_frame_equal(got.reset_index(drop=True), expected, check_index_type=False, obj=f"{key} {year}")
+
+
+def test_page_loaders_return_only_the_year(output_source):
+    users, thresholds, monthly, loyal = dl.load_precomputed_page4(2025, {"users_agg_df": ["CUST_ID", "year"]})
+    assert list(users.columns) == ["CUST_ID", "year"]
+    for df in (users, thresholds, loyal):
+        assert set(df["year"]) == {2025}
+    assert set(month_year(monthly["MONTH_IDX"])) == {2025}
+
+    user_months, reward, hist = dl.load_precomputed_page1(2024)
+    assert set(month_year(reward["MONTH_IDX"])) == set(month_year(hist["MONTH_IDX"])) == {2024}
+    assert len(user_months) > 0 and dl.output_years(dl.USER_MONTHLY_KEY) == [2024, 2025]
+
+
+def test_callers_do_not_change_the_cached_frame(output_source):
+    df = dl.read_output(dl.PAGE4_USERS_KEY, 2025)
+    df["extra"] = 1
+    df = df.rename(columns={"year": "YEAR"})
+    again = dl.read_output(dl.PAGE4_USERS_KEY, 2025)
+    assert "extra" not in again.columns and "year" in again.columns
+
+
+def test_legacy_committed_outputs(monkeypatch):
+    """The outputs in the repo predate CUST_ID / MONTH_IDX / the manifest: converted on read."""
+    monkeypatch.chdir(REPO)
+    st.cache_data.clear()
+    assert dl.get_manifest() is None
+
+    key = "page1/precomputed_monthly_reward_stat.pqt"
+    stored = pd.read_parquet(dl.PRECOMPUTED_DIR / key)
+    assert "year_month" in stored.columns and "MONTH_IDX" not in stored.columns
+    year = int(stored["year_month"].str[:4].max())
+
+    got = dl.read_output(key, year, ["MONTH_IDX", "total_points"])
+    assert list(got.columns) == ["MONTH_IDX", "total_points"]
+    assert set(month_year(got["MONTH_IDX"])) == {year}
+    assert got["total_points"].sum() == pytest.approx(stored.loc[stored["year_month"].str.startswith(str(year)), "total_points"].sum())
+
+    users = dl.read_output(dl.PAGE4_USERS_KEY, year, ["CUST_ID", "MONTH_IDX"])
+    assert users["CUST_ID"].dtype == "int32" and set(month_year(users["MONTH_IDX"])) == {year}
+    assert dl.output_years(key) == sorted(int(y) for y in stored["year_month"].str[:4].unique())
+    st.cache_data.clear()
@@ -0,0 +1,103 @@
+"""Run report (run_report.py): step records, row / byte attribution, the per-run JSON and history."""
+
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import data_pre_compute as d
+import run_report as rr
+
+
+@pytest.fixture(autouse=True)
+def no_leftover_records():
+    rr.take_records()
+    yield
+    rr.take_records()
+
+
+@rr.instrument
+def double(df: pd.DataFrame, factor: int = 2) -> pd.DataFrame:
+    return pd.concat([df] * factor, ignore_index=True)
+
+
+def test_nested_steps_and_attribution():
+    with rr.step("stage", kind="stage") as stage:
+        rr.track_input(100, 4_000)  # counts for every open step
+        out = double(pd.DataFrame({"x": range(10)}))
+        with rr.step("write"):
+            rr.track_output(len(out), 512)
+        stage["extra"] = 1
+
+    records = {r["step"]: r for r in rr.take_records()}
+    assert list(records) == ["stage/double", "stage/write", "stage"]  # inner steps finish first
+    assert rr.take_records() == []
+
+    assert records["stage/double"]["rows_in"] == 10 and records["stage/double"]["rows_out"] == 20
+    assert records["stage/write"]["rows_out"] == 20 and records["stage/write"]["bytes_out"] == 512
+    assert records["stage"]["rows_in"] == 100 and records["stage"]["rows_out"] == 20
+    assert records["stage"]["kind"] == "stage" and records["stage"]["extra"] == 1
+    for rec in records.values():
+        assert rec["status"] == "ok" and rec["wall_s"] >= 0 and rec["peak_rss_delta_mb"] >= 0
+        assert "_rss0" not in rec and "_peak" not in rec
+
+
+def test_instrument_counts_tables_and_failed_steps():
+    @rr.instrument
+    def passthrough(table: pa.Table) -> dict:
+        return {"a": table, "b": table.slice(0, 1)}
+
+    passthrough(pa.table({"x": [1, 2, 3]}))
+    with pytest.raises(ZeroDivisionError):
+        with rr.step("broken"):
+            1 / 0
+
+    records = {r["step"]: r for r in rr.take_records()}
+    assert records["passthrough"]["rows_in"] == 3 and records["passthrough"]["rows_out"] == 4
+    assert records["broken"]["status"] == "error"
+
+
+def test_run_ids_sort_by_start_time():
+    ids = [rr.new_run_id() for _ in range(3)]
+    assert ids == sorted(ids) and len(set(ids)) == 3
+
+
+def test_report_files_and_previous_run(tmp_path):
+    report_dir = str(tmp_path / "reports")
+    first, second = rr.new_run_id(), rr.new_run_id()
+    with rr.step("a"):
+        pass
+    rr.write_report(rr.take_records() + [rr.skipped("b")], report_dir, first, {"base_rows": 10})
+    assert rr.previous_run(report_dir, first) is None
+
+    with rr.step("a"):
+        pass
+    report = rr.write_report(rr.take_records(), report_dir, second)
+    assert list(report.columns) == rr.REPORT_COLS
+
+    with open(tmp_path / "reports" / f"run_{first}.json") as f:
+        saved = json.load(f)
+    assert saved["meta"]["run_id"] == first and saved["meta"]["base_rows"] == 10
+    assert [s["status"] for s in saved["steps"]] == ["ok", "skipped"]
+
+    history = pd.read_parquet(tmp_path / "reports" / "history.pqt")
+    assert history["run_id"].tolist() == [first, first, second]
+    assert rr.previous_run(report_dir, second)["step"].tolist() == ["a", "b"]
+
+
+def test_pipeline_writes_a_report_per_run(tmp_path, raw_path, run_pipeline):
+    workdir = run_pipeline(tmp_path / "data", raw_path)
+    run_pipeline(workdir, raw_path)  # every stage cached
+
+    history = pd.read_parquet(workdir / d.REPORT_DIR / "history.pqt")
+    runs = sorted(history["run_id"].unique())
+    assert len(runs) == 2 and len(list((workdir / d.REPORT_DIR).glob("run_*.json"))) == 2
+
+    first, second = (history[history["run_id"] == r] for r in runs)
+    stages = first[first["kind"] == "stage"]
+    assert (stages["status"] == "ok").all() and set(stages["step"]) == set(second["step"])
+    assert stages.loc[stages["step"] == "code_grouped", "rows_in"].item() >= 1
+    assert (second["status"] == "skipped").all()
@@ -0,0 +1,91 @@
+"""Per-year thresholds and segments (segments.py) vs the original per-year quantiles + ordered .loc writes."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from segments import add_flags, assign_segments, segment_thresholds
+
+
+def original_year_segments(users: pd.DataFrame) -> tuple[dict, pd.Series]:
+    """One year, as the original page 4 loop: thresholds from .quantile, segments from ordered .loc writes."""
+    reached = users[users["Reached_1000_Flag"] == 1]
+    under = users[(users["Reached_1000_Flag"] == 0) & (users["Inactive"] == 0)]
+    thresholds = {
+        "txn_q25": float(under["Transaction_Count"].quantile(0.25)),
+        "txn_q75": float(under["Transaction_Count"].quantile(0.75)),
+        "days_q25": float(under["Active_Days"].quantile(0.25)),
+        "days_q75": float(under["Active_Days"].quantile(0.75)),
+        "points_q25": float(under["Total_Points"].quantile(0.25)),
+        "points_q75": float(under["Total_Points"].quantile(0.75)),
+        "achievers_txn_q25": float(reached["Transaction_Count"].quantile(0.25)) if len(reached) else 0.0,
+        "achievers_points_q25": float(reached["Total_Points"].quantile(0.25)) if len(reached) else 0.0,
+    }
+
+    seg = pd.Series("Irregular_Participant", index=users.index, dtype=object)
+    txn, days = users["Transaction_Count"], users["Active_Days"]
+    seg[(txn >= thresholds["txn_q75"]) & (days > thresholds["days_q75"])] = "Consistent"
+    seg[(txn < thresholds["txn_q75"]) & (days <= thresholds["days_q75"])] = "Explorer"
+    seg[txn >= thresholds["achievers_txn_q25"]] = "High_Effort"
+    seg[users["Reached_1000_Flag"] == 1] = "Achiever"
+    seg[users["Inactive"] == 1] = "Inactive"
+    return thresholds, seg
+
+
+def segment_users() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 400
+    mixed = pd.DataFrame({
+        "year": 2024,
+        "Transaction_Count": rng.integers(1, 60, n),
+        "Active_Days": rng.integers(1, 25, n),
+        "Total_Points": rng.integers(0, 2500, n),
+    })
+    # no achievers: the achiever quantiles have an empty population
+    no_achievers = pd.DataFrame({
+        "year": 2025,
+        "Transaction_Count": [1, 2, 5, 9, 14, 3],
+        "Active_Days": [1, 2, 3, 8, 2, 1],
+        "Total_Points": [10, 999, 300, 450, 700, 20],
+    })
+    # only achievers + inactive users: the "under" quantiles have an empty population
+    no_under = pd.DataFrame({
+        "year": 2026,
+        "Transaction_Count": [1, 30, 45, 1],
+        "Active_Days": [1, 10, 12, 1],
+        "Total_Points": [5, 1200, 3000, 1500],
+    })
+    return add_flags(pd.concat([mixed, no_achievers, no_under], ignore_index=True))
+
+
+def test_segments_match_original_per_year_loop():
+    users = segment_users()
+
+    thresholds = segment_thresholds(users, by=["year"])
+    # page 4: an empty achiever population means 0.0 (the original `if len(reached) else 0.0`)
+    thresholds[["achievers_txn_q25", "achievers_points_q25"]] = thresholds[
+        ["achievers_txn_q25", "achievers_points_q25"]
+    ].fillna(0.0)
+    segments = pd.Series(assign_segments(users, thresholds, by=["year"]).astype(object), index=users.index)
+
+    for year, group in users.groupby("year"):
+        exp_thresholds, exp_segments = original_year_segments(group)
+        got = thresholds.loc[thresholds["year"] == year].iloc[0].drop("year").to_dict()
+        assert got.keys() == exp_thresholds.keys()
+        for name, value in exp_thresholds.items():
+            assert got[name] == pytest.approx(value, nan_ok=True), (year, name)
+        assert segments[group.index].tolist() == exp_segments.tolist(), year
+
+
+def test_segments_single_group_and_dict_thresholds():
+    users = segment_users()
+    year = users[users["year"] == 2024].reset_index(drop=True)
+
+    table = segment_thresholds(year)
+    as_dict = table.iloc[0].to_dict()
+    _, expected = original_year_segments(year)
+
+    assert list(assign_segments(year, table).astype(object)) == expected.tolist()
+    assert list(assign_segments(year, as_dict).astype(object)) == expected.tolist()
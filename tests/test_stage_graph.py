@@ -0,0 +1,134 @@
+"""stage_graph.py on toy stages in tmp_path: dependency order, parallel runs and the stage cache."""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from stage_graph import is_fresh, load_manifest, run_stages, select_stages, stage_fingerprint, topological_order
+
+
+def normalize(sources: list[str], out: str, log: str) -> None:
+    """Toy stage: stripped, joined text of `sources` -> `out`; appends its output name to `log`."""
+    text = "|".join(Path(s).read_text().strip() for s in sources)
+    Path(out).write_text(text)
+    with open(log, "a") as f:
+        f.write(Path(out).name + "\n")
+
+
+@pytest.fixture
+def toy(tmp_path):
+    """
+    in_a -> a -> c -> d
+    in_b -> b -------/
+    """
+    (tmp_path / "in_a.txt").write_text("A")
+    (tmp_path / "in_b.txt").write_text("B")
+    log = str(tmp_path / "runs.log")
+    p = {name: str(tmp_path / f"{name}.txt") for name in ("in_a", "in_b", "a", "b", "c", "d")}
+
+    def stage(deps, inputs, sources, out):
+        return {"deps": deps, "inputs": inputs, "version": 1, "outputs": [p[out]], "run": partial(normalize, sources, p[out], log)}
+
+    stages = {
+        "d": stage(["b", "c"], [], [p["b"], p["c"]], "d"),
+        "c": stage(["a"], [], [p["a"]], "c"),
+        "a": stage([], [p["in_a"]], [p["in_a"]], "a"),
+        "b": stage([], [p["in_b"]], [p["in_b"]], "b"),
+    }
+    manifest = str(tmp_path / "manifest.json")
+
+    def run(selected=None, **kwargs) -> list[str]:
+        Path(log).write_text("")
+        run_stages(stages, selected or topological_order(stages), manifest_path=manifest, **kwargs)
+        return sorted(Path(line).stem for line in Path(log).read_text().split())
+
+    return stages, p, run
+
+
+def test_topological_order():
+    stages = {
+        "d": {"deps": ["b", "c"]},
+        "c": {"deps": ["a"]},
+        "b": {"deps": []},
+        "a": {"deps": []},
+    }
+    order = topological_order(stages)
+    assert sorted(order) == ["a", "b", "c", "d"]
+    for name, stage in stages.items():
+        assert all(order.index(dep) < order.index(name) for dep in stage["deps"])
+
+
+def test_cycle_and_unknown_dependency():
+    with pytest.raises(ValueError, match="a -> b -> c -> a"):
+        topological_order({"a": {"deps": ["b"]}, "b": {"deps": ["c"]}, "c": {"deps": ["a"]}})
+    with pytest.raises(KeyError, match="missing"):
+        topological_order({"a": {"deps": ["missing"]}})
+
+
+def test_select_stages(toy):
+    stages, p, run = toy
+    assert select_stages(stages, ["c"]) == ["a", "c"]
+    assert sorted(select_stages(stages, ["d.txt"])) == ["a", "b", "c", "d"]  # output file name
+    with pytest.raises(KeyError):
+        select_stages(stages, ["nope"])
+
+    run()
+    assert select_stages(stages, ["d"]) == ["d"]  # built deps are reused
+    assert sorted(select_stages(stages, ["d"], all_deps=True)) == ["a", "b", "c", "d"]  # cache decides
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_runs_every_stage_after_its_deps(toy, workers):
+    stages, p, run = toy
+    assert run(workers=workers) == ["a", "b", "c", "d"]
+    assert Path(p["d"]).read_text() == "B|A"
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_rerun_skips_every_stage(toy, workers):
+    stages, p, run = toy
+    run(workers=workers)
+    assert run(workers=workers) == []
+    assert run(workers=workers, force=True) == ["a", "b", "c", "d"]
+
+
+def test_changed_input_rebuilds_only_its_downstream(toy):
+    stages, p, run = toy
+    run()
+    Path(p["in_b"]).write_text("B2")
+    assert run() == ["b", "d"]
+    assert Path(p["d"]).read_text() == "B2|A"
+
+
+def test_identical_rebuild_does_not_invalidate_dependants(toy):
+    stages, p, run = toy
+    run()
+    Path(p["in_a"]).write_text("  A \n")  # a reruns, but writes the same "A"
+    assert run() == ["a"]
+
+
+def test_version_bump_and_touched_outputs(toy):
+    stages, p, run = toy
+    run()
+    stages["c"]["version"] = 2
+    assert run() == ["c"]  # same output -> d stays fresh
+
+    Path(p["c"]).write_text("edited by hand")
+    assert run() == ["c"]  # restored; its output is back to what d was built from
+
+
+def test_fingerprint_and_freshness(toy):
+    stages, p, run = toy
+    run()
+    manifest = load_manifest(str(Path(p["a"]).parent / "manifest.json"))
+
+    fp = stage_fingerprint(stages["c"], manifest)
+    assert is_fresh(stages["c"], fp, manifest["c"])
+    assert not is_fresh(stages["c"], fp, None)
+    assert stage_fingerprint({**stages["c"], "version": 9}, manifest) != fp
+
+    Path(p["c"]).unlink()
+    assert not is_fresh(stages["c"], fp, manifest["c"])
@@ -0,0 +1,70 @@
+"""Streaming build of the master (data_pre_compute.build_code_grouped_streaming) vs the in-memory build."""
+
+from __future__ import annotations
+
+import glob
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_pre_compute as d
+import hll
+from conftest import RAW_ROWS
+from master_store import NULL_CUST_ID, read_customer_ids, read_master
+
+BATCH_ROWS = 6_000
+
+
+def output_paths(workdir) -> list[str]:
+    return sorted(
+        os.path.relpath(p, workdir)
+        for p in glob.glob(str(workdir / d.OUT_DIR / "**" / "*.pqt"), recursive=True)
+        if "run_reports" not in p
+    )
+
+
+def with_codes(df: pd.DataFrame, workdir) -> pd.DataFrame:
+    """CUST_ID -> CUST_CODE (ids are handed out per batch when streaming), rows in a canonical order."""
+    df = df.copy()
+    if "CUST_ID" in df.columns:
+        codes = read_customer_ids(str(workdir / d.CODE_GROUPED_OUTPUT)).set_index("CUST_ID")["CUST_CODE"]
+        df["CUST_ID"] = df["CUST_ID"].map(codes).where(df["CUST_ID"] != NULL_CUST_ID, None)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif df[col].dtype == object:
+            df[col] = df[col].map(lambda v: tuple(sorted(v)) if isinstance(v, np.ndarray) else v)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("backend", d.BACKENDS)
+def test_streaming_matches_in_memory_build(backend, tmp_path, raw_path, run_pipeline, capsys):
+    full = run_pipeline(tmp_path / "full", raw_path, backend=backend)
+    capsys.readouterr()
+    streamed = run_pipeline(tmp_path / "stream", raw_path, backend=backend, stream=True, batch_rows=BATCH_ROWS)
+    assert capsys.readouterr().out.count("[STREAM] batch") == math.ceil(RAW_ROWS / BATCH_ROWS)
+
+    columns = ["TXN_DATE", "CUST_ID", "TXN_AMOUNT", "LOYAL_CODE", "CODE_GROUP", "TXN_DESC", "MONTH_IDX"]
+    master = [with_codes(read_master(str(run / d.CODE_GROUPED_OUTPUT), columns=columns), run) for run in (full, streamed)]
+    assert len(master[0]) > 0
+    pd.testing.assert_frame_equal(master[0], master[1])
+
+    paths = output_paths(full)
+    assert paths == output_paths(streamed)
+    for path in paths:
+        left, right = pd.read_parquet(full / path), pd.read_parquet(streamed / path)
+        if path == d.OUT_USER_SKETCHES:
+            est = [hll.estimate(hll.from_bytes(t["SKETCH"]).max(axis=0)) for t in (left, right)]
+            assert est[0] == pytest.approx(est[1], rel=0.02)
+            left, right = left.drop(columns="SKETCH"), right.drop(columns="SKETCH")
+        pd.testing.assert_frame_equal(with_codes(left, full), with_codes(right, streamed), obj=path)
+
+
+def test_streamed_ids_are_unique_per_code(tmp_path, raw_path, run_pipeline):
+    workdir = run_pipeline(tmp_path / "stream", raw_path, stream=True, batch_rows=BATCH_ROWS)
+    ids = read_customer_ids(str(workdir / d.CODE_GROUPED_OUTPUT))
+    assert ids["CUST_CODE"].is_unique and ids["CUST_ID"].is_unique
+    assert np.array_equal(np.sort(ids["CUST_ID"].to_numpy()), np.arange(len(ids)))
@@ -0,0 +1,77 @@
+"""
+Page 2 transaction summary: one unpadded groupby in the pipeline, the month x GROUP padding
+derived in the app (data_loader.pad_transaction_summary) vs the original with_pad build.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from data.data_loader import pad_transaction_summary
+from date_cols import month_keys, month_label_table
+
+EPS = 1e-6
+
+
+def original_summary(df: pd.DataFrame, lookup: dict, pad: bool) -> pd.DataFrame:
+    """build_transaction_summary_no_pad / _with_pad as they were (year_month strings, CUST_CODE)."""
+    ts = (
+        df.groupby(["LOYAL_CODE", "year_month", "CODE_GROUP"], observed=True)
+        .agg(
+            Transaction_Freq=("TXN_AMOUNT", "size"),
+            Total_Users=("CUST_CODE", "nunique"),
+            Total_Amount=("TXN_AMOUNT", "sum"),
+        )
+        .reset_index()
+        .rename(columns={"CODE_GROUP": "GROUP"})
+    )
+    ts["DESC"] = ts["LOYAL_CODE"].map(lookup).fillna(ts["LOYAL_CODE"])
+    if pad:
+        product = pd.MultiIndex.from_product(
+            [ts["year_month"].unique(), ts["GROUP"].unique()], names=["year_month", "GROUP"]
+        ).to_frame(index=False)
+        ts = product.merge(ts, on=["year_month", "GROUP"], how="left").fillna(
+            {"Transaction_Freq": EPS, "Total_Users": EPS, "Total_Amount": EPS, "LOYAL_CODE": "__PAD__", "DESC": "—"}
+        )
+    ts["year"] = ts["year_month"].astype(str).str[:4].astype(int)
+    return ts
+
+
+def transactions() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 3_000
+    codes = np.array(["10K_TRANSACTION", "ARD_SEC", "10K_GET_LOTTO", "INF2025_X", "CAR_DAATGAL"])
+    groups = {"10K_TRANSACTION": "Core Transactions", "ARD_SEC": "Account Opening", "10K_GET_LOTTO": "Merchant & Lifestyle",
+              "INF2025_X": "Campaigns & Events", "CAR_DAATGAL": "Insurance"}
+    months = np.array(["2024-01", "2024-02", "2024-12", "2025-01", "2025-06"])
+    df = pd.DataFrame({
+        "LOYAL_CODE": codes[rng.integers(0, len(codes), n)],
+        "year_month": months[rng.integers(0, len(months), n)],
+        "CUST_CODE": np.array([f"CIF-{i}" for i in range(200)], dtype=object)[rng.integers(0, 200, n)],
+        "TXN_AMOUNT": rng.integers(1, 100, n).astype(float),
+    })
+    # Insurance only in 2025-06: every other month needs a pad row for it
+    df.loc[df["LOYAL_CODE"] == "CAR_DAATGAL", "year_month"] = "2025-06"
+    df["CODE_GROUP"] = df["LOYAL_CODE"].map(groups)
+    return df
+
+
+def canonical(ts: pd.DataFrame) -> pd.DataFrame:
+    return ts.sort_values(["year_month", "GROUP", "LOYAL_CODE"]).reset_index(drop=True)
+
+
+def test_padded_view_matches_original_with_pad():
+    df = transactions()
+    lookup = {"10K_TRANSACTION": "Гүйлгээ", "ARD_SEC": "Ард сек"}
+
+    no_pad = original_summary(df, lookup, pad=False)
+    stored = no_pad.assign(MONTH_IDX=month_keys(no_pad["year_month"])).drop(columns="year_month")  # the stored, month-keyed form
+
+    padded = month_label_table(pad_transaction_summary(stored))
+    expected = original_summary(df, lookup, pad=True)
+
+    assert len(padded) == len(expected) > len(no_pad)
+    assert (padded.groupby("year_month")["GROUP"].nunique() == df["CODE_GROUP"].nunique()).all()
+    pd.testing.assert_frame_equal(canonical(padded[expected.columns]), canonical(expected), check_dtype=False)
+    assert padded["year_month"].is_monotonic_increasing  # animation frames in month order
@@ -0,0 +1,60 @@
+"""TXN_DESC cleaning once per distinct value (txn_desc.py) vs the original per-row string chain."""
+
+from __future__ import annotations
+
+import pandas as pd
+
+from txn_desc import desc_is_test, factorize_desc, normalize_txn_desc
+
+
+def original_desc(desc: pd.Series, loyal_code: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """The per-row string chain clean_desc_unique replaced."""
+    desc = desc.fillna("").astype(str).str.strip()
+    desc = (
+        desc.str.replace("Крипто Вик", "Crypto Week", regex=False)
+        .str.replace("Кривто Вик", "Crypto Week", regex=False)
+        .str.replace(".", "", regex=False)
+        .str.lower()
+    )
+    loyal_code = loyal_code.copy()
+    crypto_week = desc.str.contains("crypto week", case=False, na=False)
+    loyal_code[crypto_week] = "ARD_LOTTO"
+    lotto = desc.str.contains(r"lotto|6/42|лотто", case=False, na=False)
+    loyal_code[lotto & ~crypto_week] = "10K_GET_LOTTO"
+    return desc, loyal_code
+
+
+EDGE_DESCS = [
+    None,
+    "",
+    "  Тест ",
+    "Тест",
+    "Крипто Вик 2025.",
+    "Кривто Вик",
+    "CRYPTO WEEK lotto",       # crypto week wins over lotto
+    "Lotto 6/42",
+    "6/42",
+    "Лотто",                   # Cyrillic, mixed case
+    "лотто",
+    "a.b.c.",
+    "  Шилжүүлэг  ",
+    "Шилжүүлэг",
+    "Lotto 6/42",              # repeated value
+]
+
+
+def test_clean_desc_matches_per_row_chain():
+    desc = pd.Series(EDGE_DESCS, dtype=object)
+    loyal_code = pd.Series([f"CODE_{i}" for i in range(len(desc))], dtype=object)
+
+    got_desc, got_code = normalize_txn_desc(desc, loyal_code)
+    exp_desc, exp_code = original_desc(desc, loyal_code)
+
+    assert got_desc.tolist() == exp_desc.tolist()
+    assert got_code.tolist() == exp_code.tolist()
+
+
+def test_desc_is_test_matches_per_row_filter():
+    desc = pd.Series(EDGE_DESCS, dtype=object)
+    expected = (desc.fillna("").astype(str).str.strip() == "Тест").to_numpy()
+    assert (desc_is_test(factorize_desc(desc)) == expected).all()
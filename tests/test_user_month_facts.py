@@ -0,0 +1,74 @@
+"""
+Page 1 / misc / page 4 / page 5 outputs derived from the shared user-month facts table
+vs the same numbers computed straight from the master rows (as the original per-page groupbys did).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_pre_compute as d
+from master_store import NULL_CUST_ID, read_master
+
+
+@pytest.fixture
+def null_customer_run(tmp_path, raw_frame, write_raw, run_pipeline):
+    """Pipeline run on raw data with null CUST_CODE rows: 150 scattered ones + every row of JAN-24."""
+    rng = np.random.default_rng(0)
+    raw_frame.loc[rng.choice(len(raw_frame), 150, replace=False), "CUST_CODE"] = None
+    raw_frame.loc[raw_frame["TXN_DATE"].str.endswith("JAN-24"), "CUST_CODE"] = None
+    return run_pipeline(tmp_path / "data", write_raw(raw_frame))
+
+
+def master_rows(workdir) -> pd.DataFrame:
+    master = read_master(str(workdir / d.CODE_GROUPED_OUTPUT), columns=["TXN_DATE", "CUST_ID", "TXN_AMOUNT", "year", "MONTH_NUM"])
+    master["MONTH_END"] = master["TXN_DATE"] + pd.offsets.MonthEnd(0)
+    return master
+
+
+def test_monthly_reward_stat_counts_null_customer_points(null_customer_run):
+    master = master_rows(null_customer_run)
+    assert (master["CUST_ID"] == NULL_CUST_ID).sum() > 150
+
+    # original: sum over every transaction of the month, nunique over CUST_CODE (NaN skipped)
+    expected = master.groupby("MONTH_END").agg(
+        total_points=("TXN_AMOUNT", "sum"),
+        total_users=("CUST_ID", lambda ids: ids[ids != NULL_CUST_ID].nunique()),
+    )
+    stat = pd.read_parquet(null_customer_run / d.OUT_MONTHLY_SUMMARY).set_index("TXN_DATE")
+
+    assert stat.index.tolist() == expected.index.tolist()  # JAN-24 (no known customer) included
+    np.testing.assert_allclose(stat["total_points"], expected["total_points"])
+    assert stat["total_users"].tolist() == expected["total_users"].tolist()
+
+    jan = stat.loc[pd.Timestamp("2024-01-31")]
+    assert jan["total_points"] > 0
+    assert jan[["total_users", "num_user_passed_1000", "num_user_fail_1000", "total_new_users"]].tolist() == [0, 0, 0, 0]
+
+
+def test_per_user_outputs_leave_out_null_customers(null_customer_run):
+    master = master_rows(null_customer_run)
+    known = master[master["CUST_ID"] != NULL_CUST_ID]
+    expected = known.groupby(["CUST_ID", "MONTH_END"])["TXN_AMOUNT"].sum()
+
+    users = pd.read_parquet(null_customer_run / d.OUT_USER_MONTHLY).set_index(["CUST_ID", "TXN_DATE"])["user_total_point"]
+    pd.testing.assert_series_equal(users.sort_index(), expected.sort_index(), check_names=False)
+
+    for path in (d.OUT_PAGE4_USERS, d.OUT_PAGE5_USERS_AGG, d.OUT_PAGE5_MONTHLY_POINTS):
+        assert (pd.read_parquet(null_customer_run / path)["CUST_ID"] != NULL_CUST_ID).all(), path
+    counts = pd.read_parquet(null_customer_run / d.OUT_COUNTS)
+    assert counts["Counts"].sum() == len(expected)
+
+
+def test_facts_keep_one_null_customer_row_per_month(null_customer_run):
+    facts = pd.read_parquet(null_customer_run / d.OUT_USER_MONTH_FACTS)
+    master = master_rows(null_customer_run)
+
+    nulls = facts[facts["CUST_ID"] == NULL_CUST_ID]
+    assert not nulls.duplicated(["year", "MONTH_NUM"]).any()
+    np.testing.assert_allclose(
+        facts.groupby(["year", "MONTH_NUM"])["Total_Points"].sum(),
+        master.groupby(["year", "MONTH_NUM"])["TXN_AMOUNT"].sum(),
+    )
@@ -0,0 +1,31 @@
+"""year_view (data_loader.py): zero-copy year slices of the cached master vs a boolean year filter."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+import data.data_loader as dl
+
+
+def test_year_view_matches_a_year_filter(app_root):
+    master = dl.load_data()
+    years = master["MONTH_IDX"] // 12
+
+    for year in dl.get_available_years():
+        view = dl.year_view(year)
+        assert len(view) > 0
+        pd.testing.assert_frame_equal(view, master[years == year])
+        assert np.shares_memory(view["TXN_AMOUNT"].to_numpy(), master["TXN_AMOUNT"].to_numpy())
+
+    assert dl.year_view(1999).empty
+    assert list(dl.year_view(1999).columns) == list(master.columns)
+
+
+def test_page5_bundle_works_on_the_view(app_root):
+    bundle = dl.get_page5_bundle(2025)
+    master = dl.load_data()
+    assert np.shares_memory(bundle["df_year"]["CUST_ID"].to_numpy(), master["CUST_ID"].to_numpy())
+
+    expected = dl.get_users_agg_by_monthnum(dl.load_data(years=(2025,)))
+    pd.testing.assert_frame_equal(bundle["users_agg_df"][expected.columns], expected)